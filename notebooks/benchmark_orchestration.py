@@ -0,0 +1,69 @@
+"""Benchmark orchestration overhead against the fake Ollama server."""
+
+import os
+import json
+import time
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+from src.benchmarking.fake_ollama import FakeOllamaServer, FakeOllamaConfig, LatencyModel
+
+
+def percentile(values, pct):
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))
+    return ordered[index]
+
+
+def main(num_queries: int = 40, concurrency: int = 8):
+    config = FakeOllamaConfig(
+        port=0,
+        load_latency=LatencyModel("lognormal", 0.05, 0.25),
+        tokens_per_second=200.0,
+        embedding_latency=LatencyModel("fixed", 0.005),
+        max_parallel=1
+    )
+
+    with FakeOllamaServer(config) as server:
+        # The ollama client reads OLLAMA_HOST when it is first imported
+        os.environ["OLLAMA_HOST"] = server.url
+
+        from src.multi_agent_system import MultiAgentSystem
+        from src.config import AgentConfig
+
+        system = MultiAgentSystem(AgentConfig(), enable_tracking=False, enable_guardrails=False)
+
+        queries = [
+            "What is Python?",
+            "Show all users",
+            "How does the divide function work?",
+            "Calculate total revenue",
+        ]
+        workload = [queries[i % len(queries)] for i in range(num_queries)]
+
+        def timed_query(query):
+            start = time.perf_counter()
+            system.query(query, verbose=False)
+            return time.perf_counter() - start
+
+        print("=" * 60)
+        print("ORCHESTRATION BENCHMARK (fake Ollama)")
+        print("=" * 60)
+
+        start = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=concurrency) as executor:
+            latencies = list(executor.map(timed_query, workload))
+        wall_time = time.perf_counter() - start
+
+        with urllib.request.urlopen(f"{server.url}/api/fake/stats") as response:
+            backend_stats = json.load(response)
+
+    print(f"Queries: {num_queries} (concurrency {concurrency})")
+    print(f"Throughput: {num_queries / wall_time:.1f} queries/s")
+    print(f"Latency p50: {percentile(latencies, 50) * 1000:.0f} ms")
+    print(f"Latency p95: {percentile(latencies, 95) * 1000:.0f} ms")
+    print(f"Backend requests: {backend_stats['request_counts']}")
+    print(f"Speculation: {system.get_speculation_stats()}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,39 @@
+from src.config import AgentConfig
+from src.agents.code_agent import CodeAgent
+from src.vector_store import VectorStoreManager
+
+def main():
+    print("=" * 50)
+    print("Building Code Embeddings")
+    print("=" * 50)
+
+    config = AgentConfig()
+
+    # Refresh the lexical/symbol index
+    print("\n1. Refreshing code index...")
+    code_agent = CodeAgent(
+        repo_path=config.code_repo_path,
+        index_path=config.code_index_path,
+        use_git=config.code_index_use_git,
+        max_file_bytes=config.code_max_file_bytes,
+        semantic_store=VectorStoreManager(collection_name=config.code_embeddings_collection),
+        semantic_state_path=config.code_embeddings_state_path
+    )
+    code_agent.index.refresh(force=True)
+    print(f"Indexed {code_agent.index.get_stats()}")
+
+    # Embed functions of new and changed files only
+    print("\n2. Embedding changed functions...")
+    counts = code_agent.semantic_index.update()
+    for key, value in counts.items():
+        print(f"  {key}: {value}")
+
+    print("\n3. Code embedding statistics:")
+    for key, value in code_agent.semantic_index.get_stats().items():
+        print(f"  {key}: {value}")
+
+    print("\n✓ Code embeddings built successfully!")
+    print("Set AgentConfig.code_semantic_search = True to use them.")
+
+if __name__ == "__main__":
+    main()
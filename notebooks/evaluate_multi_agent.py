@@ -82,6 +82,7 @@ def main():
     print(f"Average Execution Time: {avg_time:.2f}s")
     print(f"Total Errors: {total_errors}")
     print(f"Tests Passed: {sum(r['routing_correct'] for r in results)}/{len(results)}")
+    print(f"Routing Stats: {system.router.get_routing_stats()}")
 
     # Save detailed results
     import json
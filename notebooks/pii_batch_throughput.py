@@ -0,0 +1,68 @@
+"""Throughput of PII checks over many answers: per-text calls vs the batch API."""
+
+import random
+import sys
+import time
+from src.guardrails.pii_detector import PIIDetector, SENSITIVE_TYPES
+
+NUM_ANSWERS = 10000
+
+
+def make_answers(n: int):
+    random.seed(0)
+    templates = [
+        "Revenue in {region} grew {pct}% year over year, driven by enterprise deals.",
+        "The retry loop in client.py backs off exponentially up to {pct} seconds.",
+        "According to the onboarding guide, new hires in {region} start on Monday.",
+        "Contact {name} at {name}.{pct}@example.com for the {region} report.",
+        "The top customer in {region} spent ${pct},000 last quarter.",
+    ]
+    regions = ["EMEA", "APAC", "North America", "Berlin", "Tokyo"]
+    names = ["alice", "bob", "carol", "dave"]
+    return [
+        random.choice(templates).format(region=random.choice(regions), pct=random.randint(1, 99), name=random.choice(names))
+        for _ in range(n)
+    ]
+
+
+def timed(name, fn, baseline=None):
+    start = time.perf_counter()
+    fn()
+    elapsed = time.perf_counter() - start
+    speedup = f"  ({baseline / elapsed:.1f}x)" if baseline else ""
+    print(f"  {name:<32} {elapsed:7.2f}s  {NUM_ANSWERS / elapsed:9.0f} texts/s{speedup}")
+    return elapsed
+
+
+def main():
+    n_process = int(sys.argv[1]) if len(sys.argv) > 1 else 1
+
+    print("=" * 50)
+    print(f"PII Batch Throughput ({NUM_ANSWERS} answers)")
+    print("=" * 50)
+
+    answers = make_answers(NUM_ANSWERS)
+    detector = PIIDetector(cache_size=0)
+    detector.warm_up()
+    detector.analyzer.analyze(text=answers[0], language='en')  # First call pays one-off costs
+
+    print()
+    baseline = timed(
+        "analyzer.analyze per text",
+        lambda: [detector.analyzer.analyze(text=answer, language='en') for answer in answers]
+    )
+    timed("get_pii_summary per text", lambda: [detector.get_pii_summary(answer) for answer in answers], baseline)
+    timed(
+        f"get_pii_summaries (n_process={n_process})",
+        lambda: detector.get_pii_summaries(answers, batch_size=256, n_process=n_process),
+        baseline
+    )
+    timed(
+        "get_pii_summaries, sensitive only",
+        lambda: detector.get_pii_summaries(answers, SENSITIVE_TYPES),
+        baseline
+    )
+
+
+if __name__ == "__main__":
+    main()
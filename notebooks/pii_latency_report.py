@@ -0,0 +1,79 @@
+"""Per-query latency of the input PII check: full NER analysis vs regex tier."""
+
+import statistics
+import time
+from src.guardrails.pii_detector import PIIDetector, DETECTED_ENTITIES, SENSITIVE_TYPES
+
+QUERIES = [
+    "What were the total sales in Q3 2024?",
+    "Show the top 10 customers by revenue",
+    "How does the retry logic in the HTTP client work?",
+    "Summarize the onboarding guide for new engineers",
+    "Which products had more than 500 returns last month?",
+    "Explain the caching strategy used by the SQL agent",
+    "Compare revenue between the EMEA and APAC regions",
+    "What is our refund policy for enterprise plans?",
+    "Contact me at jane.doe@example.com about the invoice",
+    "My card 4111 1111 1111 1111 was charged twice",
+]
+
+REPEATS = 20
+
+
+def percentile(values, pct):
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * pct))]
+
+
+def time_per_query(fn):
+    """Milliseconds per call, each query repeated REPEATS times."""
+    timings = []
+    for _ in range(REPEATS):
+        for query in QUERIES:
+            start = time.perf_counter()
+            fn(query)
+            timings.append((time.perf_counter() - start) * 1000)
+    return timings
+
+
+def main():
+    print("=" * 50)
+    print("PII Check Latency Report")
+    print("=" * 50)
+
+    # No memoization: every call analyzes the text
+    detector = PIIDetector(cache_size=0)
+    detector.warm_up()
+    detector.analyzer.analyze(text=QUERIES[0], language='en')  # First call pays one-off costs
+
+    paths = {
+        "full NER (before)": lambda q: detector.analyzer.analyze(text=q, language='en', entities=list(DETECTED_ENTITIES)),
+        "regex tier (after)": lambda q: detector.get_pii_summary(q, SENSITIVE_TYPES),
+    }
+
+    results = {}
+    for name, fn in paths.items():
+        timings = time_per_query(fn)
+        results[name] = statistics.mean(timings)
+        print(f"\n{name}:")
+        print(f"  mean {statistics.mean(timings):.3f}ms  "
+              f"p50 {percentile(timings, 0.5):.3f}ms  p95 {percentile(timings, 0.95):.3f}ms")
+
+    before, after = results["full NER (before)"], results["regex tier (after)"]
+    print(f"\nPer-query reduction: {before - after:.3f}ms ({(1 - after / before) * 100:.1f}%, {before / after:.0f}x faster)")
+
+    # Verdicts must not change
+    disagreements = [
+        query for query in QUERIES
+        if detector.has_sensitive_pii(query) != any(
+            result.entity_type in SENSITIVE_TYPES and result.score >= 0.8
+            for result in detector.analyzer.analyze(text=query, language='en')
+        )
+    ]
+    print(f"Verdict disagreements: {len(disagreements)}")
+    for query in disagreements:
+        print(f"  ⚠️  {query}")
+
+
+if __name__ == "__main__":
+    main()
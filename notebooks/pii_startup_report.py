@@ -0,0 +1,94 @@
+"""Startup time and memory of PIIDetector, eager (old) vs lazy shared models.
+
+Each mode runs in a fresh interpreter so imports and model loads are not
+shared between measurements.
+"""
+
+import json
+import os
+import resource
+import subprocess
+import sys
+import time
+
+MODES = ("eager", "lazy")
+SAMPLE_TEXT = "Contact John Smith at john.smith@example.com or 555-123-4567."
+
+
+def rss_mb() -> float:
+    """Current resident set size in MB (falls back to peak RSS off Linux)."""
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * resource.getpagesize() / 1024 / 1024
+    except OSError:
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+def measure(mode: str) -> dict:
+    """Construct detectors and run a first detection, recording time and RSS."""
+
+    report = {'mode': mode, 'rss_start_mb': rss_mb()}
+
+    start = time.perf_counter()
+    if mode == "eager":
+        # What PIIDetector used to do in __init__: Presidio loads its own
+        # default spaCy model and a second pipeline is loaded alongside it
+        import spacy
+        from presidio_analyzer import AnalyzerEngine
+        from presidio_anonymizer import AnonymizerEngine
+
+        analyzer = AnalyzerEngine()
+        AnonymizerEngine()
+        spacy.load("en_core_web_sm")
+        detect = lambda text: analyzer.analyze(text=text, language='en')
+    else:
+        from src.guardrails.pii_detector import PIIDetector
+
+        detectors = [PIIDetector() for _ in range(3)]  # Several components share one set of models
+        detect = detectors[0].detect_pii
+    report['construct_s'] = time.perf_counter() - start
+    report['rss_after_construct_mb'] = rss_mb()
+
+    start = time.perf_counter()
+    detect(SAMPLE_TEXT)
+    report['first_detect_s'] = time.perf_counter() - start
+
+    start = time.perf_counter()
+    detect(SAMPLE_TEXT)
+    report['second_detect_s'] = time.perf_counter() - start
+    report['rss_after_detect_mb'] = rss_mb()
+
+    return report
+
+
+def main():
+    if len(sys.argv) == 3 and sys.argv[1] == "--mode":
+        print(json.dumps(measure(sys.argv[2])))
+        return
+
+    print("=" * 50)
+    print("PII Detector Startup Report")
+    print("=" * 50)
+
+    for mode in MODES:
+        proc = subprocess.run(
+            [sys.executable, __file__, "--mode", mode],
+            capture_output=True,
+            text=True,
+            env={**os.environ, "PYTHONPATH": os.path.dirname(os.path.dirname(os.path.abspath(__file__)))}
+        )
+        if proc.returncode != 0:
+            print(f"\n❌ {mode}: {proc.stderr.strip().splitlines()[-1] if proc.stderr.strip() else 'failed'}")
+            continue
+
+        report = json.loads(proc.stdout.strip().splitlines()[-1])
+        print(f"\n{mode}:")
+        print(f"  Construction:      {report['construct_s']:.2f}s, "
+              f"RSS {report['rss_start_mb']:.0f} -> {report['rss_after_construct_mb']:.0f} MB")
+        print(f"  First detection:   {report['first_detect_s']:.2f}s")
+        print(f"  Second detection:  {report['second_detect_s'] * 1000:.1f}ms")
+        print(f"  RSS after detect:  {report['rss_after_detect_mb']:.0f} MB")
+
+
+if __name__ == "__main__":
+    main()
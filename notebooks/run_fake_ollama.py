@@ -0,0 +1,46 @@
+"""Run the fake Ollama server for benchmarking without a real model."""
+
+import argparse
+from src.benchmarking.fake_ollama import FakeOllamaServer, FakeOllamaConfig, LatencyModel
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Fake Ollama API server")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=11435)
+    parser.add_argument("--latency", default="fixed",
+                        choices=["fixed", "uniform", "normal", "lognormal", "exponential"])
+    parser.add_argument("--latency-mean", type=float, default=0.05, help="Seconds before the first token")
+    parser.add_argument("--latency-spread", type=float, default=0.0)
+    parser.add_argument("--tokens-per-second", type=float, default=40.0)
+    parser.add_argument("--response-tokens", type=int, default=64)
+    parser.add_argument("--embedding-latency", type=float, default=0.01)
+    parser.add_argument("--embedding-dim", type=int, default=4096)
+    parser.add_argument("--max-parallel", type=int, default=1)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    config = FakeOllamaConfig(
+        host=args.host,
+        port=args.port,
+        load_latency=LatencyModel(args.latency, args.latency_mean, args.latency_spread),
+        tokens_per_second=args.tokens_per_second,
+        response_tokens=args.response_tokens,
+        embedding_latency=LatencyModel("fixed", args.embedding_latency),
+        embedding_dim=args.embedding_dim,
+        max_parallel=args.max_parallel,
+        seed=args.seed
+    )
+
+    server = FakeOllamaServer(config)
+    print(f"✓ Fake Ollama listening on {server.url}")
+    print(f"  export OLLAMA_HOST={server.url}")
+
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        print("\nStopping fake Ollama...")
+
+
+if __name__ == "__main__":
+    main()
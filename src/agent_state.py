@@ -1,4 +1,5 @@
-from typing import TypedDict, List, Dict, Optional, Literal
+from typing import TypedDict, List, Dict, Optional, Literal, Annotated
+import operator
 from pydantic import BaseModel, Field
 
 class AgentState(TypedDict):
@@ -9,8 +10,12 @@ class AgentState(TypedDict):
 
     # Routing information
     query_type: Optional[Literal["research", "sql", "code", "general"]]
+    query_intents: Optional[List[str]]  # Specialists to run in parallel
     routing_confidence: Optional[float]
 
+    # Speculatively prefetched inputs
+    research_contexts: Optional[List[str]]  # Retrieved while routing ran
+
     # Agent responses
     research_result: Optional[Dict]
     sql_result: Optional[Dict]
@@ -20,9 +25,13 @@ class AgentState(TypedDict):
     final_answer: Optional[str]
     sources: Optional[List[Dict]]
 
-    # Metadata
-    agent_path: List[str]  # Track which agents were invoked
-    errors: List[str]
+    # Metadata (list fields are concatenated across parallel branches)
+    agent_path: Annotated[List[str], operator.add]  # Track which agents were invoked
+    errors: Annotated[List[str], operator.add]
+
+    # Latency budget
+    deadline: Optional[float]  # time.monotonic() value; None means unbounded
+    degraded: Annotated[List[str], operator.add]  # Stages skipped or cut short to meet the deadline
 
 
 class QueryClassification(BaseModel):
@@ -30,6 +39,7 @@ class QueryClassification(BaseModel):
     query_type: Literal["research", "sql", "code", "general"]
     confidence: float = Field(ge=0.0, le=1.0)
     reasoning: str
+    intents: List[str] = Field(default_factory=list)  # All agent types the query needs
 
 
 class AgentResponse(BaseModel):
@@ -1,49 +1,236 @@
 import os
+from itertools import islice
 from pathlib import Path
-from typing import List, Dict
-import ollama
+from typing import List, Dict, Optional, Tuple
+from src import llm
 from src.agent_state import AgentState, AgentResponse
+from src.agents.code_index import CodeIndex
+from src.agents.code_semantic import SemanticCodeIndex
+from src.agents.code_symbols import rank_symbols
+from src.agents.code_tokens import tokenize
+from src.deadline import DeadlineExceeded, node_timeout, record_degraded
 
 class CodeAgent:
     """Agent for analyzing code repositories."""
 
-    def __init__(self, repo_path: str, model: str = "llama3.1"):
+    def __init__(
+        self,
+        repo_path: str,
+        model: str = "llama3.1",
+        index_path: Optional[str] = None,
+        index_refresh_interval: float = 30.0,
+        symbols_per_file: int = 3,
+        max_snippet_lines: int = 80,
+        search_mode: str = "bm25",
+        use_git: bool = True,
+        max_file_bytes: int = 2 * 1024 * 1024,
+        context_lines: int = 3,
+        max_windows_per_file: int = 3,
+        max_context_chars: int = 12000,
+        semantic_store=None,
+        semantic_state_path: Optional[str] = None,
+        fusion_candidates: int = 20,
+        semantic_candidates: int = 5
+    ):
         self.repo_path = Path(repo_path)
         self.model = model
         self.code_extensions = {'.py', '.js', '.java', '.cpp', '.go', '.rs'}
+        self.search_mode = search_mode  # "bm25" (ranked) or "match" (any query word)
+
+        # Token -> file/line index, persisted and refreshed incrementally
+        # in the background, so searches never wait for a walk or a save
+        self.index = CodeIndex(
+            repo_path,
+            self.code_extensions,
+            index_path=index_path,
+            refresh_interval=index_refresh_interval,
+            use_git=use_git,
+            max_file_bytes=max_file_bytes
+        )
+        self.index.start_background_refresh()
+
+        # Prompt context: the most relevant symbol bodies of each matched file
+        self.symbols_per_file = symbols_per_file
+        self.max_snippet_lines = max_snippet_lines
+
+        # Files without matching symbols contribute windows around matched lines
+        self.context_lines = context_lines
+        self.max_windows_per_file = max_windows_per_file
+        self.max_context_chars = max_context_chars
+
+        # Optional function-level embeddings, fused with lexical results
+        self.semantic_index = SemanticCodeIndex(
+            self.index,
+            semantic_store,
+            state_path=semantic_state_path
+        ) if semantic_store is not None else None
+        self.fusion_candidates = fusion_candidates
+        # Few semantic chunks: each one becomes a snippet in the prompt
+        self.semantic_candidates = semantic_candidates
 
     def search_code(self, query: str) -> List[Dict]:
-        """Search for relevant code files."""
+        """Search for relevant code files.
+
+        Results hold only paths and line spans; text is read when the
+        prompt is built (see load_lines).
+        """
         results = []
 
-        # Simple keyword search
-        query_lower = query.lower()
+        for path, hit_lines, semantic_symbols in self.rank_files(query)[:5]:  # Return top 5 matches
+            filepath = self.repo_path / path
+            try:
+                size = filepath.stat().st_size
+            except OSError:
+                continue
 
-        for filepath in self.repo_path.rglob('*'):
-            if filepath.is_file() and filepath.suffix in self.code_extensions:
-                try:
-                    with open(filepath, 'r', encoding='utf-8') as f:
-                        content = f.read()
-
-                        # Check if query keywords appear in file
-                        if any(keyword in content.lower() for keyword in query_lower.split()):
-                            results.append({
-                                'filepath': str(filepath),
-                                'content': content,
-                                'size': len(content)
-                            })
-                except Exception:
-                    continue
+            results.append({
+                'filepath': str(filepath),
+                'size': size,
+                'lines': hit_lines,
+                'windows': self.line_windows(hit_lines),
+                'snippets': self.extract_snippets(query, path, hit_lines, semantic_symbols)
+            })
+
+        return results
+
+    def rank_files(self, query: str, rrf_k: int = 60) -> List[Tuple[str, List[int], List[Dict]]]:
+        """Files ranked by reciprocal rank fusion of lexical and semantic results.
+
+        Returns (path, matched lines, semantically matched symbols) tuples.
+        Without a semantic index this is the lexical ranking.
+        """
+
+        lexical = self.index.search(query, limit=self.fusion_candidates, mode=self.search_mode)
+        if self.semantic_index is None:
+            return [(hit['path'], hit['lines'], []) for hit in lexical]
+
+        try:
+            semantic = self.semantic_index.search(query, n_results=self.semantic_candidates)
+        except Exception as e:
+            print(f"  Semantic code search failed: {str(e)}")
+            semantic = []
+
+        scores: Dict[str, float] = {}
+        lines: Dict[str, List[int]] = {}
+        symbols: Dict[str, List[Dict]] = {}
+
+        for rank, hit in enumerate(lexical, 1):
+            scores[hit['path']] = scores.get(hit['path'], 0.0) + 1.0 / (rrf_k + rank)
+            lines[hit['path']] = hit['lines']
+
+        # A file's semantic rank is that of its best chunk
+        file_rank = 0
+        for hit in semantic:
+            if hit['path'] not in symbols:
+                file_rank += 1
+                scores[hit['path']] = scores.get(hit['path'], 0.0) + 1.0 / (rrf_k + file_rank)
+            symbols.setdefault(hit['path'], []).append(hit)
+
+        ranked = sorted(scores, key=lambda path: (-scores[path], path))
+        return [(path, lines.get(path, []), symbols.get(path, [])) for path in ranked]
+
+    def line_windows(self, hit_lines: List[int]) -> List[Tuple[int, int]]:
+        """Merged (start, end) line windows around matched lines."""
+
+        windows: List[List[int]] = []
+        for line in sorted(hit_lines):
+            start, end = max(1, line - self.context_lines), line + self.context_lines
+            if windows and start <= windows[-1][1] + 1:
+                windows[-1][1] = end
+            else:
+                windows.append([start, end])
 
-        return results[:5]  # Return top 5 matches
+        return [tuple(window) for window in windows[:self.max_windows_per_file]]
 
-    def analyze_code(self, query: str, code_files: List[Dict]) -> str:
+    def extract_snippets(
+        self,
+        query: str,
+        path: str,
+        hit_lines: List[int],
+        semantic_symbols: Optional[List[Dict]] = None
+    ) -> List[Dict]:
+        """Spans of the symbols in a file most relevant to the query.
+
+        Symbols found by semantic search come first, then the best
+        lexically matching ones.
+        """
+
+        spans = [
+            {key: hit[key] for key in ('symbol', 'kind', 'start_line', 'end_line')}
+            for hit in semantic_symbols or []
+        ]
+
+        symbols = rank_symbols(
+            self.index.get_symbols(path),
+            set(tokenize(query)),
+            hit_lines,
+            limit=self.symbols_per_file
+        )
+        spans.extend(
+            {
+                'symbol': symbol.qualified_name,
+                'kind': symbol.kind,
+                'start_line': symbol.start_line,
+                'end_line': symbol.end_line
+            }
+            for symbol in symbols
+        )
+
+        # Drop spans overlapping a higher-ranked one
+        selected: List[Dict] = []
+        for span in spans:
+            if any(span['start_line'] <= other['end_line'] and other['start_line'] <= span['end_line'] for other in selected):
+                continue
+            selected.append(span)
+            if len(selected) == self.symbols_per_file:
+                break
+
+        return sorted(selected, key=lambda span: span['start_line'])
+
+    def load_lines(self, filepath: str, start_line: int, end_line: int, max_line_chars: int = 300) -> str:
+        """Read lines start_line..end_line (1-based, inclusive) without loading the whole file."""
+
+        truncated = end_line - start_line + 1 > self.max_snippet_lines
+        last_line = min(end_line, start_line + self.max_snippet_lines - 1)
+
+        with open(filepath, 'rb') as f:
+            # Split on "\n" only, matching the index's line numbers
+            raw_lines = islice(iter(f.readline, b""), start_line - 1, last_line)
+            lines = [raw.decode('utf-8', errors='replace').rstrip("\r\n")[:max_line_chars] for raw in raw_lines]
+
+        text = "\n".join(lines)
+        if truncated:
+            text += f"\n    ... {end_line - last_line} more lines"
+        return text
+
+    def analyze_code(self, query: str, code_files: List[Dict], timeout: Optional[float] = None) -> str:
         """Analyze code files using LLM."""
 
-        code_context = "\n\n".join([
-            f"File: {file['filepath']}\n```\n{file['content'][:1000]}\n```"
-            for file in code_files
-        ])
+        sections = []
+        budget = self.max_context_chars
+        for file in code_files:
+            if file.get('snippets'):
+                # Only the relevant functions/classes, not the top of the file
+                spans = [
+                    (snippet['start_line'], snippet['end_line'], f"{snippet['kind']} {snippet['symbol']}, ")
+                    for snippet in file['snippets']
+                ]
+            elif file.get('windows'):
+                spans = [(start, end, "") for start, end in file['windows']]
+            else:
+                spans = [(1, self.max_snippet_lines, "")]
+
+            for start, end, label in spans:
+                if budget <= 0:
+                    break
+                try:
+                    text = self.load_lines(file['filepath'], start, end)[:budget]
+                except OSError:
+                    continue
+                budget -= len(text)
+                sections.append(f"File: {file['filepath']} ({label}lines {start}-{end})\n```\n{text}\n```")
+
+        code_context = "\n\n".join(sections)
 
         prompt = f"""You are a code analysis expert. Answer the question about the code.
 
@@ -54,7 +241,7 @@ Question: {query}
 
 Provide a detailed analysis of the code related to the question."""
 
-        response = ollama.generate(model=self.model, prompt=prompt)
+        response = llm.generate(model=self.model, prompt=prompt, timeout=timeout)
         return response['response']
 
     def query(self, state: AgentState) -> AgentState:
@@ -72,7 +259,11 @@ Provide a detailed analysis of the code related to the question."""
                 return state
 
             # Analyze
-            analysis = self.analyze_code(state["query"], code_files)
+            analysis = self.analyze_code(
+                state["query"],
+                code_files,
+                timeout=node_timeout(state, "code")
+            )
             print(f"  Generated code analysis")
 
             response = AgentResponse(
@@ -88,6 +279,12 @@ Provide a detailed analysis of the code related to the question."""
             state["code_result"] = response.model_dump()
             state["agent_path"].append("code")
 
+        except DeadlineExceeded as e:
+            error_msg = f"Code Agent error: {str(e)}"
+            print(f"  ❌ {error_msg}")
+            state["errors"].append(error_msg)
+            record_degraded(state, "code")
+
         except Exception as e:
             error_msg = f"Code Agent error: {str(e)}"
             print(f"  ❌ {error_msg}")
@@ -0,0 +1,164 @@
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, List, Optional, Set, Tuple
+
+# Directories of third-party or generated code that are never indexed
+VENDORED_DIRS = frozenset({
+    "node_modules", "vendor", "vendors", "third_party", "thirdparty", "external",
+    "dist", "build", "target", "out", "site-packages", "venv", ".venv", "env",
+    "__pycache__", "bower_components", "Pods"
+})
+
+
+def is_vendored(path: str) -> bool:
+    """True if any directory component of a relative path is vendored or hidden."""
+    return any(part in VENDORED_DIRS or part.startswith(".") for part in Path(path).parts[:-1])
+
+
+@dataclass
+class GitSource:
+    """A git work tree (or the part of one) covered by the code index."""
+
+    prefix: str  # Index-relative directory of the covered files ("" = index root)
+    repo: Any  # git.Repo
+    pathspec: str  # Covered directory relative to the work tree root
+
+
+class GitTracker:
+    """Lists and diffs the git repositories under an index root.
+
+    Either the root lies inside one work tree (covers_root), or its
+    immediate subdirectories are separate repositories. Paths returned are
+    relative to the index root. Requires gitpython; `available` is False
+    without it.
+    """
+
+    def __init__(self, root: Path):
+        self.root = root.resolve()
+        self.sources: List[GitSource] = []
+        self.covers_root = False
+
+        try:
+            import git
+        except ImportError:
+            self.available = False
+            return
+
+        self._git = git
+        self.available = True
+        self._discover()
+
+    def _discover(self) -> None:
+        git = self._git
+
+        # Separate repositories directly under the root (data/code_repos/*)
+        # take precedence: an enclosing work tree's ls-files does not list
+        # their files
+        if self.root.is_dir():
+            for child in sorted(self.root.iterdir()):
+                if child.is_dir() and (child / ".git").exists():
+                    try:
+                        self.sources.append(GitSource(child.name, git.Repo(child), ""))
+                    except git.InvalidGitRepositoryError:
+                        continue
+        if self.sources:
+            return  # Files outside these repos are walked
+
+        try:
+            repo = git.Repo(self.root, search_parent_directories=True)
+            work_tree = Path(repo.working_tree_dir).resolve()
+            pathspec = self.root.relative_to(work_tree).as_posix()
+        except (git.InvalidGitRepositoryError, git.NoSuchPathError, ValueError):
+            return
+
+        source = GitSource("", repo, pathspec if pathspec != "." else "")
+        self.sources.append(source)
+        self.covers_root = True
+
+        # Nested repositories and submodules deeper down are their own sources
+        for prefix in self._nested_repos(source):
+            try:
+                self.sources.append(GitSource(prefix, git.Repo(self.root / prefix), ""))
+            except (git.InvalidGitRepositoryError, git.NoSuchPathError):
+                continue
+
+    def _nested_repos(self, source: GitSource) -> List[str]:
+        """Index-relative directories of repositories inside source that its ls-files skips."""
+
+        # Untracked nested work trees are listed as "dir/"
+        candidates = [
+            entry.rstrip("/")
+            for entry in self._run(source, "ls-files", "--others", "--exclude-standard")
+            if entry.endswith("/")
+        ]
+        # Submodules are tracked as gitlinks (mode 160000)
+        candidates.extend(
+            entry.split("\t", 1)[1]
+            for entry in self._run(source, "ls-files", "--stage")
+            if entry.startswith("160000 ")
+        )
+
+        nested = []
+        for root_relative in candidates:
+            path = self._to_index_path(source, root_relative)
+            if path is not None and (self.root / path / ".git").exists() and not is_vendored(path + "/x"):
+                nested.append(path)
+        return sorted(nested)
+
+    def _to_index_path(self, source: GitSource, root_relative: str) -> Optional[str]:
+        full = Path(source.repo.working_tree_dir).resolve() / root_relative
+        try:
+            return full.relative_to(self.root).as_posix()
+        except ValueError:
+            return None
+
+    def _run(self, source: GitSource, *args: str) -> List[str]:
+        pathspec = ["--", source.pathspec] if source.pathspec else []
+        output = source.repo.git.execute(["git", *args, "-z", *pathspec])
+        return [entry for entry in output.split("\0") if entry]
+
+    def _convert(self, source: GitSource, root_relative: List[str]) -> Set[str]:
+        paths = (self._to_index_path(source, path) for path in root_relative)
+        return {path for path in paths if path is not None}
+
+    def head(self, source: GitSource) -> Optional[str]:
+        try:
+            return source.repo.head.commit.hexsha
+        except ValueError:
+            return None  # No commits yet
+
+    def has_commit(self, source: GitSource, sha: str) -> bool:
+        try:
+            source.repo.commit(sha)
+            return True
+        except (self._git.BadName, ValueError):
+            return False
+
+    def list_files(self, source: GitSource) -> Set[str]:
+        """Tracked and untracked, not ignored, files."""
+        return self._convert(source, self._run(source, "ls-files", "--cached", "--others", "--exclude-standard"))
+
+    def untracked_files(self, source: GitSource) -> Set[str]:
+        return self._convert(source, self._run(source, "ls-files", "--others", "--exclude-standard"))
+
+    def changed_since(self, source: GitSource, sha: str) -> Tuple[Set[str], Set[str]]:
+        """(changed, deleted) files between commit sha and the working tree, plus untracked files."""
+
+        entries = self._run(source, "diff", "--name-status", "--no-renames", sha)
+        changed, deleted = [], []
+        # -z output alternates status and path
+        for status, path in zip(entries[::2], entries[1::2]):
+            (deleted if status.startswith("D") else changed).append(path)
+
+        return (
+            self._convert(source, changed) | self.untracked_files(source),
+            self._convert(source, deleted)
+        )
+
+    def dirty_files(self, source: GitSource) -> Set[str]:
+        """Files that differ from HEAD in the working tree, or are untracked."""
+        head = self.head(source)
+        if head is None:
+            return self.list_files(source)
+        changed, deleted = self.changed_since(source, head)
+        return changed | deleted
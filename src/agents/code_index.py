@@ -0,0 +1,481 @@
+import heapq
+import json
+import math
+import mmap
+import os
+import threading
+import time
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+from src.agents.code_git import VENDORED_DIRS, GitSource, GitTracker, is_vendored
+from src.agents.code_symbols import Symbol, extract_symbols
+from src.agents.code_tokens import tokenize
+
+INDEX_VERSION = 3
+
+
+class CodeIndex:
+    """Persistent inverted index from tokens to files and line numbers.
+
+    Alongside the postings it keeps each file's symbols (functions,
+    classes, methods with line spans). The index is built once and kept
+    in a JSON file; refresh() re-indexes only files whose mtime or size
+    changed and drops deleted files, so queries never rescan the
+    repository. For git repositories (gitpython), refresh() only looks at
+    files changed since the indexed commit plus untracked files, honoring
+    .gitignore. Vendored directories and binary files are skipped.
+    """
+
+    def __init__(
+        self,
+        repo_path: str,
+        extensions: Iterable[str],
+        index_path: Optional[str] = None,
+        refresh_interval: float = 30.0,
+        max_lines_per_token: int = 20,
+        k1: float = 1.2,
+        b: float = 0.75,
+        use_git: bool = True,
+        max_file_bytes: int = 2 * 1024 * 1024,
+        mmap_threshold: int = 256 * 1024
+    ):
+        self.repo_path = Path(repo_path)
+        self.extensions = set(extensions)
+        self.index_path = Path(index_path) if index_path else None
+        self.refresh_interval = refresh_interval
+        self.max_lines_per_token = max_lines_per_token
+
+        # Files above max_file_bytes are not indexed; files above
+        # mmap_threshold are scanned line by line from a memory map
+        self.max_file_bytes = max_file_bytes
+        self.mmap_threshold = mmap_threshold
+
+        # BM25 parameters: term-frequency saturation and length normalization
+        self.k1 = k1
+        self.b = b
+
+        # path -> {"mtime", "size", "length" (token count), "tokens" (distinct)}
+        self.files: Dict[str, Dict] = {}
+        # token -> path -> [term frequency, [line numbers]]
+        self.postings: Dict[str, Dict[str, list]] = {}
+        # path -> symbol dicts (see code_symbols.Symbol)
+        self.symbols: Dict[str, List[Dict]] = {}
+        self._total_length = 0
+        # path -> [mtime, size] of unreadable or binary files, so they are not re-read
+        self.skipped: Dict[str, list] = {}
+        # git source prefix -> {"head": indexed commit, "dirty": files differing from it}
+        self.git_state: Dict[str, Dict] = {}
+
+        self.use_git = use_git
+        self._tracker: Optional[GitTracker] = None
+
+        # _lock guards the index data against concurrent searches; refreshes
+        # and saves are serialized by _refresh_lock and hold _lock only
+        # while applying a change, so searches see the current snapshot
+        self._lock = threading.RLock()
+        self._refresh_lock = threading.RLock()
+        self._refreshed_at = 0.0
+        self._refresher: Optional[threading.Thread] = None
+        self._stop_refresh = threading.Event()
+
+        self._loaded = self.load()
+
+    def _iter_files(self, skip: Set[str] = frozenset()) -> Iterable[Path]:
+        for root, dirs, files in os.walk(self.repo_path):
+            # Skip hidden (.git), vendored and separately tracked directories
+            top = Path(root) == self.repo_path
+            dirs[:] = [
+                d for d in dirs
+                if not d.startswith(".") and d not in VENDORED_DIRS and not (top and d in skip)
+            ]
+            for name in files:
+                if os.path.splitext(name)[1] in self.extensions:
+                    yield Path(root) / name
+
+    def _indexable(self, path: str) -> bool:
+        return os.path.splitext(path)[1] in self.extensions and not is_vendored(path)
+
+    def _get_tracker(self) -> Optional[GitTracker]:
+        if self.use_git and self._tracker is None:
+            self._tracker = GitTracker(self.repo_path)
+            if not self._tracker.available:
+                self.use_git = False
+        return self._tracker if self.use_git else None
+
+    def _relative(self, filepath: Path) -> str:
+        return filepath.relative_to(self.repo_path).as_posix()
+
+    def _remove_file(self, path: str) -> None:
+        with self._lock:
+            self.skipped.pop(path, None)
+            entry = self.files.pop(path, None)
+            self.symbols.pop(path, None)
+            if entry is None:
+                return
+            self._total_length -= entry["length"]
+            for token in entry["tokens"]:
+                files = self.postings.get(token)
+                if files is not None:
+                    files.pop(path, None)
+                    if not files:
+                        del self.postings[token]
+
+    def _index_lines(self, lines: Iterable[str]) -> Tuple[Dict[str, list], int]:
+        """Postings (token -> [tf, line numbers]) and token count of a file's lines."""
+
+        file_postings: Dict[str, list] = {}
+        length = 0
+        for line_number, line in enumerate(lines, 1):
+            for token in tokenize(line):
+                length += 1
+                posting = file_postings.get(token)
+                if posting is None:
+                    file_postings[token] = [1, [line_number]]
+                    continue
+                posting[0] += 1
+                line_numbers = posting[1]
+                if line_numbers[-1] != line_number and len(line_numbers) < self.max_lines_per_token:
+                    line_numbers.append(line_number)
+
+        return file_postings, length
+
+    def _read_file(self, path: str, stat: os.stat_result) -> Optional[Tuple[Dict[str, list], int, list]]:
+        """Postings, token count and symbols of a file; None if it is not indexable text."""
+
+        filepath = self.repo_path / path
+        content = None
+
+        try:
+            with open(filepath, 'rb') as f:
+                binary = b"\0" in f.read(8192)
+
+            if binary or stat.st_size > self.max_file_bytes:
+                file_postings = None
+            elif stat.st_size >= self.mmap_threshold:
+                # Large file: never hold its full text; symbols are not extracted
+                with open(filepath, 'rb') as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+                    file_postings, length = self._index_lines(
+                        raw.decode('utf-8', errors='replace') for raw in iter(mm.readline, b"")
+                    )
+            else:
+                with open(filepath, 'r', encoding='utf-8') as f:
+                    content = f.read()
+                # Split on "\n" only, like the mmap path and snippet loading
+                file_postings, length = self._index_lines(content.split("\n"))
+        except (OSError, ValueError):
+            file_postings = None  # Unreadable, or not UTF-8 text
+
+        if file_postings is None:
+            return None
+
+        symbols = extract_symbols(path, content) if content is not None else []
+        return file_postings, length, [symbol.to_dict() for symbol in symbols]
+
+    def _store_file(self, path: str, stat: os.stat_result, parsed: Optional[Tuple[Dict[str, list], int, list]]) -> None:
+        """Replace path's entries with a _read_file result."""
+
+        with self._lock:
+            self._remove_file(path)
+
+            if parsed is None:
+                # Binary, oversized or unreadable
+                self.skipped[path] = [stat.st_mtime, stat.st_size]
+                return
+
+            file_postings, length, symbols = parsed
+            for token, posting in file_postings.items():
+                self.postings.setdefault(token, {})[path] = posting
+
+            if symbols:
+                self.symbols[path] = symbols
+
+            self.files[path] = {
+                "mtime": stat.st_mtime,
+                "size": stat.st_size,
+                "length": length,
+                "tokens": list(file_postings)
+            }
+            self._total_length += length
+
+    def _update_path(self, path: str, counts: Dict[str, int]) -> None:
+        """Re-index path if its mtime or size changed; drop it if it is gone."""
+
+        try:
+            stat = (self.repo_path / path).stat()
+        except OSError:
+            if path in self.files:
+                counts['removed'] += 1
+            self._remove_file(path)
+            return
+
+        entry = self.files.get(path)
+        if entry is not None and entry["mtime"] == stat.st_mtime and entry["size"] == stat.st_size:
+            return
+        if self.skipped.get(path) == [stat.st_mtime, stat.st_size]:
+            return
+
+        # Read and tokenize without holding the lock searches need
+        parsed = self._read_file(path, stat)
+        self._store_file(path, stat, parsed)
+        if parsed is not None:
+            counts['updated' if entry is not None else 'added'] += 1
+        elif entry is not None:
+            counts['removed'] += 1
+
+    def _refresh_walk(self, counts: Dict[str, int], skip: Set[str]) -> None:
+        """Stat every file outside the git sources in skip."""
+
+        seen: Set[str] = set()
+        for filepath in self._iter_files(skip):
+            path = self._relative(filepath)
+            seen.add(path)
+            self._update_path(path, counts)
+
+        for path in list(self.files) + list(self.skipped):
+            if path not in seen and path.split("/", 1)[0] not in skip:
+                counts['removed'] += int(path in self.files)
+                self._remove_file(path)
+
+    def _refresh_git(self, tracker: GitTracker, source: GitSource, counts: Dict[str, int]) -> None:
+        """Re-index the files of a git source changed since the indexed commit."""
+
+        state = self.git_state.get(source.prefix)
+        incremental = state is not None and tracker.has_commit(source, state["head"])
+
+        if incremental:
+            changed, deleted = tracker.changed_since(source, state["head"])
+            # Files dirty last time may have been reverted since
+            candidates = changed | deleted | set(state["dirty"])
+        else:
+            candidates = tracker.list_files(source)
+            under = f"{source.prefix}/" if source.prefix else ""
+            # Repositories nested inside this one are refreshed as their own sources
+            nested = tuple(
+                f"{other.prefix}/" for other in tracker.sources
+                if other is not source and other.prefix.startswith(under) and other.prefix != source.prefix
+            )
+            for path in list(self.files) + list(self.skipped):
+                if path.startswith(under) and not path.startswith(nested) and path not in candidates:
+                    counts['removed'] += int(path in self.files)
+                    self._remove_file(path)
+
+        for path in candidates:
+            if self._indexable(path):
+                self._update_path(path, counts)
+            else:
+                counts['removed'] += int(path in self.files)
+                self._remove_file(path)
+
+        head = tracker.head(source)
+        if incremental and head == state["head"]:
+            dirty = changed | deleted
+        else:
+            dirty = tracker.dirty_files(source)
+
+        self.git_state[source.prefix] = {
+            "head": head,
+            "dirty": sorted(path for path in dirty if self._indexable(path))
+        }
+
+    def refresh(self, force: bool = False) -> Dict[str, int]:
+        """Re-index changed files; skipped if refreshed within refresh_interval."""
+
+        with self._refresh_lock:
+            if not force and time.monotonic() - self._refreshed_at < self.refresh_interval:
+                return {'added': 0, 'updated': 0, 'removed': 0}
+
+            counts = {'added': 0, 'updated': 0, 'removed': 0}
+
+            tracker = self._get_tracker()
+            sources = tracker.sources if tracker is not None else []
+            for source in sources:
+                self._refresh_git(tracker, source, counts)
+
+            # Files not covered by a git work tree are checked by mtime
+            if tracker is None or not tracker.covers_root:
+                self._refresh_walk(counts, skip={source.prefix for source in sources})
+
+            self._refreshed_at = time.monotonic()
+
+            if any(counts.values()):
+                print(f"  Code index: {counts['added']} added, {counts['updated']} updated, "
+                      f"{counts['removed']} removed ({len(self.files)} files)")
+                self.save()
+
+            return counts
+
+    def start_background_refresh(self) -> None:
+        """Refresh (and save) every refresh_interval seconds on a daemon thread.
+
+        Searches then never wait for a refresh; they use the index as of the
+        last completed file update. Without a saved index there is nothing
+        to search yet, so the index is built here before returning.
+        """
+
+        if self._refresher is not None:
+            return
+
+        built = not self._loaded
+        if built:
+            self.refresh(force=True)
+
+        def run() -> None:
+            if built:
+                self._stop_refresh.wait(max(self.refresh_interval, 1.0))
+            while not self._stop_refresh.is_set():
+                try:
+                    self.refresh(force=True)
+                except Exception as e:
+                    print(f"  ⚠️  Code index refresh failed: {e}")
+                self._stop_refresh.wait(max(self.refresh_interval, 1.0))
+
+        self._refresher = threading.Thread(target=run, name="code-index-refresh", daemon=True)
+        self._refresher.start()
+
+    def stop_background_refresh(self) -> None:
+        """Stop the background refresh thread after its current refresh."""
+
+        self._stop_refresh.set()
+        if self._refresher is not None:
+            self._refresher.join()
+            self._refresher = None
+        self._stop_refresh.clear()
+
+    def search(self, query: str, limit: int = 5, mode: str = "bm25") -> List[Dict]:
+        """Top files for a query.
+
+        mode "bm25" ranks by BM25 over identifier tokens; "match" ranks
+        files containing any query token by the number of tokens matched.
+        Each hit has the file path (relative to the repo), a score and the
+        line numbers where query tokens occur.
+        """
+        if mode == "match":
+            return self._search_match(query, limit)
+        return self._search_bm25(query, limit)
+
+    def _search_match(self, query: str, limit: int) -> List[Dict]:
+        with self._lock:
+            scores: Dict[str, List] = {}
+            for token in set(tokenize(query)):
+                for path, (tf, line_numbers) in self.postings.get(token, {}).items():
+                    hit = scores.setdefault(path, [0, 0, set()])
+                    hit[0] += 1
+                    hit[1] += tf
+                    hit[2].update(line_numbers)
+
+        ranked = sorted(scores.items(), key=lambda item: (-item[1][0], -item[1][1], item[0]))
+        return [
+            {'path': path, 'score': matched, 'lines': sorted(line_numbers)}
+            for path, (matched, _, line_numbers) in ranked[:limit]
+        ]
+
+    def _search_bm25(self, query: str, limit: int) -> List[Dict]:
+        with self._lock:
+            num_files = len(self.files)
+            if num_files == 0:
+                return []
+            avg_length = max(self._total_length / num_files, 1.0)
+
+            # (idf, token) for query terms present in the index, rarest first
+            terms = []
+            for token in set(tokenize(query)):
+                files = self.postings.get(token)
+                if files:
+                    df = len(files)
+                    terms.append((math.log((num_files - df + 0.5) / (df + 0.5) + 1.0), token))
+            terms.sort(reverse=True)
+
+            # Upper bound of what the remaining terms can add to any file's score
+            bounds = [idf * (self.k1 + 1) for idf, _ in terms]
+            remaining = sum(bounds)
+
+            scores: Dict[str, float] = {}
+            for (idf, token), bound in zip(terms, bounds):
+                remaining -= bound
+                # MaxScore: once files seen only in the remaining (common) terms
+                # cannot reach the current top-k, those terms only update known files
+                threshold = heapq.nlargest(limit, scores.values())[-1] if len(scores) >= limit else 0.0
+                admit_new = remaining + bound > threshold
+
+                for path, (tf, _) in self.postings[token].items():
+                    if not admit_new and path not in scores:
+                        continue
+                    length = self.files[path]["length"]
+                    norm = self.k1 * (1 - self.b + self.b * length / avg_length)
+                    scores[path] = scores.get(path, 0.0) + idf * tf * (self.k1 + 1) / (tf + norm)
+
+            top = heapq.nlargest(limit, scores.items(), key=lambda item: (item[1], item[0]))
+
+            results = []
+            for path, score in top:
+                line_numbers = set()
+                for _, token in terms:
+                    posting = self.postings[token].get(path)
+                    if posting is not None:
+                        line_numbers.update(posting[1])
+                results.append({'path': path, 'score': round(score, 4), 'lines': sorted(line_numbers)})
+
+        return results
+
+    def get_symbols(self, path: str) -> List[Symbol]:
+        """Indexed symbols of a file (path relative to the repo)."""
+        with self._lock:
+            return [Symbol(**symbol) for symbol in self.symbols.get(path, [])]
+
+    def load(self) -> bool:
+        """Load a saved index for this repository, if any."""
+
+        if self.index_path is None or not self.index_path.exists():
+            return False
+
+        try:
+            with open(self.index_path, 'r') as f:
+                data = json.load(f)
+        except (OSError, ValueError):
+            return False
+
+        if data.get("version") != INDEX_VERSION or data.get("repo_path") != str(self.repo_path.resolve()):
+            return False
+
+        with self._lock:
+            self.files = data["files"]
+            self.postings = data["postings"]
+            self.symbols = data["symbols"]
+            self._total_length = sum(entry["length"] for entry in self.files.values())
+            self.git_state = data.get("git", {})
+            self.skipped = data.get("skipped", {})
+        return True
+
+    def save(self) -> None:
+        """Write the index atomically to index_path."""
+
+        if self.index_path is None:
+            return
+
+        # Only refreshes change the index, so holding _refresh_lock keeps it
+        # consistent while it is written without blocking searches
+        with self._refresh_lock:
+            data = {
+                "version": INDEX_VERSION,
+                "repo_path": str(self.repo_path.resolve()),
+                "files": self.files,
+                "postings": self.postings,
+                "symbols": self.symbols,
+                "git": self.git_state,
+                "skipped": self.skipped
+            }
+            self.index_path.parent.mkdir(parents=True, exist_ok=True)
+            tmp_path = self.index_path.with_suffix(self.index_path.suffix + ".tmp")
+            with open(tmp_path, 'w') as f:
+                json.dump(data, f, separators=(",", ":"))
+            os.replace(tmp_path, self.index_path)
+
+    def get_stats(self) -> Dict:
+        """Get index size."""
+        with self._lock:
+            return {
+                'num_files': len(self.files),
+                'num_tokens': len(self.postings),
+                'num_symbols': sum(len(symbols) for symbols in self.symbols.values()),
+                'total_length': self._total_length
+            }
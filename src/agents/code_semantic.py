@@ -0,0 +1,144 @@
+import json
+import os
+import threading
+from pathlib import Path
+from typing import Dict, List, Optional
+from src.agents.code_index import CodeIndex
+
+
+class SemanticCodeIndex:
+    """Embeddings of function-level code chunks in a vector store collection.
+
+    Chunks are built from the symbols of a CodeIndex. update() embeds only
+    files whose mtime/size changed since they were last embedded (tracked
+    in a JSON state file), so it is meant to run offline after each index
+    refresh; queries only search the collection.
+    """
+
+    def __init__(
+        self,
+        code_index: CodeIndex,
+        vector_store,
+        state_path: Optional[str] = None,
+        max_chunk_chars: int = 1500,
+        chunk_kinds: tuple = ("function", "method")
+    ):
+        self.code_index = code_index
+        self.vector_store = vector_store
+        self.state_path = Path(state_path) if state_path else None
+        self.max_chunk_chars = max_chunk_chars
+        self.chunk_kinds = chunk_kinds
+
+        self._lock = threading.Lock()
+        # path -> [mtime, size] of the file version that is embedded
+        self.embedded: Dict[str, list] = self._load_state()
+
+    def _load_state(self) -> Dict[str, list]:
+        if self.state_path is None or not self.state_path.exists():
+            return {}
+        try:
+            with open(self.state_path, 'r') as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return {}
+
+    def _save_state(self) -> None:
+        if self.state_path is None:
+            return
+        self.state_path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = self.state_path.with_suffix(self.state_path.suffix + ".tmp")
+        with open(tmp_path, 'w') as f:
+            json.dump(self.embedded, f)
+        os.replace(tmp_path, self.state_path)
+
+    def _file_chunks(self, path: str) -> List[Dict]:
+        """One chunk per function/method: signature context, docstring and body."""
+
+        symbols = [s for s in self.code_index.get_symbols(path) if s.kind in self.chunk_kinds]
+        if not symbols:
+            return []
+
+        try:
+            with open(self.code_index.repo_path / path, 'r', encoding='utf-8', errors='replace') as f:
+                lines = f.read().split("\n")
+        except OSError:
+            return []
+
+        chunks = []
+        for symbol in symbols:
+            body = "\n".join(lines[symbol.start_line - 1:symbol.end_line])
+            text = f"{symbol.kind} {symbol.qualified_name} in {path}\n"
+            if symbol.docstring:
+                text += f"{symbol.docstring}\n"
+            text += body
+
+            chunks.append({
+                'id': f"{path}::{symbol.qualified_name}::{symbol.start_line}",
+                'text': text[:self.max_chunk_chars],
+                'metadata': {
+                    'path': path,
+                    'symbol': symbol.qualified_name,
+                    'kind': symbol.kind,
+                    'start_line': symbol.start_line,
+                    'end_line': symbol.end_line
+                }
+            })
+
+        return chunks
+
+    def update(self) -> Dict[str, int]:
+        """Embed changed files and drop chunks of removed ones."""
+
+        with self._lock:
+            counts = {'embedded_files': 0, 'chunks': 0, 'removed_files': 0}
+            # The code index may be refreshing on its own thread
+            with self.code_index._lock:
+                files = {
+                    path: [entry["mtime"], entry["size"]]
+                    for path, entry in self.code_index.files.items()
+                }
+
+            for path in [path for path in self.embedded if path not in files]:
+                self.vector_store.delete_chunks({'path': path})
+                del self.embedded[path]
+                counts['removed_files'] += 1
+
+            for path, version in files.items():
+                if self.embedded.get(path) == version:
+                    continue
+
+                # Replace all chunks of the file: symbols may have moved or been renamed
+                self.vector_store.delete_chunks({'path': path})
+                chunks = self._file_chunks(path)
+                self.vector_store.upsert_chunks(chunks)
+                self.embedded[path] = version
+
+                counts['embedded_files'] += 1
+                counts['chunks'] += len(chunks)
+                if counts['embedded_files'] % 50 == 0:
+                    self._save_state()  # Resume point for long builds
+
+            self._save_state()
+            return counts
+
+    def search(self, query: str, n_results: int = 10) -> List[Dict]:
+        """Code chunks most similar to the query, best first."""
+
+        if not self.embedded:
+            return []
+
+        results = self.vector_store.search(query, n_results=n_results)
+        metadatas = results.get('metadatas') or [[]]
+        distances = results.get('distances') or [[None] * len(metadatas[0])]
+
+        return [
+            {**metadata, 'distance': distance}
+            for metadata, distance in zip(metadatas[0], distances[0])
+            if metadata and metadata.get('path') in self.code_index.files
+        ]
+
+    def get_stats(self) -> Dict:
+        return {
+            'embedded_files': len(self.embedded),
+            'total_chunks': self.vector_store.get_stats()['total_chunks']
+        }
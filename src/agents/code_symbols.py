@@ -0,0 +1,270 @@
+import ast
+import re
+from dataclasses import asdict, dataclass
+from typing import Dict, Iterable, List, Optional, Set
+
+from src.agents.code_tokens import tokenize
+
+
+@dataclass
+class Symbol:
+    """A function, method or class with its line span (1-based, inclusive)."""
+
+    name: str
+    kind: str  # "function", "method", "class" (or struct/interface/enum/trait/impl)
+    start_line: int
+    end_line: int
+    docstring: str = ""
+    parent: Optional[str] = None  # Enclosing class/type for methods
+
+    @property
+    def qualified_name(self) -> str:
+        return f"{self.parent}.{self.name}" if self.parent else self.name
+
+    def to_dict(self) -> Dict:
+        return asdict(self)
+
+
+def extract_python_symbols(source: str) -> List[Symbol]:
+    """Functions, classes and methods from Python source via ast."""
+
+    try:
+        tree = ast.parse(source)
+    except (SyntaxError, ValueError):
+        return []
+
+    symbols = []
+
+    def visit(node: ast.AST, parent: Optional[str]) -> None:
+        for child in ast.iter_child_nodes(node):
+            if isinstance(child, (ast.FunctionDef, ast.AsyncFunctionDef, ast.ClassDef)):
+                # Decorators belong to the symbol's span
+                start = min([child.lineno] + [d.lineno for d in child.decorator_list])
+                if isinstance(child, ast.ClassDef):
+                    kind = "class"
+                else:
+                    kind = "method" if parent else "function"
+                symbols.append(Symbol(
+                    name=child.name,
+                    kind=kind,
+                    start_line=start,
+                    end_line=child.end_lineno or child.lineno,
+                    docstring=(ast.get_docstring(child) or "").split("\n\n")[0],
+                    parent=parent
+                ))
+                visit(child, child.name if isinstance(child, ast.ClassDef) else parent)
+
+    visit(tree, None)
+    return symbols
+
+
+_CONTROL_KEYWORDS = {"if", "for", "while", "switch", "catch", "return", "else", "do", "try", "new", "function"}
+
+# (pattern, kind) per language; group "name" is the symbol, "parent" an optional receiver type
+_BRACE_PATTERNS = {
+    "js": [
+        (r"^\s*(?:export\s+)?(?:default\s+)?class\s+(?P<name>\w+)", "class"),
+        (r"^\s*(?:export\s+)?(?:default\s+)?(?:async\s+)?function\s*\*?\s*(?P<name>\w+)\s*\(", "function"),
+        (r"^\s*(?:export\s+)?(?:const|let|var)\s+(?P<name>\w+)\s*=\s*(?:async\s+)?(?:function\b|\([^)]*\)\s*=>|\w+\s*=>)", "function"),
+        (r"^\s+(?:static\s+)?(?:async\s+)?(?:get\s+|set\s+)?(?P<name>\w+)\s*\([^;]*\)\s*\{", "method"),
+    ],
+    "java": [
+        (r"^\s*(?:(?:public|private|protected|static|final|abstract|sealed)\s+)*(?P<kind>class|interface|enum|record)\s+(?P<name>\w+)", None),
+        (r"^\s*(?:(?:public|private|protected|static|final|abstract|synchronized|native|default)\s+)*"
+         r"(?:<[^>]+>\s+)?[\w<>\[\],.? ]+\s+(?P<name>\w+)\s*\([^;]*$", "method"),
+    ],
+    "cpp": [
+        (r"^\s*(?:template\s*<[^>]*>\s*)?(?P<kind>class|struct)\s+(?P<name>\w+)[^;]*$", None),
+        (r"^\s*(?:[\w:<>*&,]+\s+)+\**&?(?:(?P<parent>\w+)::)?(?P<name>~?\w+)\s*\([^;]*$", "function"),
+    ],
+    "go": [
+        (r"^func\s+\(\s*\w*\s*\*?(?P<parent>\w+)[^)]*\)\s*(?P<name>\w+)\s*\(", "method"),
+        (r"^func\s+(?P<name>\w+)\s*[\[(]", "function"),
+        (r"^type\s+(?P<name>\w+)\s+(?P<kind>struct|interface)\b", None),
+    ],
+    "rs": [
+        (r"^\s*(?:pub(?:\([^)]*\))?\s+)?(?:(?:async|const|unsafe|extern\s+\"\w+\")\s+)*fn\s+(?P<name>\w+)", "function"),
+        (r"^\s*(?:pub(?:\([^)]*\))?\s+)?(?P<kind>struct|enum|trait)\s+(?P<name>\w+)", None),
+        (r"^\s*impl(?:<[^>]*>)?\s+(?:[\w:<>]+\s+for\s+)?(?P<name>\w+)", "impl"),
+    ],
+}
+_BRACE_PATTERNS = {
+    language: [(re.compile(pattern), kind) for pattern, kind in patterns]
+    for language, patterns in _BRACE_PATTERNS.items()
+}
+
+_LANGUAGES = {
+    ".js": "js", ".jsx": "js", ".ts": "js", ".tsx": "js",
+    ".java": "java",
+    ".cpp": "cpp", ".cc": "cpp", ".hpp": "cpp", ".h": "cpp",
+    ".go": "go",
+    ".rs": "rs",
+}
+
+
+def _find_block_end(lines: List[str], start: int) -> Optional[int]:
+    """Index of the line closing the first brace block opened at or after lines[start].
+
+    Skips braces inside string/char literals and comments. Returns None if
+    a ';' ends the declaration before any '{' (prototypes, abstract methods).
+    """
+
+    depth = 0
+    opened = False
+    in_block_comment = False
+
+    for index in range(start, len(lines)):
+        line = lines[index]
+        i = 0
+        quote = None
+        while i < len(line):
+            char = line[i]
+            if in_block_comment:
+                if line.startswith("*/", i):
+                    in_block_comment = False
+                    i += 1
+            elif quote:
+                if char == "\\":
+                    i += 1
+                elif char == quote:
+                    quote = None
+            elif line.startswith("//", i):
+                break
+            elif line.startswith("/*", i):
+                in_block_comment = True
+                i += 1
+            elif char in "\"'`":
+                quote = char
+            elif char == "{":
+                depth += 1
+                opened = True
+            elif char == "}":
+                depth -= 1
+                if opened and depth == 0:
+                    return index
+            elif char == ";" and not opened:
+                return None
+            i += 1
+
+        # Don't look for the opening brace too far past the signature
+        if not opened and index - start > 5:
+            return None
+
+    return None
+
+
+def _leading_comment(lines: List[str], start: int) -> str:
+    """Comment block directly above lines[start], without comment markers."""
+
+    comment = []
+    index = start - 1
+    while index >= 0:
+        stripped = lines[index].strip()
+        if stripped.startswith(("//", "/*", "*", "*/", "///")) or stripped.endswith("*/"):
+            text = stripped.lstrip("/*! ").rstrip("*/ ").strip()
+            if text and not text.startswith("@"):
+                comment.insert(0, text)
+            index -= 1
+        elif stripped.startswith(("@", "#[")):
+            index -= 1  # Annotations / attributes between comment and symbol
+        else:
+            break
+    return " ".join(comment)
+
+
+def extract_brace_symbols(source: str, language: str) -> List[Symbol]:
+    """Symbols of a brace-delimited language found by line patterns and brace matching."""
+
+    lines = source.splitlines()
+    symbols: List[Symbol] = []
+    containers: List[Symbol] = []  # Open class/impl blocks for method parents
+
+    for index, line in enumerate(lines):
+        while containers and containers[-1].end_line < index + 1:
+            containers.pop()
+
+        for pattern, kind in _BRACE_PATTERNS[language]:
+            match = pattern.match(line)
+            if not match:
+                continue
+
+            name = match.group("name")
+            if name in _CONTROL_KEYWORDS:
+                break
+
+            end = _find_block_end(lines, index)
+            if end is None:
+                break
+
+            groups = match.groupdict()
+            symbol_kind = kind or groups.get("kind")
+            parent = groups.get("parent") or (containers[-1].name if containers else None)
+            if symbol_kind == "function" and parent:
+                symbol_kind = "method"
+            if symbol_kind == "method" and not parent:
+                symbol_kind = "function"
+
+            symbol = Symbol(
+                name=name,
+                kind=symbol_kind,
+                start_line=index + 1,
+                end_line=end + 1,
+                docstring=_leading_comment(lines, index),
+                parent=parent if symbol_kind == "method" else None
+            )
+            symbols.append(symbol)
+
+            if symbol_kind not in ("function", "method"):
+                containers.append(symbol)
+            break
+
+    return symbols
+
+
+def extract_symbols(path: str, source: str) -> List[Symbol]:
+    """Symbols of a source file, dispatched on its extension."""
+
+    if path.endswith(".py"):
+        return extract_python_symbols(source)
+
+    for suffix, language in _LANGUAGES.items():
+        if path.endswith(suffix):
+            return extract_brace_symbols(source, language)
+
+    return []
+
+
+def rank_symbols(
+    symbols: Iterable[Symbol],
+    query_tokens: Set[str],
+    hit_lines: Iterable[int],
+    limit: int = 3
+) -> List[Symbol]:
+    """Most relevant non-overlapping symbols for a query.
+
+    A symbol scores for query tokens in its name or docstring and for
+    matched lines in its body; on ties, the smaller symbol wins, so a
+    matching method is preferred over its whole class.
+    """
+
+    hit_lines = sorted(set(hit_lines))
+    scored = []
+    for symbol in symbols:
+        name_hits = len(query_tokens & set(tokenize(symbol.qualified_name)))
+        doc_hits = len(query_tokens & set(tokenize(symbol.docstring)))
+        body_hits = sum(1 for line in hit_lines if symbol.start_line <= line <= symbol.end_line)
+        score = 3 * name_hits + doc_hits + body_hits
+        if score > 0:
+            span = symbol.end_line - symbol.start_line
+            scored.append((-score, span, symbol.start_line, symbol))
+
+    selected: List[Symbol] = []
+    for _, _, _, symbol in sorted(scored, key=lambda item: item[:3]):
+        # Skip symbols nested in, or containing, an already selected one
+        if any(symbol.start_line <= other.end_line and other.start_line <= symbol.end_line for other in selected):
+            continue
+        selected.append(symbol)
+        if len(selected) == limit:
+            break
+
+    return selected
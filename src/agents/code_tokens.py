@@ -0,0 +1,38 @@
+import re
+from typing import List
+
+_IDENTIFIER = re.compile(r"[A-Za-z_][A-Za-z0-9_]*")
+# Words of a camelCase / PascalCase identifier, keeping acronyms together ("HTTPServer" -> HTTP, Server)
+_CAMEL_PART = re.compile(r"[A-Z]+(?=[A-Z][a-z])|[A-Z]?[a-z]+|[A-Z]+|[0-9]+")
+
+# English words common in questions that carry no signal for code search
+STOP_WORDS = frozenset("""
+a about above after all also am an and any are as at be been being below between both but by can
+could did do does doing done during each either else for from had has have having he her here
+him his how i if in into is it its itself just me more most my no nor not of off on once only or
+other our out over own please same she should show so some such than that the their them then there
+these they this those through to too under until up us very was we were what when where which
+while who whom why will with would you your
+""".split())
+
+
+def split_identifier(identifier: str) -> List[str]:
+    """Lowercased words of a snake_case / camelCase identifier (without the identifier itself)."""
+    words = []
+    for part in identifier.split("_"):
+        words.extend(word.lower() for word in _CAMEL_PART.findall(part))
+    return words
+
+
+def tokenize(text: str) -> List[str]:
+    """Lowercased identifiers plus their snake_case/camelCase words, without stop words."""
+    tokens = []
+    for identifier in _IDENTIFIER.findall(text):
+        lowered = identifier.lower()
+        if lowered not in STOP_WORDS:
+            tokens.append(lowered)
+
+        words = split_identifier(identifier)
+        if len(words) > 1:
+            tokens.extend(word for word in words if word not in STOP_WORDS)
+    return tokens
@@ -0,0 +1,182 @@
+import json
+import threading
+from pathlib import Path
+from typing import Callable, Dict, List, Optional, Tuple
+import numpy as np
+from src.agent_state import QueryClassification
+
+# Seed examples taken from the evaluation and test datasets
+DEFAULT_EXAMPLES: List[Tuple[str, str]] = [
+    ("What is Python?", "research"),
+    ("Explain machine learning", "research"),
+    ("What is data engineering?", "research"),
+    ("Define artificial intelligence", "research"),
+    ("What are neural networks?", "research"),
+    ("What is machine learning?", "research"),
+    ("What are the key features of machine learning?", "research"),
+    ("Show all users", "sql"),
+    ("List premium users", "sql"),
+    ("Calculate total revenue", "sql"),
+    ("Show me all premium users", "sql"),
+    ("What are the total purchases by user?", "sql"),
+    ("List all purchases over $100", "sql"),
+    ("Show all users with premium plans", "sql"),
+    ("Calculate total revenue from all purchases", "sql"),
+    ("Show me all users who purchased in the last 30 days", "sql"),
+    ("How does divide function work?", "code"),
+    ("What validation is performed?", "code"),
+    ("How does the divide function work?", "code"),
+    ("What validation is performed on inputs?", "code"),
+    ("Show me all mathematical operations available", "code"),
+    ("How does the divide function handle zero division?", "code"),
+    ("How does the authentication function work in main.py?", "code"),
+    ("What's the weather like today?", "general"),
+    ("Hello, how are you?", "general"),
+    ("Thanks for your help!", "general"),
+]
+
+
+class EmbeddingRouter:
+    """Nearest-centroid / kNN query classifier over embeddings of labeled examples.
+
+    Used as a fast path in front of the LLM router: only queries it is not
+    confident about need a full LLM classification.
+    """
+
+    def __init__(
+        self,
+        embed_fn: Callable[[str], List[float]],
+        examples: Optional[List[Tuple[str, str]]] = None,
+        k: int = 5,
+        min_similarity: float = 0.5
+    ):
+        self.embed_fn = embed_fn
+        self.examples = list(examples) if examples is not None else list(DEFAULT_EXAMPLES)
+        self.k = k
+        self.min_similarity = min_similarity
+
+        self._lock = threading.Lock()
+        self._matrix: Optional[np.ndarray] = None
+        self._labels: Optional[np.ndarray] = None
+        self._centroids: Optional[np.ndarray] = None
+        self._centroid_labels: List[str] = []
+
+        # Routing statistics
+        self.total_queries = 0
+        self.fast_path_queries = 0
+        self.compared_with_llm = 0
+        self.agreed_with_llm = 0
+
+    @staticmethod
+    def load_examples(dataset_path: str) -> List[Tuple[str, str]]:
+        """Load (question, expected_type) pairs from an evaluation dataset."""
+
+        path = Path(dataset_path)
+        if not path.exists():
+            return []
+
+        with open(path, 'r') as f:
+            dataset = json.load(f)
+
+        return [
+            (case['question'], case['expected_type'])
+            for case in dataset.get('test_cases', [])
+            if case.get('question') and case.get('expected_type')
+        ]
+
+    def add_examples(self, examples: List[Tuple[str, str]]) -> None:
+        """Add labeled examples; the index is rebuilt on next use."""
+        with self._lock:
+            known = set(self.examples)
+            self.examples.extend(e for e in examples if e not in known)
+            self._matrix = None
+
+    def _normalize(self, vectors: np.ndarray) -> np.ndarray:
+        norms = np.linalg.norm(vectors, axis=-1, keepdims=True)
+        return vectors / np.maximum(norms, 1e-12)
+
+    def _ensure_index(self) -> None:
+        with self._lock:
+            if self._matrix is not None:
+                return
+
+            embeddings = np.array(
+                [self.embed_fn(text) for text, _ in self.examples],
+                dtype=np.float32
+            )
+            labels = np.array([label for _, label in self.examples])
+
+            self._matrix = self._normalize(embeddings)
+            self._labels = labels
+            self._centroid_labels = sorted(set(labels.tolist()))
+            self._centroids = self._normalize(np.stack([
+                self._matrix[labels == label].mean(axis=0)
+                for label in self._centroid_labels
+            ]))
+
+    def classify(self, query: str) -> QueryClassification:
+        """Classify a query from its nearest labeled examples."""
+
+        self._ensure_index()
+
+        query_vector = self._normalize(np.asarray(self.embed_fn(query), dtype=np.float32))
+        similarities = self._matrix @ query_vector
+
+        # Similarity-weighted vote among the k nearest examples
+        k = min(self.k, len(similarities))
+        nearest = np.argpartition(-similarities, k - 1)[:k]
+        weights = np.clip(similarities[nearest], 0.0, None)
+
+        votes: Dict[str, float] = {}
+        for label, weight in zip(self._labels[nearest].tolist(), weights):
+            votes[label] = votes.get(label, 0.0) + float(weight)
+
+        knn_label = max(votes, key=votes.get)
+        total_weight = sum(votes.values())
+        confidence = votes[knn_label] / total_weight if total_weight > 0 else 0.0
+
+        # Halve confidence when the nearest centroid disagrees with the kNN vote
+        centroid_label = self._centroid_labels[int(np.argmax(self._centroids @ query_vector))]
+        if centroid_label != knn_label:
+            confidence *= 0.5
+
+        # Queries unlike any example are never answered from the fast path
+        best_similarity = float(similarities[nearest].max())
+        if best_similarity < self.min_similarity:
+            confidence = 0.0
+
+        return QueryClassification(
+            query_type=knn_label,
+            confidence=round(confidence, 4),
+            reasoning=f"Fast path: {k}-NN over {len(self.examples)} labeled examples "
+                      f"(nearest similarity {best_similarity:.2f})"
+        )
+
+    def record_query(self, fast_type: Optional[str], llm_type: Optional[str], served_by_fast_path: bool) -> None:
+        """Record how a query was routed.
+
+        fast_type / llm_type are the fast-path and LLM classifications when
+        available; agreement is measured whenever both are present.
+        """
+        with self._lock:
+            self.total_queries += 1
+            self.fast_path_queries += int(served_by_fast_path)
+            if fast_type is not None and llm_type is not None:
+                self.compared_with_llm += 1
+                self.agreed_with_llm += int(fast_type == llm_type)
+
+    def get_stats(self) -> Dict:
+        """Get fast-path usage and agreement statistics."""
+        with self._lock:
+            return {
+                'total_queries': self.total_queries,
+                'fast_path_queries': self.fast_path_queries,
+                'fast_path_fraction': (
+                    self.fast_path_queries / self.total_queries if self.total_queries else 0.0
+                ),
+                'compared_with_llm': self.compared_with_llm,
+                'llm_agreement_rate': (
+                    self.agreed_with_llm / self.compared_with_llm if self.compared_with_llm else None
+                ),
+                'num_examples': len(self.examples)
+            }
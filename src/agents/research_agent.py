@@ -1,7 +1,8 @@
 from src.vector_store import VectorStoreManager
 from src.agent_state import AgentState, AgentResponse
-import ollama
-from typing import List, Dict
+from src import llm
+from typing import List, Dict, Optional
+from src.deadline import DeadlineExceeded, node_timeout, record_degraded
 
 class ResearchAgent:
     """RAG-based research agent for document retrieval."""
@@ -16,7 +17,7 @@ class ResearchAgent:
         results = self.vector_store.search(query, n_results=self.top_k)
         return results['documents'][0] if results['documents'] else []
 
-    def generate_answer(self, query: str, contexts: List[str]) -> AgentResponse:
+    def generate_answer(self, query: str, contexts: List[str], timeout: Optional[float] = None) -> AgentResponse:
         """Generate answer from retrieved context."""
 
         context_str = "\n\n".join([
@@ -34,7 +35,7 @@ Question: {query}
 
 Provide a detailed, well-structured answer."""
 
-        response = ollama.generate(model=self.model, prompt=prompt)
+        response = llm.generate(model=self.model, prompt=prompt, timeout=timeout)
 
         # Extract sources
         sources = [
@@ -54,12 +55,28 @@ Provide a detailed, well-structured answer."""
 
         print(f"\n📚 Research Agent processing query...")
 
-        # Retrieve
-        contexts = self.retrieve_context(state["query"])
-        print(f"  Retrieved {len(contexts)} relevant documents")
+        # Retrieve (unless already prefetched while routing ran)
+        contexts = state.get("research_contexts")
+        if contexts is None:
+            contexts = self.retrieve_context(state["query"])
+            print(f"  Retrieved {len(contexts)} relevant documents")
+        else:
+            print(f"  Using {len(contexts)} prefetched documents")
 
         # Generate
-        result = self.generate_answer(state["query"], contexts)
+        try:
+            result = self.generate_answer(
+                state["query"],
+                contexts,
+                timeout=node_timeout(state, "research")
+            )
+        except DeadlineExceeded as e:
+            error_msg = f"Research Agent error: {str(e)}"
+            print(f"  ❌ {error_msg}")
+            state["errors"].append(error_msg)
+            record_degraded(state, "research")
+            return state
+
         print(f"  Generated answer with confidence: {result.confidence:.2f}")
 
         # Update state
@@ -1,16 +1,84 @@
-import ollama
+from src import llm
 import json
-from typing import Dict
+import random
+import threading
+from typing import Dict, List, Optional
 from src.agent_state import AgentState, QueryClassification
+from src.agents.embedding_router import EmbeddingRouter
+from src.deadline import DeadlineExceeded, node_timeout, record_degraded
 
 class RouterAgent:
     """Routes queries to appropriate specialist agents."""
 
-    def __init__(self, model: str = "llama3.1", confidence_threshold: float = 0.7):
+    SPECIALISTS = ("research", "sql", "code")
+    # "intents" value shown in the prompt's JSON template
+    INTENTS_TEMPLATE = ["research|sql|code"]
+
+    def __init__(
+        self,
+        model: str = "llama3.1",
+        confidence_threshold: float = 0.7,
+        fast_router: Optional[EmbeddingRouter] = None,
+        fast_path_audit_rate: float = 0.0,
+        multi_intent: bool = True
+    ):
         self.model = model
         self.confidence_threshold = confidence_threshold
 
-    def classify_query(self, query: str) -> QueryClassification:
+        # Allow fanning out to several specialists for mixed questions
+        self.multi_intent = multi_intent
+
+        # Optional embedding classifier that answers confident queries without the LLM
+        self.fast_router = fast_router
+        # Fraction of fast-path answers also classified by the LLM to measure agreement
+        self.fast_path_audit_rate = fast_path_audit_rate
+
+    def classify_query(self, query: str, timeout: Optional[float] = None) -> QueryClassification:
+        """Classify the query type, using the fast path when it is confident."""
+
+        if self.fast_router is None:
+            return self.classify_query_llm(query, timeout=timeout)
+
+        try:
+            fast = self.fast_router.classify(query)
+        except Exception as e:
+            print(f"  Fast-path routing unavailable: {str(e)}")
+            fast = None
+
+        if fast is not None and fast.confidence >= self.confidence_threshold:
+            if random.random() < self.fast_path_audit_rate:
+                # The audit only measures agreement; the answer does not wait for it
+                threading.Thread(
+                    target=self._audit_fast_path,
+                    args=(query, fast.query_type, timeout),
+                    name="router-audit",
+                    daemon=True
+                ).start()
+            else:
+                self.fast_router.record_query(fast.query_type, None, served_by_fast_path=True)
+            return fast
+
+        classification = self.classify_query_llm(query, timeout=timeout)
+        self.fast_router.record_query(
+            fast.query_type if fast is not None else None,
+            classification.query_type,
+            served_by_fast_path=False
+        )
+        return classification
+
+    def _audit_fast_path(self, query: str, fast_type: str, timeout: Optional[float]) -> None:
+        """Classify a fast-path query with the LLM and record whether they agree."""
+
+        llm_type = None
+        try:
+            llm_type = self.classify_query_llm(query, timeout=timeout).query_type
+        except Exception as e:
+            # Includes DeadlineExceeded: a failed audit is just not compared
+            print(f"  Fast-path audit skipped: {str(e)}")
+
+        self.fast_router.record_query(fast_type, llm_type, served_by_fast_path=True)
+
+    def classify_query_llm(self, query: str, timeout: Optional[float] = None) -> QueryClassification:
         """Classify the query type using LLM."""
 
         prompt = f"""You are a query classification system. Analyze the user query and determine which type of agent should handle it.
@@ -21,19 +89,26 @@ Agent Types:
 - code: Questions about code, programming, debugging, or code repository analysis
 - general: Simple questions that don't require specialized tools
 
+Most queries need a single agent. Only when a query clearly needs several
+(e.g. both documentation and data), list each of them in "intents"; set
+"query_type" to the main one. "intents" is the subset of research, sql and
+code that is actually needed, usually just the query_type.
+
 User Query: {query}
 
 Respond with JSON only:
 {{
     "query_type": "research|sql|code|general",
+    "intents": {json.dumps(self.INTENTS_TEMPLATE)},
     "confidence": 0.0-1.0,
     "reasoning": "brief explanation"
 }}"""
 
-        response = ollama.generate(
+        response = llm.generate(
             model=self.model,
             prompt=prompt,
-            format="json"
+            format="json",
+            timeout=timeout
         )
 
         try:
@@ -47,24 +122,68 @@ Respond with JSON only:
                 reasoning=f"Classification error: {str(e)}"
             )
 
+    def get_intents(self, classification: QueryClassification) -> List[str]:
+        """Specialists to run for a classification, main query type first."""
+
+        intents = [classification.query_type]
+        # The template itself, or every specialist alongside a specific main
+        # type, is the prompt's format echoed back rather than a real
+        # multi-part question
+        copied = classification.intents == self.INTENTS_TEMPLATE or (
+            classification.query_type in self.SPECIALISTS and
+            set(self.SPECIALISTS) <= set(classification.intents)
+        )
+        if self.multi_intent and not copied:
+            intents += classification.intents
+
+        # Deduplicate, keep known specialists only
+        specialists = [
+            intent for i, intent in enumerate(intents)
+            if intent in self.SPECIALISTS and intent not in intents[:i]
+        ]
+        return specialists or ["general"]
+
     def route(self, state: AgentState) -> AgentState:
         """Route query to appropriate agent."""
 
         print(f"\n🔀 Router Agent analyzing query...")
 
-        classification = self.classify_query(state["query"])
+        try:
+            classification = self.classify_query(
+                state["query"],
+                timeout=node_timeout(state, "router")
+            )
+        except DeadlineExceeded as e:
+            # Out of budget: skip classification and answer directly
+            classification = QueryClassification(
+                query_type="general",
+                confidence=0.0,
+                reasoning=f"Routing skipped: {str(e)}"
+            )
+            record_degraded(state, "router")
+
+        intents = self.get_intents(classification)
 
         print(f"  Query Type: {classification.query_type}")
+        if len(intents) > 1:
+            print(f"  Intents: {', '.join(intents)}")
         print(f"  Confidence: {classification.confidence:.2f}")
         print(f"  Reasoning: {classification.reasoning}")
 
         # Update state
         state["query_type"] = classification.query_type
+        state["query_intents"] = intents
         state["routing_confidence"] = classification.confidence
         state["agent_path"].append("router")
 
         return state
 
+    def get_routing_stats(self) -> Dict:
+        """Get fast-path routing statistics."""
+        if self.fast_router is None:
+            return {'fast_path_enabled': False}
+        return {'fast_path_enabled': True, **self.fast_router.get_stats()}
+
     def should_route_to_specialist(self, state: AgentState) -> bool:
         """Determine if confidence is high enough to route."""
         return state["routing_confidence"] >= self.confidence_threshold
\ No newline at end of file
@@ -0,0 +1,196 @@
+import sqlite3
+import threading
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from typing import Callable, Dict, List, Optional, Tuple
+import numpy as np
+
+# Longer DDL is cut when embedded; columns and samples are listed anyway
+MAX_EMBEDDED_DDL_CHARS = 1000
+
+
+@dataclass
+class TableInfo:
+    """Schema description of one table used for retrieval."""
+
+    name: str
+    ddl: str
+    columns: List[str] = field(default_factory=list)
+    samples: Dict[str, List[str]] = field(default_factory=dict)  # column -> sample values
+    foreign_keys: List[str] = field(default_factory=list)  # Referenced tables
+
+    def describe(self) -> str:
+        """Text embedded for retrieval: name, columns, sample values and DDL."""
+        lines = [f"Table {self.name}", f"Columns: {', '.join(self.columns)}"]
+        for column, values in self.samples.items():
+            lines.append(f"{column} values: {', '.join(values)}")
+        if self.foreign_keys:
+            lines.append(f"References: {', '.join(self.foreign_keys)}")
+        lines.append(self.ddl[:MAX_EMBEDDED_DDL_CHARS])
+        return "\n".join(lines)
+
+
+class SchemaIndex:
+    """Embedding index over table descriptions for per-question schema selection.
+
+    Each table's columns, sample values and DDL are embedded once; a question
+    gets the DDL of its top_k most similar tables plus up to max_neighbours
+    foreign-key neighbours each, so prompt size no longer grows with the
+    number of tables.
+    """
+
+    def __init__(
+        self,
+        embed_fn: Callable[[str], List[float]],
+        top_k: int = 5,
+        include_neighbours: bool = True,
+        max_neighbours: int = 3,
+        sample_values: int = 3,
+        cache_size: int = 256
+    ):
+        self.embed_fn = embed_fn
+        self.top_k = top_k
+        self.include_neighbours = include_neighbours
+        self.max_neighbours = max_neighbours
+        self.sample_values = sample_values
+        self.cache_size = cache_size
+
+        self.tables: Dict[str, TableInfo] = {}
+        self._names: List[str] = []
+        self._referenced_by: Dict[str, List[str]] = {}  # table -> tables with a foreign key to it
+        self._matrix: Optional[np.ndarray] = None
+
+        self._lock = threading.Lock()
+        self._cache: "OrderedDict[str, List[str]]" = OrderedDict()
+
+        # Cache statistics
+        self.cache_hits = 0
+        self.cache_misses = 0
+
+    def _inspect_table(self, conn: sqlite3.Connection, name: str, ddl: str) -> TableInfo:
+        info = TableInfo(name=name, ddl=ddl)
+
+        for _, column, column_type, *_ in conn.execute(f'PRAGMA table_info("{name}")'):
+            info.columns.append(column)
+
+            # Sample values only for text columns; numbers carry little meaning
+            if "CHAR" in column_type.upper() or "TEXT" in column_type.upper() or not column_type:
+                try:
+                    values = conn.execute(
+                        f'SELECT DISTINCT "{column}" FROM "{name}" '
+                        f'WHERE "{column}" IS NOT NULL LIMIT {int(self.sample_values)}'
+                    ).fetchall()
+                except sqlite3.Error:
+                    values = []
+                if values:
+                    info.samples[column] = [str(value[0])[:50] for value in values]
+
+        info.foreign_keys = sorted({
+            row[2] for row in conn.execute(f'PRAGMA foreign_key_list("{name}")')
+        })
+
+        return info
+
+    def build(self, conn: sqlite3.Connection) -> None:
+        """Inspect and embed every table in the database."""
+
+        rows = conn.execute(
+            "SELECT name, sql FROM sqlite_master "
+            "WHERE type='table' AND name NOT LIKE 'sqlite_%' AND sql IS NOT NULL"
+        ).fetchall()
+
+        tables = {name: self._inspect_table(conn, name, ddl) for name, ddl in rows}
+        names = list(tables)
+
+        referenced_by: Dict[str, List[str]] = {}
+        for name, info in tables.items():
+            for target in info.foreign_keys:
+                referenced_by.setdefault(target, []).append(name)
+
+        print(f"Indexing schema of {len(names)} tables...")
+        embeddings = np.array(
+            [self.embed_fn(tables[name].describe()) for name in names],
+            dtype=np.float32
+        ).reshape(len(names), -1)
+        norms = np.linalg.norm(embeddings, axis=-1, keepdims=True)
+
+        with self._lock:
+            self.tables = tables
+            self._names = names
+            self._referenced_by = referenced_by
+            self._matrix = embeddings / np.maximum(norms, 1e-12)
+            self._cache.clear()
+
+    def select_tables(self, question: str) -> List[str]:
+        """Names of the tables relevant to question (cached per question)."""
+        return self._select(question)[1]
+
+    def _select(self, question: str) -> Tuple[Dict[str, TableInfo], List[str]]:
+        """select_tables with the table snapshot the names were selected from."""
+
+        with self._lock:
+            tables = self.tables
+            if question in self._cache:
+                self._cache.move_to_end(question)
+                self.cache_hits += 1
+                return tables, list(self._cache[question])
+            self.cache_misses += 1
+            names, matrix = self._names, self._matrix
+            referenced_by = self._referenced_by
+
+        if matrix is None or not names:
+            return tables, []
+
+        query_vector = np.asarray(self.embed_fn(question), dtype=np.float32)
+        query_vector = query_vector / max(float(np.linalg.norm(query_vector)), 1e-12)
+        similarities = matrix @ query_vector
+
+        k = min(self.top_k, len(names))
+        nearest = np.argpartition(-similarities, k - 1)[:k]
+        selected = [names[i] for i in nearest[np.argsort(-similarities[nearest])]]
+
+        if self.include_neighbours:
+            # Tables referenced by, or referencing, a selected table are needed
+            # for joins. A hub table can be referenced by hundreds of others, so
+            # each table adds at most max_neighbours: the tables it references
+            # first, then those referencing it, most similar to the question first.
+            position = {name: i for i, name in enumerate(names)}
+            chosen = set(selected)
+            for name in list(selected):
+                referencing = sorted(referenced_by.get(name, []), key=lambda other: -similarities[position[other]])
+                added = 0
+                for neighbour in tables[name].foreign_keys + referencing:
+                    if added >= self.max_neighbours:
+                        break
+                    if neighbour in tables and neighbour not in chosen:
+                        selected.append(neighbour)
+                        chosen.add(neighbour)
+                        added += 1
+
+        with self._lock:
+            # A rebuild finished meanwhile: its cache must not get this selection
+            if self.tables is tables:
+                self._cache[question] = selected
+                if len(self._cache) > self.cache_size:
+                    self._cache.popitem(last=False)
+
+        return tables, list(selected)
+
+    def schema_for(self, question: str) -> str:
+        """DDL of the tables relevant to question."""
+        # Same snapshot as the selection, so a concurrent rebuild cannot
+        # remove a selected table
+        tables, names = self._select(question)
+        return "\n\n".join(tables[name].ddl for name in names)
+
+    def get_stats(self) -> Dict:
+        """Get index size and cache statistics."""
+        with self._lock:
+            lookups = self.cache_hits + self.cache_misses
+            return {
+                'num_tables': len(self._names),
+                'top_k': self.top_k,
+                'cache_hits': self.cache_hits,
+                'cache_misses': self.cache_misses,
+                'cache_hit_rate': self.cache_hits / lookups if lookups else 0.0
+            }
@@ -1,43 +1,164 @@
+import asyncio
 import sqlite3
-import ollama
+import threading
+import time
+import weakref
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from src import llm
 import json
-from typing import Dict, List, Optional
+from typing import Any, Callable, Dict, List, Optional, Tuple, Union
 from src.agent_state import AgentState, AgentResponse
+from src.agents.sql_results import AGGREGATES, SQLResultSet, is_select, wrap_with_aggregates, wrap_with_limit
+from src.agents.sql_guard import PlanAnalysis, QueryCostGuard, SQLRejected
+from src.agents.schema_index import SchemaIndex
+from src.agents.sql_cache import SQLCache
+from src.agents.sql_summary import format_summary
+from src.deadline import DeadlineExceeded, node_timeout, record_degraded
+from src.sqlite_pool import SQLitePool
+
+# Per-event-loop, per-database-file limits on concurrently executing statements
+_DB_SEMAPHORES: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, Dict[str, asyncio.Semaphore]]" = \
+    weakref.WeakKeyDictionary()
+_DB_SEMAPHORES_LOCK = threading.Lock()
+
 
 class SQLAgent:
     """Agent for querying structured databases."""
 
-    def __init__(self, db_path: str, model: str = "llama3.1"):
+    def __init__(
+        self,
+        db_path: str,
+        model: str = "llama3.1",
+        pool_size: int = 4,
+        max_rows: Optional[int] = None,
+        count_total_rows: bool = False,
+        fetch_batch_size: int = 256,
+        cost_guard: Optional[QueryCostGuard] = None,
+        statement_timeout: Optional[float] = None,
+        schema_index: Optional[SchemaIndex] = None,
+        cache: Optional[SQLCache] = None,
+        max_concurrent_queries: Optional[int] = None,
+        summarize_threshold: Optional[int] = None
+    ):
         self.db_path = db_path
         self.model = model
+
+        # Row cap for query(); None keeps the unbounded execute_sql path
+        self.max_rows = max_rows
+        self.count_total_rows = count_total_rows
+        self.fetch_batch_size = fetch_batch_size
+
+        # Results with more rows than this are answered with a column summary
+        self.summarize_threshold = summarize_threshold
+
+        # Pre-execution plan checks and a per-statement time limit (seconds)
+        self.cost_guard = cost_guard
+        self.statement_timeout = statement_timeout
+
+        # Read-only connections reused across queries and threads
+        self.pool = SQLitePool(db_path, max_size=pool_size)
+
+        # Async path: statements run on a bounded thread pool, at most
+        # max_concurrent_queries at a time per database file
+        self.max_concurrent_queries = max_concurrent_queries or pool_size
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self._executor_lock = threading.Lock()
+
         self.schema = self._get_schema()
 
+        # Per-question table selection, only for large schemas. Built in the
+        # background; queries use the full schema until it is ready.
+        self.schema_index = schema_index
+        self._schema_index_ready = False
+        self._schema_index_version = 0
+        self._schema_index_lock = threading.Lock()
+        self._schema_index_build_lock = threading.Lock()
+        self._build_schema_index()
+
+        # Generated SQL and results, invalidated when the database changes
+        self.cache = cache
+
     def _get_schema(self) -> str:
         """Get database schema."""
-        conn = sqlite3.connect(self.db_path)
-        cursor = conn.cursor()
+        with self.pool.connection() as conn:
+            cursor = conn.cursor()
+            cursor.execute("SELECT sql FROM sqlite_master WHERE type='table'")
+            tables = cursor.fetchall()
+
+        self.table_count = len(tables)
+        return "\n\n".join([table[0] for table in tables])
 
-        cursor.execute("SELECT sql FROM sqlite_master WHERE type='table'")
-        tables = cursor.fetchall()
+    def refresh_schema(self) -> bool:
+        """Reload the schema if the database changed; returns True if it did."""
+        if self.cache is None or not self.cache.refresh():
+            return False
 
-        conn.close()
+        print("  Database schema changed, reloading")
+        self.schema = self._get_schema()
+        self._build_schema_index()
+        return True
+
+    def _build_schema_index(self) -> None:
+        """Start (re)building the schema index on a background thread."""
+        if self.schema_index is None:
+            return
+
+        with self._schema_index_lock:
+            self._schema_index_ready = False
+            self._schema_index_version += 1
+            version = self._schema_index_version
+
+        if self.table_count <= self.schema_index.top_k:
+            return
+
+        def build() -> None:
+            with self._schema_index_build_lock:
+                # A newer schema superseded this build while it waited
+                if version != self._schema_index_version:
+                    return
+                try:
+                    with self.pool.connection() as conn:
+                        self.schema_index.build(conn)
+                except Exception as e:
+                    print(f"  ⚠️  Schema index build failed, using the full schema: {e}")
+                    return
+
+            with self._schema_index_lock:
+                self._schema_index_ready = version == self._schema_index_version
+
+        threading.Thread(target=build, name="schema-index", daemon=True).start()
+
+    def get_prompt_schema(self, query: str) -> str:
+        """Schema to include in the prompt for query.
+
+        With a built schema index and more tables than it would select, only
+        the relevant tables' DDL is returned; otherwise the full schema.
+        """
+        if not self._schema_index_ready:
+            return self.schema
 
-        return "\n\n".join([table[0] for table in tables])
+        try:
+            return self.schema_index.schema_for(query) or self.schema
+        except Exception as e:
+            # E.g. the embedding service is down; a longer prompt still works
+            print(f"  ⚠️  Schema selection failed, using the full schema: {e}")
+            return self.schema
 
-    def generate_sql(self, query: str) -> str:
+    def generate_sql(self, query: str, timeout: Optional[float] = None) -> str:
         """Generate SQL query from natural language."""
 
         prompt = f"""You are a SQL expert. Convert the natural language question into a SQL query.
 
 Database Schema:
-{self.schema}
+{self.get_prompt_schema(query)}
 
 Question: {query}
 
 Generate ONLY the SQL query, no explanations. Use proper SQLite syntax.
 SQL Query:"""
 
-        response = ollama.generate(model=self.model, prompt=prompt)
+        response = llm.generate(model=self.model, prompt=prompt, timeout=timeout)
 
         # Extract SQL (handle cases where LLM adds explanations)
         sql = response['response'].strip()
@@ -52,28 +173,216 @@ SQL Query:"""
 
         return sql
 
-    def execute_sql(self, sql: str) -> List[Dict]:
-        """Execute SQL and return results."""
-        conn = sqlite3.connect(self.db_path)
-        conn.row_factory = sqlite3.Row
+    def _start_deadline(
+        self,
+        conn: sqlite3.Connection,
+        timeout: Optional[float],
+        cancel: Optional[threading.Event] = None
+    ) -> Optional[float]:
+        """Interrupt statements on conn once timeout (seconds) has elapsed or cancel is set."""
+        if timeout is None and cancel is None:
+            return None
+
+        deadline = time.monotonic() + timeout if timeout is not None else None
+
+        def should_interrupt() -> int:
+            # Returning non-zero from the handler aborts the running statement
+            if cancel is not None and cancel.is_set():
+                return 1
+            return int(deadline is not None and time.monotonic() > deadline)
+
+        conn.set_progress_handler(should_interrupt, 1000)
+        return deadline
+
+    def _execution_error(self, e: Exception, deadline: Optional[float], timeout: Optional[float]) -> Exception:
+        if deadline is not None and time.monotonic() > deadline:
+            return DeadlineExceeded(f"SQL execution exceeded its {timeout:.1f}s budget")
+        return Exception(f"SQL execution error: {str(e)}")
+
+    def execute_sql(
+        self,
+        sql: str,
+        timeout: Optional[float] = None,
+        cancel: Optional[threading.Event] = None
+    ) -> List[Dict]:
+        """Execute SQL and return results.
+
+        If timeout is given (seconds), the statement is interrupted and
+        DeadlineExceeded is raised once it expires. Setting cancel
+        interrupts it from another thread.
+        """
+        conn = self.pool.acquire()
         cursor = conn.cursor()
+        cursor.row_factory = sqlite3.Row
+        deadline = self._start_deadline(conn, timeout, cancel)
 
         try:
             cursor.execute(sql)
             rows = cursor.fetchall()
 
             # Convert to list of dicts
-            results = [dict(row) for row in rows]
+            return [dict(row) for row in rows]
+
+        except Exception as e:
+            raise self._execution_error(e, deadline, timeout)
+
+        finally:
+            cursor.close()
+            self.pool.release(conn)
+
+    def execute_sql_bounded(
+        self,
+        sql: str,
+        max_rows: Optional[int] = None,
+        count_total: Optional[bool] = None,
+        timeout: Optional[float] = None,
+        cancel: Optional[threading.Event] = None
+    ) -> SQLResultSet:
+        """Execute SQL fetching at most max_rows rows into a columnar result.
+
+        SELECT statements are wrapped with a LIMIT so SQLite stops producing
+        rows at the cap; rows are streamed with fetchmany. The total row count
+        and numeric column aggregates of a capped result are computed with a
+        separate query only when count_total is set.
+        """
+        max_rows = max_rows or self.max_rows or 1000
+        count_total = self.count_total_rows if count_total is None else count_total
+
+        conn = self.pool.acquire()
+        cursor = conn.cursor()
+        deadline = self._start_deadline(conn, timeout, cancel)
+        columns: List[str] = []
+        rows: List[tuple] = []
 
-            conn.close()
-            return results
+        try:
+            wrapped = is_select(sql)
+            try:
+                cursor.execute(wrap_with_limit(sql, max_rows + 1) if wrapped else sql)
+            except sqlite3.OperationalError:
+                timed_out = deadline is not None and time.monotonic() > deadline
+                if not wrapped or timed_out or (cancel is not None and cancel.is_set()):
+                    raise
+                # Statement cannot be used as a subquery; rely on fetchmany alone
+                wrapped = False
+                cursor.execute(sql)
+
+            columns = [column[0] for column in cursor.description or []]
+
+            while len(rows) <= max_rows:
+                batch = cursor.fetchmany(min(self.fetch_batch_size, max_rows + 1 - len(rows)))
+                if not batch:
+                    break
+                rows.extend(batch)
+
+            truncated = len(rows) > max_rows
+            result = SQLResultSet.from_rows(columns, rows[:max_rows], truncated=truncated)
+
+            if not truncated:
+                result.total_count = result.row_count
+            elif count_total and wrapped:
+                self._aggregate_full_result(conn, sql, result)
+
+            return result
+
+        except sqlite3.OperationalError as e:
+            cancelled = cancel is not None and cancel.is_set()
+            if not cancelled and deadline is not None and time.monotonic() > deadline:
+                # Interrupted: return what was fetched instead of failing
+                result = SQLResultSet.from_rows(columns, rows[:max_rows], truncated=True)
+                result.timed_out = True
+                return result
+            raise self._execution_error(e, deadline, timeout)
 
         except Exception as e:
-            conn.close()
-            raise Exception(f"SQL execution error: {str(e)}")
+            raise self._execution_error(e, deadline, timeout)
+
+        finally:
+            cursor.close()
+            self.pool.release(conn)
+
+    def _aggregate_full_result(self, conn: sqlite3.Connection, sql: str, result: SQLResultSet) -> None:
+        """Set the total row count and the numeric columns' aggregates of a capped result.
+
+        One pass over the full result computes both, so summaries do not
+        present sums and means of the fetched rows as those of the result.
+        """
+        numeric = [
+            name for name, values in zip(result.columns, result.data)
+            if result.columns.count(name) == 1
+            and any(value is not None for value in values)
+            and all(value is None or isinstance(value, (int, float)) for value in values)
+        ]
+
+        row = conn.execute(wrap_with_aggregates(sql, numeric)).fetchone()
+        result.total_count = row[0]
+        result.aggregates = {}
+        for i, name in enumerate(numeric):
+            values = dict(zip(AGGREGATES, row[1 + 5 * i:6 + 5 * i]))
+            # Rows past the cap may hold text, which SQLite orders after numbers
+            if all(value is None or isinstance(value, (int, float)) for value in values.values()):
+                result.aggregates[name] = values
+
+    def check_sql_cost(self, sql: str) -> PlanAnalysis:
+        """Analyze the query plan of sql with the cost guard."""
+        with self.pool.connection() as conn:
+            return self.cost_guard.analyze(conn, sql)
+
+    def guard_sql(self, sql: str) -> str:
+        """Apply the cost guard: reject pathological plans, cap unbounded scans.
+
+        Raises SQLRejected for plans that must not run; returns the SQL to
+        execute otherwise.
+        """
+        if self.cost_guard is None:
+            return sql
+
+        analysis = self.check_sql_cost(sql)
+
+        if analysis.verdict == "reject":
+            raise SQLRejected(analysis.reason)
+
+        if analysis.verdict == "rewrite":
+            print(f"  ⚠️  {analysis.reason}: capping rows")
+            # The bounded path already caps rows; the legacy path needs a LIMIT
+            if self.max_rows is None and is_select(sql):
+                return wrap_with_limit(sql, self.cost_guard.rewrite_limit)
+
+        return sql
+
+    def _cached(self, sql: str, variant: Optional[int], execute: Callable[[], Any]) -> Any:
+        """Return the cached result of sql or execute and cache it."""
+        if self.cache is None:
+            return execute()
 
-    def format_results(self, results: List[Dict]) -> str:
+        result = self.cache.get_result(sql, variant)
+        if result is not None:
+            print("  Result served from cache")
+            return result
+
+        result = execute()
+        # Partial results are not reusable
+        if not getattr(result, "timed_out", False):
+            self.cache.put_result(sql, result, variant)
+        return result
+
+    def get_cache_stats(self) -> Dict:
+        """Get SQL cache statistics."""
+        return self.cache.get_stats() if self.cache is not None else {}
+
+    def _statement_timeout(self, state: AgentState) -> Optional[float]:
+        """Tighter of the statement timeout and the node's deadline share."""
+        budgets = [t for t in (self.statement_timeout, node_timeout(state, "sql")) if t is not None]
+        return min(budgets) if budgets else None
+
+    def get_pool_stats(self) -> Dict:
+        """Get connection pool size and hit metrics."""
+        return self.pool.get_stats()
+
+    def format_results(self, results: Union[List[Dict], SQLResultSet]) -> str:
         """Format SQL results as readable text."""
+        if isinstance(results, SQLResultSet):
+            return self._format_result_set(results)
+
         if not results:
             return "No results found."
 
@@ -89,36 +398,218 @@ SQL Query:"""
 
         return "\n".join(output)
 
+    def _format_result_set(self, result: SQLResultSet) -> str:
+        if result.row_count == 0:
+            return "Query timed out before returning results." if result.timed_out else "No results found."
+
+        if self.summarize_threshold is not None and result.row_count > self.summarize_threshold:
+            return format_summary(result)
+
+        output = []
+        if result.timed_out:
+            output.append("Query timed out; showing partial results.")
+
+        if result.total_count is not None:
+            output.append(f"Found {result.total_count} results:\n")
+        else:
+            output.append(f"Found more than {result.row_count} results (showing a capped sample):\n")
+
+        for i, row in enumerate(result.rows(limit=10), 1):  # Limit to 10 rows
+            output.append(f"{i}. {row}")
+
+        remaining = (result.total_count or result.row_count) - min(result.row_count, 10)
+        if remaining > 0:
+            more = "" if result.total_count is not None else "at least "
+            output.append(f"\n... and {more}{remaining} more rows")
+
+        return "\n".join(output)
+
+    def _prepare_sql(self, state: AgentState) -> Tuple[str, str]:
+        """Generate (or reuse) SQL for the query and check its plan.
+
+        Returns (generated SQL, SQL to run).
+        """
+
+        self.refresh_schema()
+
+        # Generate SQL, reusing earlier SQL for the same question and schema
+        sql = self.cache.get_sql(state["query"]) if self.cache is not None else None
+        if sql is None:
+            sql = self.generate_sql(state["query"], timeout=node_timeout(state, "sql"))
+            print(f"  Generated SQL: {sql}")
+        else:
+            print(f"  Cached SQL: {sql}")
+
+        # Check the plan before running it
+        return sql, self.guard_sql(sql)
+
+    def _remember_sql(self, question: str, sql: Optional[str], results: Union[List[Dict], SQLResultSet, None]) -> None:
+        """Keep generated SQL for reuse only once it ran to completion.
+
+        SQL that was rejected, failed or timed out is dropped, so a retry
+        generates it afresh instead of repeating the failure.
+        """
+        if self.cache is None:
+            return
+        if sql is not None and results is not None and not getattr(results, "timed_out", False):
+            self.cache.put_sql(question, sql)
+        else:
+            self.cache.discard_sql(question)
+
+    def _run_sql(
+        self,
+        sql: str,
+        state: AgentState,
+        cancel: Optional[threading.Event] = None
+    ) -> Union[List[Dict], SQLResultSet]:
+        """Execute sql with the configured row cap, timeout and cache."""
+
+        timeout = self._statement_timeout(state)
+        if self.max_rows is not None:
+            return self._cached(
+                sql, self.max_rows,
+                lambda: self.execute_sql_bounded(sql, timeout=timeout, cancel=cancel)
+            )
+        return self._cached(
+            sql, None,
+            lambda: self.execute_sql(sql, timeout=timeout, cancel=cancel)
+        )
+
+    def _record_results(self, state: AgentState, sql: str, results: Union[List[Dict], SQLResultSet]) -> None:
+        metadata = {"sql": sql}
+        if isinstance(results, SQLResultSet):
+            metadata.update({
+                "row_count": results.row_count,
+                "truncated": results.truncated,
+                "total_count": results.total_count,
+                "timed_out": results.timed_out
+            })
+            if results.timed_out:
+                print(f"  ⚠️  Query timed out; returning {results.row_count} partial rows")
+                record_degraded(state, "sql")
+            else:
+                print(f"  Returned {results.row_count} rows{' (capped)' if results.truncated else ''}")
+        else:
+            metadata["row_count"] = len(results)
+            print(f"  Returned {len(results)} rows")
+
+        # Format
+        formatted = self.format_results(results)
+
+        response = AgentResponse(
+            answer=formatted,
+            sources=[{"type": "sql_query", "content": sql}],
+            confidence=0.85,
+            metadata=metadata
+        )
+
+        state["sql_result"] = response.model_dump()
+        state["agent_path"].append("sql")
+
+    def _record_error(self, state: AgentState, e: Exception) -> None:
+        if isinstance(e, SQLRejected):
+            error_msg = f"SQL Agent error: query rejected by cost guard: {str(e)}"
+        else:
+            error_msg = f"SQL Agent error: {str(e)}"
+
+        print(f"  ❌ {error_msg}")
+        state["errors"].append(error_msg)
+
+        if isinstance(e, DeadlineExceeded):
+            record_degraded(state, "sql")
+
     def query(self, state: AgentState) -> AgentState:
         """Execute SQL query pipeline."""
 
         print(f"\n🗄️  SQL Agent processing query...")
 
+        generated = results = None
         try:
-            # Generate SQL
-            sql = self.generate_sql(state["query"])
-            print(f"  Generated SQL: {sql}")
+            generated, sql = self._prepare_sql(state)
+            results = self._run_sql(sql, state)
+            self._record_results(state, sql, results)
 
-            # Execute
-            results = self.execute_sql(sql)
-            print(f"  Returned {len(results)} rows")
+        except Exception as e:
+            self._record_error(state, e)
+
+        self._remember_sql(state["query"], generated, results)
+
+        return state
+
+    def _get_executor(self) -> ThreadPoolExecutor:
+        with self._executor_lock:
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(
+                    max_workers=self.max_concurrent_queries,
+                    thread_name_prefix="sql"
+                )
+            return self._executor
+
+    def _db_semaphore(self) -> asyncio.Semaphore:
+        """Semaphore limiting concurrent statements on this database file in the running loop."""
+        loop = asyncio.get_running_loop()
+        key = str(Path(self.db_path).resolve())
+
+        with _DB_SEMAPHORES_LOCK:
+            semaphores = _DB_SEMAPHORES.setdefault(loop, {})
+            if key not in semaphores:
+                semaphores[key] = asyncio.Semaphore(self.max_concurrent_queries)
+            return semaphores[key]
+
+    async def _run_in_pool(self, fn: Callable[[threading.Event], Any]) -> Any:
+        """Run fn(cancel) on the SQL thread pool under the per-database limit.
+
+        If the awaiting task is cancelled, cancel is set so the statement is
+        interrupted at its next progress-handler check instead of running on.
+        """
+        cancel = threading.Event()
+
+        async with self._db_semaphore():
+            future = asyncio.get_running_loop().run_in_executor(self._get_executor(), fn, cancel)
+            try:
+                return await future
+            except asyncio.CancelledError:
+                cancel.set()
+                raise
+
+    async def aexecute_sql(self, sql: str, timeout: Optional[float] = None) -> List[Dict]:
+        """Async execute_sql: runs off the event loop and is cancellable."""
+        return await self._run_in_pool(
+            lambda cancel: self.execute_sql(sql, timeout=timeout, cancel=cancel)
+        )
+
+    async def aexecute_sql_bounded(
+        self,
+        sql: str,
+        max_rows: Optional[int] = None,
+        count_total: Optional[bool] = None,
+        timeout: Optional[float] = None
+    ) -> SQLResultSet:
+        """Async execute_sql_bounded: runs off the event loop and is cancellable."""
+        return await self._run_in_pool(
+            lambda cancel: self.execute_sql_bounded(
+                sql, max_rows=max_rows, count_total=count_total, timeout=timeout, cancel=cancel
+            )
+        )
 
-            # Format
-            formatted = self.format_results(results)
+    async def aquery(self, state: AgentState) -> AgentState:
+        """Async SQL query pipeline.
 
-            response = AgentResponse(
-                answer=formatted,
-                sources=[{"type": "sql_query", "content": sql}],
-                confidence=0.85,
-                metadata={"sql": sql, "row_count": len(results)}
-            )
+        SQL generation runs in a worker thread and execution on the SQL
+        thread pool, so the event loop is never blocked.
+        """
+
+        print(f"\n🗄️  SQL Agent processing query...")
 
-            state["sql_result"] = response.model_dump()
-            state["agent_path"].append("sql")
+        generated = results = None
+        try:
+            generated, sql = await asyncio.to_thread(self._prepare_sql, state)
+            results = await self._run_in_pool(lambda cancel: self._run_sql(sql, state, cancel))
+            self._record_results(state, sql, results)
 
         except Exception as e:
-            error_msg = f"SQL Agent error: {str(e)}"
-            print(f"  ❌ {error_msg}")
-            state["errors"].append(error_msg)
+            self._record_error(state, e)
+
+        self._remember_sql(state["query"], generated, results)
 
-        return state
\ No newline at end of file
+        return state
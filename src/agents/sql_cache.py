@@ -0,0 +1,155 @@
+import re
+import sqlite3
+import threading
+from collections import OrderedDict
+from pathlib import Path
+from typing import Any, Dict, Hashable, Optional, Tuple
+from src.agents.sql_results import strip_sql
+
+_WHITESPACE = re.compile(r"\s+")
+
+
+def normalize_sql(sql: str) -> str:
+    """Collapse whitespace and drop trailing semicolons/comments."""
+    return _WHITESPACE.sub(" ", strip_sql(sql))
+
+
+def normalize_question(question: str) -> str:
+    """Case- and whitespace-insensitive form of a question."""
+    return _WHITESPACE.sub(" ", question.strip()).casefold()
+
+
+class _LRU:
+    """Small thread-unsafe LRU map; callers hold the cache lock."""
+
+    def __init__(self, max_size: int):
+        self.max_size = max_size
+        self._items: "OrderedDict[Hashable, Any]" = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key: Hashable) -> Optional[Any]:
+        if key in self._items:
+            self._items.move_to_end(key)
+            self.hits += 1
+            return self._items[key]
+        self.misses += 1
+        return None
+
+    def put(self, key: Hashable, value: Any) -> None:
+        self._items[key] = value
+        self._items.move_to_end(key)
+        if len(self._items) > self.max_size:
+            self._items.popitem(last=False)
+
+    def pop(self, key: Hashable) -> None:
+        self._items.pop(key, None)
+
+    def clear(self) -> None:
+        self._items.clear()
+
+    def stats(self) -> Dict:
+        lookups = self.hits + self.misses
+        return {
+            'size': len(self._items),
+            'hits': self.hits,
+            'misses': self.misses,
+            'hit_rate': self.hits / lookups if lookups else 0.0
+        }
+
+
+class SQLCache:
+    """Result and generated-SQL caches invalidated by database changes.
+
+    PRAGMA data_version changes when another connection commits, but only
+    as seen from one fixed connection, so a dedicated probe connection is
+    kept open for the cache's lifetime. Results are keyed on (normalized
+    SQL, data_version, schema_version); generated SQL on (question,
+    schema_version).
+    """
+
+    def __init__(self, db_path: str, max_results: int = 256, max_generated: int = 1024):
+        self.db_path = db_path
+
+        uri = f"{Path(db_path).resolve().as_uri()}?mode=ro"
+        self._probe = sqlite3.connect(uri, uri=True, check_same_thread=False)
+        self._lock = threading.Lock()
+
+        self._results = _LRU(max_results)
+        self._generated = _LRU(max_generated)
+        self._versions = self._read_versions()
+
+        # Invalidation statistics
+        self.data_invalidations = 0
+        self.schema_invalidations = 0
+
+    def _read_versions(self) -> Tuple[int, int]:
+        data_version = self._probe.execute("PRAGMA data_version").fetchone()[0]
+        schema_version = self._probe.execute("PRAGMA schema_version").fetchone()[0]
+        return data_version, schema_version
+
+    def refresh(self) -> bool:
+        """Re-read database versions, dropping stale entries.
+
+        Returns True if the schema changed since the last refresh.
+        """
+        with self._lock:
+            versions = self._read_versions()
+            if versions == self._versions:
+                return False
+
+            data_changed = versions[0] != self._versions[0]
+            schema_changed = versions[1] != self._versions[1]
+            self._versions = versions
+
+            if data_changed or schema_changed:
+                self._results.clear()
+                self.data_invalidations += 1
+            if schema_changed:
+                self._generated.clear()
+                self.schema_invalidations += 1
+
+            return schema_changed
+
+    def _result_key(self, sql: str, variant: Hashable) -> Tuple:
+        return (normalize_sql(sql), variant) + self._versions
+
+    def get_result(self, sql: str, variant: Hashable = None) -> Optional[Any]:
+        """Cached result of sql, or None.
+
+        variant distinguishes executions of the same SQL with different
+        options (e.g. row caps). Cached results are shared: do not mutate.
+        """
+        with self._lock:
+            return self._results.get(self._result_key(sql, variant))
+
+    def put_result(self, sql: str, result: Any, variant: Hashable = None) -> None:
+        with self._lock:
+            self._results.put(self._result_key(sql, variant), result)
+
+    def get_sql(self, question: str) -> Optional[str]:
+        """Previously generated SQL for question under the current schema."""
+        with self._lock:
+            return self._generated.get((normalize_question(question), self._versions[1]))
+
+    def put_sql(self, question: str, sql: str) -> None:
+        with self._lock:
+            self._generated.put((normalize_question(question), self._versions[1]), sql)
+
+    def discard_sql(self, question: str) -> None:
+        """Forget the SQL for question, e.g. after it was rejected or failed."""
+        with self._lock:
+            self._generated.pop((normalize_question(question), self._versions[1]))
+
+    def get_stats(self) -> Dict:
+        """Get hit rates and invalidation counts."""
+        with self._lock:
+            return {
+                'results': self._results.stats(),
+                'generated_sql': self._generated.stats(),
+                'data_invalidations': self.data_invalidations,
+                'schema_invalidations': self.schema_invalidations
+            }
+
+    def close(self) -> None:
+        self._probe.close()
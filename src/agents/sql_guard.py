@@ -0,0 +1,190 @@
+import re
+import sqlite3
+import time
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional
+
+_NOT_ALIASES = (
+    "WHERE", "ON", "USING", "JOIN", "LEFT", "RIGHT", "FULL", "INNER", "OUTER", "CROSS",
+    "NATURAL", "GROUP", "ORDER", "LIMIT", "HAVING", "UNION", "EXCEPT", "INTERSECT",
+    "WINDOW", "FROM", "SELECT", "AND", "OR", "AS"
+)
+_ALIAS = rf"(?:\s+(?:AS\s+)?(?!(?:{'|'.join(_NOT_ALIASES)})\b)(\w+))?"
+_TABLE_REF = re.compile(
+    rf"""\b(?:FROM|JOIN)\s+["`\[]?(\w+)["`\]]?{_ALIAS}|,\s*["`\[]?(\w+)["`\]]?{_ALIAS}""",
+    re.IGNORECASE
+)
+_SCAN = re.compile(r"^SCAN (?:TABLE )?(\w+)(?: AS (\w+))?", re.IGNORECASE)
+_LIMIT = re.compile(r"\bLIMIT\s+\d+", re.IGNORECASE)
+_GROUP_BY = re.compile(r"\bGROUP\s+BY\b", re.IGNORECASE)
+_AGGREGATE_CALL = re.compile(r"\b(?:COUNT|SUM|AVG|MIN|MAX|TOTAL|GROUP_CONCAT)\s*\(\)", re.IGNORECASE)
+_COMPOUND = re.compile(r"\b(?:UNION|EXCEPT|INTERSECT|OVER)\b", re.IGNORECASE)
+
+
+class SQLRejected(Exception):
+    """Raised when a statement's query plan is too expensive to run."""
+
+
+@dataclass
+class PlanAnalysis:
+    """Result of inspecting a statement with EXPLAIN QUERY PLAN."""
+
+    verdict: str = "ok"  # "ok", "rewrite" (add a row cap) or "reject"
+    reason: str = ""
+    plan: List[str] = field(default_factory=list)
+    full_scans: Dict[str, Optional[int]] = field(default_factory=dict)  # table -> estimated rows
+    join_cost: int = 0  # Estimated row combinations of unindexed nested-loop joins
+    has_limit: bool = False
+    aggregated: bool = False  # Outer SELECT groups or aggregates, so returns few rows
+
+
+def _outer_text(sql: str) -> str:
+    """sql with everything inside parentheses removed: "f(x)" -> "f()"."""
+
+    depth = 0
+    outer = []
+    for char in sql:
+        if char == "(":
+            if depth == 0:
+                outer.append("()")
+            depth += 1
+        elif char == ")":
+            depth = max(depth - 1, 0)
+        elif depth == 0:
+            outer.append(char)
+    return "".join(outer)
+
+
+def is_aggregate(sql: str) -> bool:
+    """True if the outer SELECT has a GROUP BY or aggregate columns.
+
+    Subqueries and function arguments are ignored, so only the outer
+    statement counts. Compound selects and window functions return a row
+    per input row and do not count.
+    """
+
+    outer = _outer_text(sql)
+    if _COMPOUND.search(outer):
+        return False
+    return bool(_GROUP_BY.search(outer) or _AGGREGATE_CALL.search(outer))
+
+
+class QueryCostGuard:
+    """Reject or cap pathological LLM-generated SQL before it runs.
+
+    Full scans of large tables without a LIMIT are rewritten with a row
+    cap, unless the query aggregates them into a few rows; nested-loop
+    joins of unindexed tables whose row product exceeds max_join_rows
+    (accidental cross joins) are rejected.
+    """
+
+    def __init__(
+        self,
+        large_table_rows: int = 100_000,
+        max_join_rows: int = 10_000_000,
+        rewrite_limit: int = 1000,
+        size_cache_seconds: float = 60.0
+    ):
+        self.large_table_rows = large_table_rows
+        self.max_join_rows = max_join_rows
+        self.rewrite_limit = rewrite_limit
+        self.size_cache_seconds = size_cache_seconds
+
+        self._sizes: Dict[str, Optional[int]] = {}
+        self._sizes_at = 0.0
+
+    def table_sizes(self, conn: sqlite3.Connection) -> Dict[str, Optional[int]]:
+        """Estimated row count per table (cached for size_cache_seconds)."""
+
+        if self._sizes and time.monotonic() - self._sizes_at < self.size_cache_seconds:
+            return self._sizes
+
+        tables = [
+            row[0] for row in
+            conn.execute("SELECT name FROM sqlite_master WHERE type='table' AND name NOT LIKE 'sqlite_%'")
+        ]
+
+        sizes = {}
+        for table in tables:
+            try:
+                # Max rowid is an O(log n) upper bound on the row count
+                sizes[table] = conn.execute(f'SELECT MAX(_rowid_) FROM "{table}"').fetchone()[0] or 0
+            except sqlite3.Error:
+                sizes[table] = None  # WITHOUT ROWID table: size unknown
+
+        self._sizes = sizes
+        self._sizes_at = time.monotonic()
+        return sizes
+
+    def _aliases(self, sql: str, tables: Dict[str, Optional[int]]) -> Dict[str, str]:
+        known = {name.lower(): name for name in tables}
+        aliases = {}
+
+        for match in _TABLE_REF.finditer(sql):
+            name = match.group(1) or match.group(3)
+            alias = match.group(2) or match.group(4)
+            table = known.get(name.lower())
+            if table is None:
+                continue
+            aliases[name.lower()] = table
+            if alias:
+                aliases[alias.lower()] = table
+
+        return aliases
+
+    def analyze(self, conn: sqlite3.Connection, sql: str) -> PlanAnalysis:
+        """Inspect the query plan of sql and decide whether it may run."""
+
+        analysis = PlanAnalysis(has_limit=bool(_LIMIT.search(sql)), aggregated=is_aggregate(sql))
+
+        try:
+            plan_rows = conn.execute(f"EXPLAIN QUERY PLAN {sql}").fetchall()
+        except sqlite3.Error as e:
+            # Let execution report the real error
+            analysis.reason = f"Plan unavailable: {str(e)}"
+            return analysis
+
+        sizes = self.table_sizes(conn)
+        aliases = self._aliases(sql, sizes)
+
+        # Full scans grouped by parent: consecutive scans at one level are nested loops
+        scans_by_parent: Dict[int, List[Optional[int]]] = {}
+        for _, parent, _, detail in plan_rows:
+            analysis.plan.append(detail)
+            if parent == 0 and detail.upper().startswith("USE TEMP B-TREE FOR GROUP BY"):
+                analysis.aggregated = True
+            match = _SCAN.match(detail)
+            if not match:
+                continue
+
+            table = aliases.get(match.group(1).lower())
+            if table is None:
+                continue  # Subquery, CTE or constant row
+
+            rows = sizes.get(table)
+            analysis.full_scans[table] = rows
+            scans_by_parent.setdefault(parent, []).append(rows)
+
+        for scans in scans_by_parent.values():
+            if len(scans) > 1 and all(rows is not None for rows in scans):
+                cost = 1
+                for rows in scans:
+                    cost *= max(rows, 1)
+                analysis.join_cost = max(analysis.join_cost, cost)
+
+        large_scans = [
+            table for table, rows in analysis.full_scans.items()
+            if rows is not None and rows >= self.large_table_rows
+        ]
+
+        if analysis.join_cost > self.max_join_rows:
+            analysis.verdict = "reject"
+            analysis.reason = (
+                f"Unindexed join of {', '.join(analysis.full_scans)} would examine "
+                f"~{analysis.join_cost:,} row combinations"
+            )
+        elif large_scans and not analysis.has_limit and not analysis.aggregated:
+            analysis.verdict = "rewrite"
+            analysis.reason = f"Full scan of large table(s) {', '.join(large_scans)} without LIMIT"
+
+        return analysis
@@ -0,0 +1,87 @@
+import re
+from dataclasses import dataclass, field
+from typing import Any, Dict, Iterator, List, Optional
+
+_LEADING_COMMENTS = re.compile(r"^\s*((--[^\n]*\n)|(/\*.*?\*/)|\s)*", re.DOTALL)
+
+# Keys of SQLResultSet.aggregates, in the order wrap_with_aggregates selects them
+AGGREGATES = ("count", "min", "max", "mean", "total")
+
+
+@dataclass
+class SQLResultSet:
+    """Compact columnar result of a bounded SQL query."""
+
+    columns: List[str]
+    data: List[List[Any]] = field(default_factory=list)  # One list of values per column
+    row_count: int = 0  # Rows returned (never more than the row cap)
+    truncated: bool = False  # More rows exist than were fetched
+    total_count: Optional[int] = None  # Full result size, only when requested
+    timed_out: bool = False  # Statement was interrupted; rows are a partial result
+    # Full-result count/min/max/mean/sum of numeric columns, only when counted
+    aggregates: Optional[Dict[str, Dict[str, Any]]] = None
+
+    @classmethod
+    def from_rows(cls, columns: List[str], rows: List[tuple], truncated: bool = False) -> "SQLResultSet":
+        data = [list(values) for values in zip(*rows)] if rows else [[] for _ in columns]
+        return cls(columns=columns, data=data, row_count=len(rows), truncated=truncated)
+
+    def rows(self, limit: Optional[int] = None) -> Iterator[Dict]:
+        """Iterate rows as dicts (built lazily)."""
+        count = self.row_count if limit is None else min(limit, self.row_count)
+        for i in range(count):
+            yield {column: values[i] for column, values in zip(self.columns, self.data)}
+
+    def to_dict(self) -> Dict:
+        return {
+            'columns': self.columns,
+            'data': self.data,
+            'row_count': self.row_count,
+            'truncated': self.truncated,
+            'total_count': self.total_count,
+            'timed_out': self.timed_out,
+            'aggregates': self.aggregates
+        }
+
+
+def strip_sql(sql: str) -> str:
+    """Remove surrounding whitespace, trailing semicolons and trailing line comments."""
+    sql = sql.strip()
+    while True:
+        if sql.endswith(";"):
+            sql = sql[:-1].rstrip()
+            continue
+
+        head, _, last_line = sql.rpartition("\n")
+        comment_at = last_line.find("--")
+        # Only a comment if the "--" is outside a string literal
+        if comment_at >= 0 and last_line[:comment_at].count("'") % 2 == 0:
+            sql = (head + "\n" + last_line[:comment_at]).strip() if head else last_line[:comment_at].strip()
+            continue
+
+        return sql
+
+
+def is_select(sql: str) -> bool:
+    """True for statements that return rows and can be wrapped in a subquery."""
+    body = _LEADING_COMMENTS.sub("", sql, count=1)
+    keyword = body.split(None, 1)[0].upper() if body.split() else ""
+    return keyword in ("SELECT", "WITH", "VALUES")
+
+
+def wrap_with_limit(sql: str, limit: int) -> str:
+    """Cap the rows a SELECT can produce without changing its result order."""
+    # Newline keeps a trailing line comment from swallowing the parenthesis
+    return f"SELECT * FROM ({strip_sql(sql)}\n) LIMIT {int(limit)}"
+
+
+def wrap_with_aggregates(sql: str, columns: List[str]) -> str:
+    """Count the rows a SELECT would produce and aggregate the given columns.
+
+    Selects COUNT(*), then COUNT, MIN, MAX, AVG and SUM of each column.
+    """
+    selected = ["COUNT(*)"]
+    for column in columns:
+        quoted = '"' + column.replace('"', '""') + '"'
+        selected.extend(f"{function}({quoted})" for function in ("COUNT", "MIN", "MAX", "AVG", "SUM"))
+    return f"SELECT {', '.join(selected)} FROM ({strip_sql(sql)}\n)"
@@ -0,0 +1,112 @@
+from dataclasses import dataclass, field
+from typing import Any, List, Optional, Tuple
+import numpy as np
+from src.agents.sql_results import SQLResultSet
+
+
+@dataclass
+class ColumnSummary:
+    """Vectorized summary of one result column."""
+
+    name: str
+    count: int = 0  # Non-null values
+    nulls: int = 0
+    numeric: bool = False
+    min: Optional[float] = None
+    max: Optional[float] = None
+    mean: Optional[float] = None
+    total: Optional[float] = None
+    distinct: Optional[int] = None
+    top_values: List[Tuple[Any, int]] = field(default_factory=list)  # (value, count), most frequent first
+
+
+def summarize_column(name: str, values: List[Any], top_k: int = 5) -> ColumnSummary:
+    """Summarize a column: min/max/mean/sum for numbers, top-k values otherwise."""
+
+    present = [value for value in values if value is not None]
+    summary = ColumnSummary(name=name, count=len(present), nulls=len(values) - len(present))
+    if not present:
+        return summary
+
+    if all(isinstance(value, (int, float)) for value in present):
+        array = np.asarray(present, dtype=np.float64)
+        summary.numeric = True
+        summary.min = float(array.min())
+        summary.max = float(array.max())
+        summary.mean = float(array.mean())
+        summary.total = float(array.sum())
+        return summary
+
+    # Group by string form; mixed-type columns (e.g. text with bytes) stay comparable
+    labels, counts = np.unique(np.asarray([str(value) for value in present], dtype=object), return_counts=True)
+    order = np.argsort(-counts, kind="stable")[:top_k]
+    summary.distinct = len(labels)
+    summary.top_values = [(labels[i], int(counts[i])) for i in order]
+    return summary
+
+
+def summarize_result(result: SQLResultSet, top_k: int = 5) -> List[ColumnSummary]:
+    """Summarize every column of a columnar result set.
+
+    Numeric columns with full-result aggregates (see SQLResultSet.aggregates)
+    take those instead of the fetched rows' statistics.
+    """
+
+    summaries = []
+    for name, values in zip(result.columns, result.data):
+        summary = summarize_column(name, values, top_k=top_k)
+        aggregates = (result.aggregates or {}).get(name)
+        if summary.numeric and aggregates is not None and result.total_count is not None:
+            summary.count = aggregates["count"]
+            summary.nulls = result.total_count - aggregates["count"]
+            summary.min, summary.max = aggregates["min"], aggregates["max"]
+            summary.mean, summary.total = aggregates["mean"], aggregates["total"]
+        summaries.append(summary)
+    return summaries
+
+
+def _number(value: float) -> str:
+    return f"{int(value):,}" if float(value).is_integer() else f"{value:,.2f}"
+
+
+def format_summary(result: SQLResultSet, top_k: int = 5, sample_rows: int = 3) -> str:
+    """Compact text summary of a result set for the answer."""
+
+    output = []
+    if result.timed_out:
+        output.append("Query timed out; summary covers partial results.")
+
+    if result.total_count is not None and not result.truncated:
+        output.append(f"Found {result.total_count} results. Column summary:")
+    elif result.aggregates:
+        output.append(
+            f"Found {result.total_count} results. Numeric columns summarize all of them, "
+            f"other columns the first {result.row_count}:"
+        )
+    elif result.total_count is not None:
+        output.append(f"Found {result.total_count} results. Column summary of the first {result.row_count}:")
+    else:
+        output.append(f"Found more than {result.row_count} results. Column summary of the first {result.row_count}:")
+
+    for column in summarize_result(result, top_k=top_k):
+        nulls = f", {column.nulls} null" if column.nulls else ""
+        if column.count == 0:
+            output.append(f"- {column.name}: all null")
+        elif column.numeric and result.truncated and column.name not in (result.aggregates or {}):
+            # A sum or mean of the first rows reads like one of the whole result
+            output.append(f"- {column.name}: min {_number(column.min)}, max {_number(column.max)}{nulls}")
+        elif column.numeric:
+            output.append(
+                f"- {column.name}: min {_number(column.min)}, max {_number(column.max)}, "
+                f"mean {_number(column.mean)}, sum {_number(column.total)}{nulls}"
+            )
+        else:
+            top = ", ".join(f"{value} ({count})" for value, count in column.top_values)
+            output.append(f"- {column.name}: {column.distinct} distinct{nulls}; top: {top}")
+
+    if sample_rows:
+        output.append("\nSample rows:")
+        for i, row in enumerate(result.rows(limit=sample_rows), 1):
+            output.append(f"{i}. {row}")
+
+    return "\n".join(output)
@@ -1,6 +1,7 @@
-import ollama
+from src import llm
 from typing import Dict, Optional
 from src.agent_state import AgentState
+from src.deadline import DeadlineExceeded, node_timeout, record_degraded
 
 class SynthesisAgent:
     """Combines outputs from multiple agents into coherent response."""
@@ -60,12 +61,25 @@ Create a comprehensive answer that:
 
 Final Answer:"""
 
-        response = ollama.generate(model=self.model, prompt=prompt)
+        try:
+            response = llm.generate(
+                model=self.model,
+                prompt=prompt,
+                timeout=node_timeout(state, "synthesis")
+            )
+            state["final_answer"] = response['response']
+            print(f"  ✓ Synthesized answer from {len(results)} sources")
+
+        except DeadlineExceeded as e:
+            # Out of budget: return the specialist answers without merging them
+            state["errors"].append(f"Synthesis Agent error: {str(e)}")
+            record_degraded(state, "synthesis")
+            state["final_answer"] = combined_results or (
+                "Sorry, I could not answer this query within its time budget."
+            )
+            print(f"  ⚠️  Synthesis skipped: {str(e)}")
 
-        state["final_answer"] = response['response']
         state["sources"] = sources
         state["agent_path"].append("synthesis")
 
-        print(f"  ✓ Synthesized answer from {len(results)} sources")
-
         return state
\ No newline at end of file
@@ -0,0 +1,434 @@
+"""Local stand-in for the Ollama HTTP API used for benchmarking and tests."""
+
+import hashlib
+import json
+import math
+import random
+import re
+import threading
+import time
+from dataclasses import dataclass, field
+from datetime import datetime, timezone
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, List, Optional
+
+
+@dataclass
+class LatencyModel:
+    """Latency distribution in seconds.
+
+    distribution: "fixed", "uniform", "normal", "lognormal" or "exponential".
+    For "uniform" the range is [mean - spread, mean + spread]; for "normal"
+    and "lognormal" spread is the standard deviation (in log space for
+    lognormal).
+    """
+
+    distribution: str = "fixed"
+    mean: float = 0.0
+    spread: float = 0.0
+
+    def sample(self, rng: random.Random) -> float:
+        if self.distribution == "fixed":
+            value = self.mean
+        elif self.distribution == "uniform":
+            value = rng.uniform(self.mean - self.spread, self.mean + self.spread)
+        elif self.distribution == "normal":
+            value = rng.gauss(self.mean, self.spread)
+        elif self.distribution == "lognormal":
+            if self.mean <= 0:
+                return 0.0
+            value = rng.lognormvariate(math.log(self.mean), self.spread)
+        elif self.distribution == "exponential":
+            value = rng.expovariate(1.0 / self.mean) if self.mean > 0 else 0.0
+        else:
+            raise ValueError(f"Unknown latency distribution: {self.distribution}")
+
+        return max(0.0, value)
+
+
+@dataclass
+class FakeOllamaConfig:
+    """Configuration for the fake Ollama server."""
+
+    host: str = "127.0.0.1"
+    port: int = 11435  # 0 picks a free port
+
+    # Generation timing
+    load_latency: LatencyModel = field(default_factory=LatencyModel)
+    prompt_tokens_per_second: float = 2000.0
+    tokens_per_second: float = 40.0  # 0 disables token timing
+    response_tokens: int = 64
+
+    # Embedding timing
+    embedding_latency: LatencyModel = field(default_factory=LatencyModel)
+    embedding_dim: int = 4096  # llama3.1 embedding size
+
+    # Requests processed concurrently by the "model"; Ollama serializes by default
+    max_parallel: int = 1
+
+    # Seed mixed into every request for deterministic outputs and latencies
+    seed: int = 0
+
+
+_VOCABULARY = (
+    "the system data model query agent result value function document "
+    "analysis retrieval context answer user table code research process "
+    "information response performance latency request index source"
+).split()
+
+_SQL_HINTS = {
+    'show', 'list', 'count', 'total', 'sum', 'average', 'revenue', 'users',
+    'purchases', 'premium', 'table', 'database', 'rows', 'calculate', 'how many'
+}
+_CODE_HINTS = {
+    'function', 'code', 'class', 'method', 'debug', 'bug', 'implement',
+    'validation', 'validate', 'divide', 'variable', 'module', 'import', '.py'
+}
+_RESEARCH_HINTS = {'what', 'explain', 'define', 'describe', 'why', 'concept', 'features'}
+
+
+def _tokenize(text: str) -> List[str]:
+    return re.findall(r"[a-z0-9_]+", text.lower())
+
+
+def _count_tokens(text: str) -> int:
+    # Roughly 4 characters per token for llama-family tokenizers
+    return max(1, len(text) // 4)
+
+
+class FakeOllamaBackend:
+    """Deterministic responses and simulated timing for Ollama endpoints."""
+
+    def __init__(self, config: FakeOllamaConfig):
+        self.config = config
+        self._model_slots = threading.BoundedSemaphore(max(1, config.max_parallel))
+        self._stats_lock = threading.Lock()
+        self.request_counts: Dict[str, int] = {}
+
+    def _rng(self, *parts: str) -> random.Random:
+        digest = hashlib.sha256(
+            "\x00".join((str(self.config.seed),) + parts).encode("utf-8")
+        ).digest()
+        return random.Random(int.from_bytes(digest[:8], "big"))
+
+    def record_request(self, endpoint: str) -> None:
+        with self._stats_lock:
+            self.request_counts[endpoint] = self.request_counts.get(endpoint, 0) + 1
+
+    def get_stats(self) -> Dict:
+        with self._stats_lock:
+            return {'request_counts': dict(self.request_counts)}
+
+    # Content generation
+
+    def _classify_intents(self, query: str) -> List[str]:
+        """Specialist types whose keywords appear in the query, best first."""
+
+        query_lower = query.lower()
+        words = set(_tokenize(query_lower))
+
+        scores = {
+            'sql': sum(1 for hint in _SQL_HINTS if hint in words or (' ' in hint and hint in query_lower)),
+            'code': sum(1 for hint in _CODE_HINTS if hint in words or ('.' in hint and hint in query_lower)),
+            'research': sum(1 for hint in _RESEARCH_HINTS if hint in words),
+        }
+        return [t for t in sorted(scores, key=scores.get, reverse=True) if scores[t] > 0]
+
+    def _classify(self, query: str) -> str:
+        intents = self._classify_intents(query)
+        return intents[0] if intents else 'general'
+
+    def _fill_json_template(self, prompt: str, rng: random.Random) -> Dict:
+        """Fill the JSON template embedded in a prompt with plausible values."""
+
+        # The schema is the last JSON object in the prompt
+        template = prompt[prompt.rfind("{"):]
+        user_query = re.search(r"(?:User Query|Question):\s*(.+)", prompt)
+        query_text = user_query.group(1) if user_query else prompt
+
+        result = {}
+        for key, hint in re.findall(r'"(\w+)"\s*:\s*([^\n]+?),?\s*$', template, re.MULTILINE):
+            hint = hint.strip().rstrip(',').strip()
+
+            if key == 'query_type' and '|' in hint:
+                result[key] = self._classify(query_text)
+            elif key == 'intents':
+                result[key] = self._classify_intents(query_text)
+            elif hint.startswith('"') and '|' in hint:
+                result[key] = rng.choice(hint.strip('"').split('|'))
+            elif hint.startswith('['):
+                result[key] = []
+            elif 'true' in hint and 'false' in hint:
+                result[key] = True
+            elif re.match(r'^0(\.0)?-1(\.0)?$', hint):
+                result[key] = round(rng.uniform(0.75, 0.95), 2)
+            elif re.match(r'^\d+(\.\d+)?-\d+(\.\d+)?$', hint):
+                low, high = (float(x) for x in hint.split('-'))
+                result[key] = round(rng.uniform(low + (high - low) * 0.6, high), 1)
+            else:
+                result[key] = "Deterministic response from fake Ollama server"
+
+        return result
+
+    def _generate_sql(self, prompt: str) -> str:
+        tables = re.findall(r"CREATE TABLE(?: IF NOT EXISTS)?\s+[\"`]?(\w+)", prompt, re.IGNORECASE)
+        question = re.search(r"Question:\s*(.+)", prompt)
+        question_words = set(_tokenize(question.group(1))) if question else set()
+
+        table = next(
+            (t for t in tables if t.lower() in question_words or t.lower().rstrip('s') in question_words),
+            tables[0] if tables else "sqlite_master"
+        )
+        return f"SELECT * FROM {table} LIMIT 10"
+
+    def _generate_text(self, prompt: str, rng: random.Random, num_tokens: int) -> str:
+        words = [rng.choice(_VOCABULARY) for _ in range(num_tokens)]
+        if words:
+            words[0] = words[0].capitalize()
+        return " ".join(words) + "."
+
+    def generate_content(self, model: str, prompt: str, fmt: Optional[str], options: Dict) -> str:
+        rng = self._rng("generate", model, prompt, str(fmt))
+        num_tokens = int(options.get('num_predict') or self.config.response_tokens)
+
+        if fmt == "json":
+            return json.dumps(self._fill_json_template(prompt, rng))
+
+        if "Database Schema:" in prompt and "SQL Query:" in prompt:
+            return self._generate_sql(prompt)
+
+        return self._generate_text(prompt, rng, num_tokens)
+
+    def embed(self, model: str, text: str) -> List[float]:
+        """Hashed bag-of-words embedding: similar texts get similar vectors."""
+
+        dim = self.config.embedding_dim
+        vector = [0.0] * dim
+        tokens = _tokenize(text)
+
+        for feature in tokens + [f"{a} {b}" for a, b in zip(tokens, tokens[1:])]:
+            digest = hashlib.md5(f"{model}\x00{feature}".encode("utf-8")).digest()
+            index = int.from_bytes(digest[:4], "big") % dim
+            vector[index] += 1.0 if digest[4] & 1 else -1.0
+
+        norm = math.sqrt(sum(v * v for v in vector)) or 1.0
+        return [v / norm for v in vector]
+
+    # Timing
+
+    def acquire_model(self) -> None:
+        self._model_slots.acquire()
+
+    def release_model(self) -> None:
+        self._model_slots.release()
+
+    def load_delay(self, model: str, prompt: str) -> float:
+        rng = self._rng("latency", model, prompt)
+        delay = self.config.load_latency.sample(rng)
+        if self.config.prompt_tokens_per_second > 0:
+            delay += _count_tokens(prompt) / self.config.prompt_tokens_per_second
+        return delay
+
+    def token_delay(self) -> float:
+        rate = self.config.tokens_per_second
+        return 1.0 / rate if rate > 0 else 0.0
+
+    def embedding_delay(self, model: str, text: str) -> float:
+        return self.config.embedding_latency.sample(self._rng("embedding-latency", model, text))
+
+
+class _FakeOllamaHandler(BaseHTTPRequestHandler):
+    """HTTP handler implementing the subset of the Ollama API used by the project."""
+
+    backend: FakeOllamaBackend = None
+    protocol_version = "HTTP/1.1"
+
+    def log_message(self, format, *args):
+        pass  # Keep benchmark output clean
+
+    def _read_json(self) -> Dict:
+        length = int(self.headers.get('Content-Length') or 0)
+        body = self.rfile.read(length) if length else b"{}"
+        return json.loads(body or b"{}")
+
+    def _send_json(self, payload: Dict, status: int = 200) -> None:
+        data = json.dumps(payload).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def do_HEAD(self):
+        self.send_response(200)
+        self.send_header("Content-Length", "0")
+        self.end_headers()
+
+    def do_GET(self):
+        if self.path == "/":
+            data = b"Ollama is running"
+            self.send_response(200)
+            self.send_header("Content-Type", "text/plain")
+            self.send_header("Content-Length", str(len(data)))
+            self.end_headers()
+            self.wfile.write(data)
+        elif self.path == "/api/version":
+            self._send_json({"version": "0.0.0-fake"})
+        elif self.path == "/api/tags":
+            self._send_json({"models": []})
+        elif self.path == "/api/fake/stats":
+            self._send_json(self.backend.get_stats())
+        else:
+            self._send_json({"error": f"not found: {self.path}"}, status=404)
+
+    def do_POST(self):
+        try:
+            request = self._read_json()
+        except json.JSONDecodeError as e:
+            self._send_json({"error": f"invalid JSON: {e}"}, status=400)
+            return
+
+        if self.path == "/api/generate":
+            self._handle_generate(request)
+        elif self.path == "/api/embeddings":
+            self._handle_embeddings(request)
+        elif self.path == "/api/embed":
+            self._handle_embed(request)
+        else:
+            self._send_json({"error": f"not found: {self.path}"}, status=404)
+
+    def _handle_generate(self, request: Dict) -> None:
+        backend = self.backend
+        backend.record_request("generate")
+
+        model = request.get("model", "")
+        prompt = request.get("prompt", "")
+        options = request.get("options") or {}
+        stream = request.get("stream", True)
+
+        start = time.perf_counter()
+        backend.acquire_model()
+        try:
+            load_delay = backend.load_delay(model, prompt)
+            time.sleep(load_delay)
+
+            text = backend.generate_content(model, prompt, request.get("format"), options)
+            tokens = re.findall(r"\S+\s*", text) or [text]
+            token_delay = backend.token_delay()
+
+            base = {"model": model, "created_at": datetime.now(timezone.utc).isoformat()}
+
+            if stream:
+                self.send_response(200)
+                self.send_header("Content-Type", "application/x-ndjson")
+                self.send_header("Transfer-Encoding", "chunked")
+                self.end_headers()
+                for token in tokens:
+                    time.sleep(token_delay)
+                    self._write_chunk({**base, "response": token, "done": False})
+            else:
+                time.sleep(token_delay * len(tokens))
+        finally:
+            backend.release_model()
+
+        total_ns = int((time.perf_counter() - start) * 1e9)
+        final = {
+            **base,
+            "response": "" if stream else text,
+            "done": True,
+            "done_reason": "stop",
+            "context": [],
+            "total_duration": total_ns,
+            "load_duration": int(load_delay * 1e9),
+            "prompt_eval_count": _count_tokens(prompt),
+            "prompt_eval_duration": int(load_delay * 1e9),
+            "eval_count": len(tokens),
+            "eval_duration": int(token_delay * len(tokens) * 1e9),
+        }
+
+        if stream:
+            self._write_chunk(final)
+            self.wfile.write(b"0\r\n\r\n")
+        else:
+            self._send_json(final)
+
+    def _write_chunk(self, payload: Dict) -> None:
+        data = json.dumps(payload).encode("utf-8") + b"\n"
+        self.wfile.write(f"{len(data):x}\r\n".encode("ascii") + data + b"\r\n")
+        self.wfile.flush()
+
+    def _embed_texts(self, model: str, texts: List[str]) -> List[List[float]]:
+        backend = self.backend
+        backend.acquire_model()
+        try:
+            time.sleep(sum(backend.embedding_delay(model, text) for text in texts))
+            return [backend.embed(model, text) for text in texts]
+        finally:
+            backend.release_model()
+
+    def _handle_embeddings(self, request: Dict) -> None:
+        self.backend.record_request("embeddings")
+        model = request.get("model", "")
+        embedding = self._embed_texts(model, [request.get("prompt", "")])[0]
+        self._send_json({"embedding": embedding})
+
+    def _handle_embed(self, request: Dict) -> None:
+        self.backend.record_request("embed")
+        model = request.get("model", "")
+        inputs = request.get("input", "")
+        texts = [inputs] if isinstance(inputs, str) else list(inputs)
+
+        start = time.perf_counter()
+        embeddings = self._embed_texts(model, texts)
+
+        self._send_json({
+            "model": model,
+            "embeddings": embeddings,
+            "total_duration": int((time.perf_counter() - start) * 1e9),
+            "load_duration": 0,
+            "prompt_eval_count": sum(_count_tokens(t) for t in texts),
+        })
+
+
+class FakeOllamaServer:
+    """Threaded HTTP server exposing the fake Ollama API.
+
+    Point the ollama client at it with OLLAMA_HOST=<server.url> (set before
+    importing ollama) or ollama.Client(host=server.url).
+    """
+
+    def __init__(self, config: FakeOllamaConfig = None):
+        self.config = config or FakeOllamaConfig()
+        self.backend = FakeOllamaBackend(self.config)
+
+        handler = type("Handler", (_FakeOllamaHandler,), {"backend": self.backend})
+        self.httpd = ThreadingHTTPServer((self.config.host, self.config.port), handler)
+        self.httpd.daemon_threads = True
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def url(self) -> str:
+        host, port = self.httpd.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def start(self) -> "FakeOllamaServer":
+        """Serve requests on a background thread."""
+        self._thread = threading.Thread(target=self.httpd.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def serve_forever(self) -> None:
+        """Serve requests on the calling thread."""
+        self.httpd.serve_forever()
+
+    def stop(self) -> None:
+        self.httpd.shutdown()
+        self.httpd.server_close()
+        if self._thread:
+            self._thread.join()
+
+    def __enter__(self) -> "FakeOllamaServer":
+        return self.start()
+
+    def __exit__(self, *exc) -> None:
+        self.stop()
@@ -1,5 +1,5 @@
 from dataclasses import dataclass
-from typing import Dict
+from typing import Dict, Optional
 
 @dataclass
 class AgentConfig:
@@ -14,19 +14,61 @@ class AgentConfig:
 
     # Routing thresholds
     routing_confidence_threshold: float = 0.7
+    multi_intent_routing: bool = True  # Fan out to several specialists for mixed questions
+
+    # Embedding fast-path router (skips the LLM for confident classifications)
+    enable_fast_routing: bool = False
+    fast_routing_k: int = 5
+    fast_routing_audit_rate: float = 0.0  # Fraction of fast-path answers re-checked by the LLM
+    routing_examples_path: str = "data/evaluation/comprehensive_test_dataset.json"
 
     # Research agent settings
     research_top_k: int = 5
 
     # SQL agent settings
     sql_db_path: str = "data/sample.db"
+    sql_pool_size: int = 4  # Read-only SQLite connections shared across queries
+    sql_max_rows: Optional[int] = 1000  # Row cap per query; None fetches everything
+    sql_count_total_rows: bool = False  # Count and aggregate the full result when results are capped
+    sql_cost_guard: bool = True  # Check EXPLAIN QUERY PLAN before running generated SQL
+    sql_large_table_rows: int = 100_000  # Full scans above this size get a row cap
+    sql_max_join_rows: int = 10_000_000  # Reject unindexed joins examining more combinations
+    sql_statement_timeout: Optional[float] = 30.0  # Seconds before a statement is interrupted
+    sql_schema_selection: bool = True  # Prompt with only relevant tables on large schemas
+    sql_schema_top_k: int = 5  # Tables selected per question (plus foreign-key neighbours)
+    sql_cache: bool = True  # Cache generated SQL and results until the database changes
+    sql_cache_size: int = 256  # Cached result sets
+    sql_max_concurrent_queries: Optional[int] = None  # Async statements per database (default: pool size)
+    sql_summarize_threshold: Optional[int] = 20  # Summarize columns instead of listing rows above this
 
     # Code agent settings
     code_repo_path: str = "data/code_repos"
+    code_index_path: Optional[str] = "data/code_index.json"  # Persistent inverted index (None = in memory)
+    code_index_refresh_interval: float = 30.0  # Seconds between incremental index refreshes
+    code_search_mode: str = "bm25"  # "bm25" ranked retrieval or "match" (any query word)
+    code_index_use_git: bool = True  # Refresh git repos from git diff instead of stat-ing every file
+    code_max_file_bytes: int = 2 * 1024 * 1024  # Larger files are not indexed
+    code_max_context_chars: int = 12000  # Code text sent to the LLM per query
+    code_semantic_search: bool = False  # Fuse function-level embedding search with lexical results
+    code_embeddings_collection: str = "code_chunks"  # Vector store collection for code chunks
+    code_embeddings_state_path: str = "data/code_embeddings.json"  # Which file versions are embedded
 
     # Synthesis settings
     max_synthesis_tokens: int = 1000
 
+    # Concurrency settings
+    coalesce_requests: bool = True  # Share one execution across identical in-flight queries
+
+    # Speculative execution
+    speculative_retrieval: bool = False  # Retrieve documents while routing runs
+
+    # Guardrail settings
+    hallucination_precheck: bool = True  # Ask the LLM judge only about sentences the overlap scores cannot decide
+    hallucination_embedding_check: bool = False  # Also compare sentence embeddings (one embedding call per sentence/window)
+
+    # Latency budget
+    query_timeout: Optional[float] = None  # Default per-query budget in seconds; None = unbounded
+
     def to_dict(self) -> Dict:
         return {
             "router_model": self.router_model,
@@ -35,4 +77,5 @@ class AgentConfig:
             "code_model": self.code_model,
             "synthesis_model": self.synthesis_model,
             "routing_confidence_threshold": self.routing_confidence_threshold,
+            "enable_fast_routing": self.enable_fast_routing,
         }
\ No newline at end of file
@@ -0,0 +1,48 @@
+"""Per-request deadline propagation helpers."""
+
+import time
+from typing import Dict, Optional
+
+# Share of the *remaining* budget each node may spend. Specialists leave room
+# for synthesis; synthesis may use whatever is left.
+NODE_BUDGET_SHARES: Dict[str, float] = {
+    "router": 0.2,
+    "research": 0.6,
+    "sql": 0.6,
+    "code": 0.6,
+    "synthesis": 1.0,
+}
+
+
+class DeadlineExceeded(TimeoutError):
+    """Raised when an operation runs past its latency budget."""
+
+
+def deadline_from_timeout(timeout: Optional[float]) -> Optional[float]:
+    """Convert a relative timeout in seconds into an absolute deadline."""
+    if timeout is None:
+        return None
+    return time.monotonic() + timeout
+
+
+def remaining_time(state: Dict) -> Optional[float]:
+    """Seconds left before the request deadline, or None if unbounded."""
+    deadline = state.get("deadline")
+    if deadline is None:
+        return None
+    return max(0.0, deadline - time.monotonic())
+
+
+def node_timeout(state: Dict, node: str) -> Optional[float]:
+    """Time budget for a node: its share of the remaining deadline."""
+    remaining = remaining_time(state)
+    if remaining is None:
+        return None
+    return remaining * NODE_BUDGET_SHARES.get(node, 1.0)
+
+
+def record_degraded(state: Dict, stage: str) -> None:
+    """Record that a stage was skipped or cut short to meet the deadline."""
+    if state.get("degraded") is None:
+        state["degraded"] = []
+    state["degraded"].append(stage)
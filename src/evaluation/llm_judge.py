@@ -1,6 +1,6 @@
 """LLM-as-Judge evaluation system."""
 
-import ollama
+from src import llm
 import json
 from typing import Dict, List
 from pydantic import BaseModel, Field
@@ -67,7 +67,7 @@ Respond with JSON only:
 }
 """
 
-        response = ollama.generate(
+        response = llm.generate(
             model=self.model,
             prompt=prompt,
             format="json"
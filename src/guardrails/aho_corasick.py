@@ -0,0 +1,66 @@
+"""Aho–Corasick multi-pattern matcher."""
+
+from collections import deque
+from typing import Dict, Generic, Iterable, Iterator, List, Tuple, TypeVar
+
+T = TypeVar("T")
+
+
+class AhoCorasick(Generic[T]):
+    """Finds all occurrences of many patterns in one pass over the text.
+
+    Scanning is linear in the text length (amortized over failure-link
+    steps) regardless of the number of patterns. Each state stores the
+    outputs of its whole failure chain, so matches are read off directly.
+    """
+
+    def __init__(self, patterns: Iterable[Tuple[str, T]]):
+        # Trie
+        goto: List[Dict[str, int]] = [{}]
+        outputs: List[List[Tuple[int, T]]] = [[]]
+        self.num_patterns = 0
+
+        for pattern, value in patterns:
+            if not pattern:
+                continue
+            state = 0
+            for char in pattern:
+                if char not in goto[state]:
+                    goto.append({})
+                    outputs.append([])
+                    goto[state][char] = len(goto) - 1
+                state = goto[state][char]
+            outputs[state].append((len(pattern), value))
+            self.num_patterns += 1
+
+        # Failure links in BFS order, so a state's failure chain is final
+        # before its children are linked
+        fail = [0] * len(goto)
+        queue = deque(goto[0].values())
+        while queue:
+            state = queue.popleft()
+            for char, child in goto[state].items():
+                target = fail[state]
+                while target and char not in goto[target]:
+                    target = fail[target]
+                fail[child] = goto[target].get(char, 0)
+                outputs[child] = outputs[child] + outputs[fail[child]]
+                queue.append(child)
+
+        self._goto = goto
+        self._fail = fail
+        self._outputs = [tuple(output) for output in outputs]
+        self.num_states = len(goto)
+
+    def iter(self, text: str) -> Iterator[Tuple[int, int, T]]:
+        """(start, end, value) of every match, in order of end position."""
+
+        goto, fail, outputs = self._goto, self._fail, self._outputs
+        state = 0
+        for end, char in enumerate(text, 1):
+            while state and char not in goto[state]:
+                state = fail[state]
+            state = goto[state].get(char, 0)
+            if outputs[state]:
+                for length, value in outputs[state]:
+                    yield end - length, end, value
@@ -0,0 +1,151 @@
+"""Cheap sentence-level support scores of an answer against its contexts."""
+
+import re
+from typing import Callable, Dict, List, Optional, Sequence
+import numpy as np
+
+_SENTENCE_END = re.compile(r"(?<=[.!?])\s+|\n+")
+# "1.", "2)", "-", "*", "•" at the start of a line
+_LIST_MARKER = re.compile(r"^[ \t]*(?:[-*\u2022]|\(?\d{1,3}[.)])[ \t]+", re.MULTILINE)
+# "[1]", "[2, 3]", "[Source 1]"
+_CITATION = re.compile(r"\s*\[(?:\d+(?:\s*[,;-]\s*\d+)*|(?:source|doc|document|ref)\s*\d+)\]", re.IGNORECASE)
+_WORD = re.compile(r"\w+(?:[.,]\d+)*")
+
+# Function words carry no evidence of support
+STOP_WORDS = frozenset({
+    "a", "an", "the", "and", "or", "but", "of", "to", "in", "on", "at", "by", "for", "with",
+    "from", "as", "is", "are", "was", "were", "be", "been", "being", "it", "its", "this",
+    "that", "these", "those", "there", "their", "they", "which", "who", "what", "also",
+    "has", "have", "had", "do", "does", "did", "can", "will", "would", "should", "may",
+    "not", "so", "than", "then", "into", "about", "such", "i", "we", "you", "he", "she",
+})
+
+
+def split_sentences(text: str) -> List[str]:
+    """Sentences and list items without their markers or citations.
+
+    Fragments without any word (a stray "2.") and lead-in lines ending in
+    a colon ("Here are the key points:") carry no claim and are dropped.
+    """
+
+    text = _LIST_MARKER.sub("", _CITATION.sub("", text))
+    return [
+        sentence for sentence in (part.strip() for part in _SENTENCE_END.split(text))
+        if sentence and not sentence.endswith(":") and any(char.isalpha() for char in sentence)
+    ]
+
+
+def content_tokens(text: str) -> List[str]:
+    """Lower-cased words and numbers without stop words."""
+    return [token for token in _WORD.findall(text.lower()) if token not in STOP_WORDS]
+
+
+def _ngrams(tokens: List[str], max_n: int) -> set:
+    return {
+        " ".join(tokens[i:i + n])
+        for n in range(1, max_n + 1)
+        for i in range(len(tokens) - n + 1)
+    }
+
+
+def lexical_support(sentences: Sequence[str], chunks: Sequence[str], max_n: int = 2) -> np.ndarray:
+    """Per sentence, the largest fraction of its 1..max_n-grams found in any single chunk.
+
+    Bigrams make "revenue fell" differ from "revenue rose" and tie numbers
+    to the words around them. Sentences without content words score 1.
+    """
+
+    sentence_grams = [_ngrams(content_tokens(sentence), max_n) for sentence in sentences]
+    chunk_grams = [_ngrams(content_tokens(chunk), max_n) for chunk in chunks]
+
+    vocabulary: Dict[str, int] = {}
+    for grams in sentence_grams:
+        for gram in grams:
+            vocabulary.setdefault(gram, len(vocabulary))
+
+    if not vocabulary or not chunks:
+        return np.array([1.0 if not grams else 0.0 for grams in sentence_grams], dtype=np.float32)
+
+    # Binary incidence over the answer's n-grams only; chunk n-grams
+    # outside that vocabulary cannot contribute
+    sentence_matrix = np.zeros((len(sentences), len(vocabulary)), dtype=np.float32)
+    for row, grams in enumerate(sentence_grams):
+        sentence_matrix[row, [vocabulary[gram] for gram in grams]] = 1.0
+
+    chunk_matrix = np.zeros((len(chunks), len(vocabulary)), dtype=np.float32)
+    for row, grams in enumerate(chunk_grams):
+        columns = [vocabulary[gram] for gram in grams if gram in vocabulary]
+        chunk_matrix[row, columns] = 1.0
+
+    sizes = sentence_matrix.sum(axis=1)
+    overlap = (sentence_matrix @ chunk_matrix.T).max(axis=1)
+    return np.where(sizes > 0, overlap / np.maximum(sizes, 1.0), 1.0)
+
+
+def missing_numbers(sentences: Sequence[str], contexts: Sequence[str]) -> np.ndarray:
+    """True for sentences containing a number that appears in no context.
+
+    A changed figure barely moves n-gram overlap but is exactly the kind
+    of error the check is for.
+    """
+
+    context_numbers = {
+        token for context in contexts for token in content_tokens(context) if any(c.isdigit() for c in token)
+    }
+    return np.array([
+        any(any(c.isdigit() for c in token) and token not in context_numbers for token in content_tokens(sentence))
+        for sentence in sentences
+    ], dtype=bool)
+
+
+def context_windows(contexts: Sequence[str], window: int = 3, max_windows: int = 50) -> List[str]:
+    """Contexts split into windows of a few sentences, for embedding."""
+
+    windows = []
+    for context in contexts:
+        sentences = split_sentences(context)
+        windows.extend(" ".join(sentences[i:i + window]) for i in range(0, len(sentences), window))
+    return windows[:max_windows]
+
+
+def embedding_support(
+    sentences: Sequence[str],
+    chunks: Sequence[str],
+    embed_fn: Callable[[str], List[float]]
+) -> np.ndarray:
+    """Per sentence, the highest cosine similarity to any chunk."""
+
+    if not sentences or not chunks:
+        return np.zeros(len(sentences), dtype=np.float32)
+
+    def unit_rows(texts: Sequence[str]) -> np.ndarray:
+        matrix = np.asarray([embed_fn(text) for text in texts], dtype=np.float32)
+        norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+        return matrix / np.maximum(norms, 1e-12)
+
+    return (unit_rows(sentences) @ unit_rows(chunks).T).max(axis=1)
+
+
+def support_scores(
+    sentences: Sequence[str],
+    contexts: Sequence[str],
+    embed_fn: Optional[Callable[[str], List[float]]] = None,
+    embed_below: float = 1.0
+) -> Dict[str, np.ndarray]:
+    """Lexical scores and missing-number flags for all sentences; cosine
+    scores (NaN where not computed) only for sentences whose lexical score
+    is below embed_below."""
+
+    lexical = lexical_support(sentences, contexts)
+    cosine = np.full(len(sentences), np.nan, dtype=np.float32)
+
+    if embed_fn is not None:
+        pending = np.flatnonzero(lexical < embed_below)
+        if len(pending):
+            cosine[pending] = embedding_support(
+                [sentences[i] for i in pending],
+                context_windows(contexts),
+                embed_fn
+            )
+
+    return {'lexical': lexical, 'cosine': cosine, 'missing_numbers': missing_numbers(sentences, contexts)}
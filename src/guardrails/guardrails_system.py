@@ -1,7 +1,8 @@
 """Unified guardrails system."""
 
-from typing import Dict, List
-from src.guardrails.pii_detector import PIIDetector
+from typing import Callable, Dict, Iterable, List, Optional
+from src.deadline import DeadlineExceeded
+from src.guardrails.pii_detector import PIIDetector, SENSITIVE_TYPES
 from src.guardrails.prompt_injection_detector import PromptInjectionDetector
 from src.guardrails.hallucination_detector import HallucinationDetector
 
@@ -9,10 +10,28 @@ from src.guardrails.hallucination_detector import HallucinationDetector
 class GuardrailsSystem:
     """Comprehensive guardrails for input/output validation."""
 
-    def __init__(self):
+    def __init__(
+        self,
+        min_hallucination_budget: float = 3.0,
+        pii_entity_types: Iterable[str] = SENSITIVE_TYPES,
+        hallucination_precheck: bool = True,
+        embed_fn: Optional[Callable[[str], List[float]]] = None
+    ):
+        # Skip the LLM hallucination check when less time than this is left
+        self.min_hallucination_budget = min_hallucination_budget
+
+        # PII types counted in validation summaries; types beyond the
+        # sensitive ones need a spaCy NER pass per text
+        self.pii_entity_types = tuple(pii_entity_types)
+
         self.pii_detector = PIIDetector()
         self.injection_detector = PromptInjectionDetector()
-        self.hallucination_detector = HallucinationDetector()
+        # Lexical (and, with embed_fn, embedding) support scores decide
+        # clearly grounded answers without the LLM judge
+        self.hallucination_detector = HallucinationDetector(
+            precheck=hallucination_precheck,
+            embed_fn=embed_fn
+        )
 
     def validate_input(self, query: str) -> Dict:
         """Validate user input before processing."""
@@ -20,7 +39,7 @@ class GuardrailsSystem:
         print("🛡️  Validating input...")
 
         # Check for PII
-        pii_summary = self.pii_detector.get_pii_summary(query)
+        pii_summary = self.pii_detector.get_pii_summary(query, self.pii_entity_types)
 
         # Check for prompt injection
         injection_result = self.injection_detector.detect(query)
@@ -56,21 +75,40 @@ class GuardrailsSystem:
 
         return validation_result
 
-    def validate_output(self, answer: str, contexts: List[str]) -> Dict:
-        """Validate system output before returning to user."""
+    def validate_output(
+        self,
+        answer: str,
+        contexts: List[str],
+        time_budget: Optional[float] = None
+    ) -> Dict:
+        """Validate system output before returning to user.
+
+        time_budget is the number of seconds left for the request; optional
+        checks are skipped when it is too short and listed under 'degraded'.
+        """
 
         print("🛡️  Validating output...")
 
+        degraded = []
+
         # Check for hallucinations
-        consistency_result = self.hallucination_detector.check_context_consistency(
-            answer, contexts
-        )
+        if time_budget is not None and time_budget < self.min_hallucination_budget:
+            consistency_result = {'skipped': True, 'reasoning': "Skipped: insufficient time budget"}
+            degraded.append("hallucination_check")
+        else:
+            try:
+                consistency_result = self.hallucination_detector.check_context_consistency(
+                    answer, contexts, timeout=time_budget
+                )
+            except DeadlineExceeded as e:
+                consistency_result = {'skipped': True, 'reasoning': f"Skipped: {str(e)}"}
+                degraded.append("hallucination_check")
 
         # Check for PII in output
-        pii_summary = self.pii_detector.get_pii_summary(answer)
+        pii_summary = self.pii_detector.get_pii_summary(answer, self.pii_entity_types)
 
         is_safe = (
-            consistency_result.get('consistency_score', 0) >= 0.6 and
+            (consistency_result.get('skipped') or consistency_result.get('consistency_score', 0) >= 0.6) and
             not pii_summary['has_sensitive_pii']
         )
 
@@ -78,6 +116,7 @@ class GuardrailsSystem:
             'is_safe': is_safe,
             'consistency_check': consistency_result,
             'pii_in_output': pii_summary,
+            'degraded': degraded,
             'warnings': []
         }
 
@@ -100,4 +139,19 @@ class GuardrailsSystem:
     def sanitize_output(self, answer: str) -> str:
         """Sanitize output by removing/anonymizing PII."""
 
-        return self.pii_detector.anonymize_text(answer)
\ No newline at end of file
+        return self.pii_detector.anonymize_text(answer)
+
+    def check_pii_batch(self, texts: List[str], batch_size: int = 64, n_process: int = 1) -> List[Dict]:
+        """PII summaries for many texts (e.g. evaluation answers), batched."""
+
+        return self.pii_detector.get_pii_summaries(
+            texts,
+            self.pii_entity_types,
+            batch_size=batch_size,
+            n_process=n_process
+        )
+
+    def sanitize_outputs(self, answers: List[str], batch_size: int = 64, n_process: int = 1) -> List[str]:
+        """sanitize_output for many answers, batched."""
+
+        return self.pii_detector.anonymize_texts(answers, batch_size=batch_size, n_process=n_process)
@@ -1,23 +1,97 @@
 """Detect hallucinations in generated responses."""
 
-import ollama
-from typing import Dict, List
+from src import llm
+from src.guardrails.grounding import split_sentences, support_scores
+from typing import Callable, Dict, List, Optional
 import json
+import numpy as np
 
 
 class HallucinationDetector:
-    """Detect factual inconsistencies and hallucinations."""
+    """Detect factual inconsistencies and hallucinations.
 
-    def __init__(self, model: str = "llama3.1"):
+    With precheck on, answer sentences are first scored against the
+    contexts by n-gram overlap (and embedding cosine when embed_fn is
+    given). Clearly supported sentences are accepted without the LLM;
+    only the rest go to the LLM judge.
+    """
+
+    def __init__(
+        self,
+        model: str = "llama3.1",
+        precheck: bool = True,
+        embed_fn: Optional[Callable[[str], List[float]]] = None,
+        supported_overlap: float = 0.7,
+        supported_cosine: float = 0.85,
+        max_contexts: int = 3
+    ):
         self.model = model
+        self.precheck = precheck
+        self.embed_fn = embed_fn
+
+        # Sentences at or above either threshold are grounded; the rest go to the LLM
+        self.supported_overlap = supported_overlap
+        self.supported_cosine = supported_cosine
+
+        # Contexts the LLM judge sees; the pre-check scores against the same ones
+        self.max_contexts = max_contexts
 
     def check_context_consistency(
         self,
         answer: str,
-        contexts: List[str]
+        contexts: List[str],
+        timeout: Optional[float] = None
     ) -> Dict:
         """Check if answer is consistent with provided contexts."""
 
+        contexts = contexts[:self.max_contexts]
+        sentences = split_sentences(answer)
+        if not self.precheck or not sentences or not any(context.strip() for context in contexts):
+            return self._llm_check(answer, contexts, timeout)
+
+        scores = support_scores(sentences, contexts, self.embed_fn, embed_below=self.supported_overlap)
+        lexical, cosine = scores['lexical'], scores['cosine']
+
+        # Low overlap alone does not prove a hallucination (paraphrase,
+        # connecting remarks), so everything not clearly grounded is judged
+        supported, uncertain = [], []
+        for i, sentence in enumerate(sentences):
+            if scores['missing_numbers'][i]:
+                # A figure not in the context is never cleared by overlap alone
+                grounded = False
+            else:
+                grounded = lexical[i] >= self.supported_overlap or (
+                    not np.isnan(cosine[i]) and cosine[i] >= self.supported_cosine  # NaN where not embedded
+                )
+            (supported if grounded else uncertain).append(sentence)
+
+        if not uncertain:
+            return {
+                'is_consistent': True,
+                'consistency_score': 1.0,
+                'hallucinated_claims': [],
+                'reasoning': f"All {len(sentences)} sentences supported by the context",
+                'llm_checked_sentences': 0
+            }
+
+        # The LLM judges only the sentences the cheap scores cannot clear
+        judged = self._llm_check(" ".join(uncertain), contexts, timeout)
+        uncertain_score = float(judged.get('consistency_score', 0.5)) * len(uncertain)
+
+        return {
+            'is_consistent': bool(judged.get('is_consistent', True)),
+            'consistency_score': (len(supported) + uncertain_score) / len(sentences),
+            'hallucinated_claims': judged.get('hallucinated_claims', []),
+            'reasoning': (
+                f"{len(supported)} of {len(sentences)} sentences supported by the context; "
+                f"LLM on {len(uncertain)}: {judged.get('reasoning', '')}"
+            ),
+            'llm_checked_sentences': len(uncertain)
+        }
+
+    def _llm_check(self, answer: str, contexts: List[str], timeout: Optional[float] = None) -> Dict:
+        """Ask the LLM whether answer is supported by the contexts."""
+
         context_str = "\n\n".join(contexts[:3])  # Use top 3 contexts
 
         prompt = f"""You are a fact-checking system. Determine if the answer is fully supported by the provided context.
@@ -39,10 +113,11 @@ Respond with JSON only:
 }}
 """
 
-        response = ollama.generate(
+        response = llm.generate(
             model=self.model,
             prompt=prompt,
-            format="json"
+            format="json",
+            timeout=timeout
         )
 
         try:
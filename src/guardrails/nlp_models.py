@@ -0,0 +1,86 @@
+"""Process-wide, lazily loaded NLP models shared by the guardrails.
+
+spaCy pipelines and Presidio engines are expensive to build (seconds and
+hundreds of MB), so each is created once per process on first use and
+reused by every detector. spaCy and Presidio are imported on first use
+as well.
+"""
+
+import threading
+import time
+from typing import Any, Dict
+
+DEFAULT_SPACY_MODEL = "en_core_web_sm"
+
+_lock = threading.RLock()
+_spacy_models: Dict[str, Any] = {}
+_analyzers: Dict[str, Any] = {}
+_anonymizer = None
+
+# Seconds spent loading each model, for startup reporting
+load_times: Dict[str, float] = {}
+
+
+def get_spacy(model_name: str = DEFAULT_SPACY_MODEL):
+    """Shared spaCy pipeline for model_name."""
+
+    with _lock:
+        if model_name not in _spacy_models:
+            import spacy
+
+            start = time.perf_counter()
+            try:
+                _spacy_models[model_name] = spacy.load(model_name)
+            except OSError:
+                print(f"Warning: spaCy model not loaded. Run: python -m spacy download {model_name}")
+                raise
+            load_times[f"spacy:{model_name}"] = time.perf_counter() - start
+
+        return _spacy_models[model_name]
+
+
+def get_analyzer(model_name: str = DEFAULT_SPACY_MODEL):
+    """Shared Presidio AnalyzerEngine whose NLP engine reuses the shared spaCy pipeline."""
+
+    with _lock:
+        if model_name not in _analyzers:
+            from presidio_analyzer import AnalyzerEngine
+            from presidio_analyzer.nlp_engine import SpacyNlpEngine
+
+            nlp = get_spacy(model_name)
+
+            start = time.perf_counter()
+            nlp_engine = SpacyNlpEngine(models=[{"lang_code": "en", "model_name": model_name}])
+            # Hand over the loaded pipeline so Presidio does not load its own copy
+            nlp_engine.nlp = {"en": nlp}
+
+            _analyzers[model_name] = AnalyzerEngine(nlp_engine=nlp_engine, supported_languages=["en"])
+            load_times[f"analyzer:{model_name}"] = time.perf_counter() - start
+
+        return _analyzers[model_name]
+
+
+def get_anonymizer():
+    """Shared Presidio AnonymizerEngine."""
+
+    global _anonymizer
+    with _lock:
+        if _anonymizer is None:
+            from presidio_anonymizer import AnonymizerEngine
+
+            start = time.perf_counter()
+            _anonymizer = AnonymizerEngine()
+            load_times["anonymizer"] = time.perf_counter() - start
+
+        return _anonymizer
+
+
+def get_load_stats() -> Dict:
+    """Which models are loaded and how long each took."""
+    with _lock:
+        return {
+            'spacy_models': list(_spacy_models),
+            'analyzers': list(_analyzers),
+            'anonymizer_loaded': _anonymizer is not None,
+            'load_seconds': dict(load_times)
+        }
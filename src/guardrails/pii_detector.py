@@ -1,104 +1,283 @@
 """PII detection and anonymization."""
 
-from presidio_analyzer import AnalyzerEngine
-from presidio_anonymizer import AnonymizerEngine
-from typing import Dict, List
-import spacy
+import hashlib
+import threading
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from typing import Any, Dict, FrozenSet, Iterable, List, Optional, Union
+from src.guardrails import nlp_models
+from src.guardrails.pii_patterns import PIIMatch, find_sensitive_pii
 
+# Entities reported by detect_pii and the summary
+DETECTED_ENTITIES = (
+    "PERSON",
+    "EMAIL_ADDRESS",
+    "PHONE_NUMBER",
+    "CREDIT_CARD",
+    "US_SSN",
+    "LOCATION",
+    "DATE_TIME",
+    "IP_ADDRESS",
+    "URL"
+)
 
-class PIIDetector:
-    """Detect and anonymize PII in text."""
+# PII types that make a text unsafe
+SENSITIVE_TYPES = frozenset({
+    "CREDIT_CARD",
+    "US_SSN",
+    "EMAIL_ADDRESS",
+    "PHONE_NUMBER"
+})
 
-    def __init__(self):
-        self.analyzer = AnalyzerEngine()
-        self.anonymizer = AnonymizerEngine()
 
-        # Try to load spacy model
-        try:
-            self.nlp = spacy.load("en_core_web_sm")
-        except:
-            print("Warning: spaCy model not loaded. Run: python -m spacy download en_core_web_sm")
-            self.nlp = None
+@dataclass
+class PIIAnalysis:
+    """PII found in one text.
 
-    def detect_pii(self, text: str) -> List[Dict]:
-        """Detect PII entities in text."""
+    Sensitive types come from the regex/checksum tier and are always
+    present. Results of the spaCy-based analyzer for the remaining types
+    are filled in only for the types something asked for. Detection,
+    the summary, the sensitivity verdict and anonymization are all derived
+    from this object.
+    """
+
+    text: str
+    sensitive: List[PIIMatch]  # Tier 1: sensitive types
+    ner_results: Optional[List[Any]] = None  # Analyzer results for other types, None until needed
+    ner_types: Optional[FrozenSet[str]] = None  # Types ner_results covers; None = all types
+    anonymized: Optional[str] = field(default=None, repr=False)  # Filled on first anonymization
+
+    @property
+    def results(self) -> List[Any]:
+        return self.sensitive + (self.ner_results or [])
 
-        results = self.analyzer.analyze(
-            text=text,
-            language='en',
-            entities=[
-                "PERSON",
-                "EMAIL_ADDRESS",
-                "PHONE_NUMBER",
-                "CREDIT_CARD",
-                "US_SSN",
-                "LOCATION",
-                "DATE_TIME",
-                "IP_ADDRESS",
-                "URL"
-            ]
-        )
+    def ner_request(self, entity_types: Optional[Iterable[str]]) -> Union[bool, Optional[List[str]]]:
+        """Entity types the analyzer still has to run for (None = all), or False if covered."""
 
+        if entity_types is None:
+            return None if self.ner_results is None or self.ner_types is not None else False
+
+        needed = set(entity_types) - SENSITIVE_TYPES
+        if not needed:
+            return False
+        if self.ner_results is not None:
+            if self.ner_types is None or needed <= self.ner_types:
+                return False
+            needed |= self.ner_types  # Results are replaced, keep what was covered
+        return sorted(needed)
+
+    def set_ner_results(self, results: List[Any], entity_types: Optional[List[str]]) -> None:
+        # Tier 1 owns the sensitive types
+        self.ner_results = [result for result in results if result.entity_type not in SENSITIVE_TYPES]
+        self.ner_types = frozenset(entity_types) if entity_types is not None else None
+
+    def entities(self, entity_types: Iterable[str] = DETECTED_ENTITIES) -> List[Dict]:
+        entity_types = set(entity_types)
         return [
             {
                 'type': result.entity_type,
                 'start': result.start,
                 'end': result.end,
                 'score': result.score,
-                'text': text[result.start:result.end]
+                'text': self.text[result.start:result.end]
             }
-            for result in results
+            for result in sorted(self.results, key=lambda result: result.start)
+            if result.entity_type in entity_types
         ]
 
-    def anonymize_text(self, text: str) -> str:
-        """Anonymize PII in text."""
+    def has_sensitive_pii(self, threshold: float = 0.8) -> bool:
+        return any(result.score >= threshold for result in self.sensitive)
 
-        analyzer_results = self.analyzer.analyze(
-            text=text,
-            language='en'
-        )
+    def summary(self, threshold: float = 0.8, entity_types: Iterable[str] = DETECTED_ENTITIES) -> Dict:
+        entities = self.entities(entity_types)
 
-        anonymized_result = self.anonymizer.anonymize(
-            text=text,
-            analyzer_results=analyzer_results
-        )
+        summary = {
+            'total_pii_found': len(entities),
+            'has_sensitive_pii': self.has_sensitive_pii(threshold),
+            'pii_by_type': {}
+        }
 
-        return anonymized_result.text
+        for entity in entities:
+            pii_type = entity['type']
+            if pii_type not in summary['pii_by_type']:
+                summary['pii_by_type'][pii_type] = 0
+            summary['pii_by_type'][pii_type] += 1
 
-    def has_sensitive_pii(self, text: str, threshold: float = 0.8) -> bool:
-        """Check if text contains high-confidence PII."""
+        return summary
 
-        pii_entities = self.detect_pii(text)
 
-        # Filter for sensitive PII types
-        sensitive_types = {
-            "CREDIT_CARD",
-            "US_SSN",
-            "EMAIL_ADDRESS",
-            "PHONE_NUMBER"
-        }
+class PIIDetector:
+    """Detect and anonymize PII in text.
 
-        for entity in pii_entities:
-            if entity['type'] in sensitive_types and entity['score'] >= threshold:
-                return True
+    Presidio and spaCy are loaded on first use and shared by all detectors
+    in the process (see nlp_models), so construction is cheap.
+    """
 
-        return False
+    def __init__(self, model_name: str = nlp_models.DEFAULT_SPACY_MODEL, cache_size: int = 128):
+        self.model_name = model_name
 
-    def get_pii_summary(self, text: str) -> Dict:
-        """Get summary of PII found in text."""
+        # Text hash -> PIIAnalysis, so validating, summarizing and
+        # sanitizing the same text runs the NLP pipeline once
+        self.cache_size = cache_size
+        self._cache: "OrderedDict[bytes, PIIAnalysis]" = OrderedDict()
+        self._lock = threading.Lock()
 
-        pii_entities = self.detect_pii(text)
+        # Cache statistics
+        self.cache_hits = 0
+        self.cache_misses = 0
 
-        summary = {
-            'total_pii_found': len(pii_entities),
-            'has_sensitive_pii': self.has_sensitive_pii(text),
-            'pii_by_type': {}
-        }
+    @property
+    def analyzer(self):
+        return nlp_models.get_analyzer(self.model_name)
 
-        for entity in pii_entities:
-            pii_type = entity['type']
-            if pii_type not in summary['pii_by_type']:
-                summary['pii_by_type'][pii_type] = 0
-            summary['pii_by_type'][pii_type] += 1
+    @property
+    def anonymizer(self):
+        return nlp_models.get_anonymizer()
+
+    def warm_up(self) -> None:
+        """Load the models now instead of on the first request."""
+        self.analyzer
+        self.anonymizer
+
+    def _lookup(self, text: str) -> PIIAnalysis:
+        """Memoized analysis of text, with at least the regex tier filled in."""
+
+        key = hashlib.blake2b(text.encode('utf-8', errors='surrogatepass'), digest_size=16).digest()
+        with self._lock:
+            analysis = self._cache.get(key)
+            if analysis is not None and analysis.text == text:
+                self._cache.move_to_end(key)
+                self.cache_hits += 1
+                return analysis
+            self.cache_misses += 1
+
+        analysis = PIIAnalysis(text=text, sensitive=find_sensitive_pii(text))
+        with self._lock:
+            self._cache[key] = analysis
+            if len(self._cache) > self.cache_size:
+                self._cache.popitem(last=False)
+
+        return analysis
 
-        return summary
\ No newline at end of file
+    def analyze(self, text: str, entity_types: Optional[Iterable[str]] = DETECTED_ENTITIES) -> PIIAnalysis:
+        """PII in text, memoized per text.
+
+        Sensitive types are always found with the fast regex tier. The
+        analyzer (spaCy NER) runs only if entity_types asks for other
+        types, and only for those; None means every type the analyzer
+        knows (needed for anonymization).
+        """
+
+        analysis = self._lookup(text)
+        request = analysis.ner_request(entity_types)
+        if request is not False:
+            analysis.set_ner_results(self.analyzer.analyze(text=text, language='en', entities=request), request)
+
+        return analysis
+
+    def analyze_batch(
+        self,
+        texts: Iterable[str],
+        entity_types: Optional[Iterable[str]] = DETECTED_ENTITIES,
+        batch_size: int = 64,
+        n_process: int = 1
+    ) -> List[PIIAnalysis]:
+        """analyze() for many texts, running NER through spaCy's nlp.pipe in batches.
+
+        n_process > 1 runs the spaCy pipeline in worker processes.
+        """
+
+        if entity_types is not None:
+            entity_types = tuple(entity_types)
+        analyses = [self._lookup(text) for text in texts]
+
+        # Distinct analyses still needing NER, grouped by the types to request;
+        # memoized and repeated texts share an analysis
+        pending: Dict[Optional[tuple], Dict[int, PIIAnalysis]] = {}
+        for analysis in analyses:
+            request = analysis.ner_request(entity_types)
+            if request is not False:
+                key = tuple(request) if request is not None else None
+                pending.setdefault(key, {})[id(analysis)] = analysis
+
+        if pending:
+            from presidio_analyzer import BatchAnalyzerEngine
+
+            batch_analyzer = BatchAnalyzerEngine(analyzer_engine=self.analyzer)
+            for request, group in pending.items():
+                group = list(group.values())
+                request = list(request) if request is not None else None
+                batch_results = batch_analyzer.analyze_iterator(
+                    [analysis.text for analysis in group],
+                    language='en',
+                    batch_size=batch_size,
+                    n_process=n_process,
+                    entities=request
+                )
+                for analysis, results in zip(group, batch_results):
+                    analysis.set_ner_results(results, request)
+
+        return analyses
+
+    def detect_pii(self, text: str, entity_types: Iterable[str] = DETECTED_ENTITIES) -> List[Dict]:
+        """Detect PII entities in text."""
+        return self.analyze(text, entity_types).entities(entity_types)
+
+    def _anonymize(self, analysis: PIIAnalysis) -> str:
+        if analysis.anonymized is None:
+            from presidio_anonymizer.entities import RecognizerResult
+
+            analysis.anonymized = self.anonymizer.anonymize(
+                text=analysis.text,
+                analyzer_results=[
+                    RecognizerResult(result.entity_type, result.start, result.end, result.score)
+                    for result in analysis.results
+                ]
+            ).text
+
+        return analysis.anonymized
+
+    def anonymize_text(self, text: str) -> str:
+        """Anonymize PII in text."""
+        return self._anonymize(self.analyze(text, entity_types=None))
+
+    def has_sensitive_pii(self, text: str, threshold: float = 0.8) -> bool:
+        """Check if text contains high-confidence PII (regex tier only, no NER)."""
+        return self.analyze(text, SENSITIVE_TYPES).has_sensitive_pii(threshold)
+
+    def get_pii_summary(self, text: str, entity_types: Iterable[str] = DETECTED_ENTITIES) -> Dict:
+        """Get summary of PII found in text.
+
+        Restricting entity_types to SENSITIVE_TYPES skips the NER pass.
+        """
+        return self.analyze(text, entity_types).summary(entity_types=entity_types)
+
+    def get_pii_summaries(
+        self,
+        texts: Iterable[str],
+        entity_types: Iterable[str] = DETECTED_ENTITIES,
+        batch_size: int = 64,
+        n_process: int = 1
+    ) -> List[Dict]:
+        """get_pii_summary for many texts, batched."""
+
+        entity_types = tuple(entity_types)
+        return [
+            analysis.summary(entity_types=entity_types)
+            for analysis in self.analyze_batch(texts, entity_types, batch_size, n_process)
+        ]
+
+    def anonymize_texts(self, texts: Iterable[str], batch_size: int = 64, n_process: int = 1) -> List[str]:
+        """anonymize_text for many texts, batched."""
+
+        return [self._anonymize(analysis) for analysis in self.analyze_batch(texts, None, batch_size, n_process)]
+
+    def get_cache_stats(self) -> Dict:
+        with self._lock:
+            lookups = self.cache_hits + self.cache_misses
+            return {
+                'entries': len(self._cache),
+                'hits': self.cache_hits,
+                'misses': self.cache_misses,
+                'hit_rate': self.cache_hits / lookups if lookups else 0.0
+            }
@@ -0,0 +1,127 @@
+"""Fast regex and checksum recognizers for the sensitive PII types.
+
+These decide has_sensitive_pii without spaCy. Scores follow Presidio's
+recognizers for the same types (validated email and Luhn-valid card 1.0,
+delimited SSN 0.5, bare SSN 0.05, phone 0.4, +0.35 when a context word
+precedes the match), so verdicts agree with the full analyzer.
+"""
+
+import re
+from dataclasses import dataclass
+from typing import List, Tuple
+
+CONTEXT_BOOST = 0.35
+CONTEXT_WORDS_BEFORE = 5
+
+_EMAIL = re.compile(r"(?<![\w.+-])[\w.!#$%&'*+/=?^`{|}~-]+@[A-Za-z0-9](?:[A-Za-z0-9-]*[A-Za-z0-9])?(?:\.[A-Za-z0-9-]+)*\.[A-Za-z]{2,}\b")
+_CARD = re.compile(r"(?<![\d-])\d(?:[ -]?\d){12,18}(?![\d-])")
+_SSN = re.compile(r"(?<![\d-])(?:\d{3}([- .])\d{2}\1\d{4}|\d{9})(?![\d-])")
+_PHONE = re.compile(
+    r"(?<![\w+])(?<!\d[ .-])(?:\+\d{1,3}[ .-]?)?(?:\(\d{2,4}\)[ .-]?|\d{2,4}[ .-])\d{3,4}[ .-]?\d{4}(?![\w-]|[ .]\d)"
+)
+_WORD = re.compile(r"\w+")
+
+_CONTEXT = {
+    "EMAIL_ADDRESS": frozenset({"email", "mail", "e-mail"}),
+    "CREDIT_CARD": frozenset({
+        "credit", "card", "visa", "mastercard", "cc", "amex", "discover",
+        "jcb", "diners", "maestro", "instapayment"
+    }),
+    "US_SSN": frozenset({"social", "security", "ssn", "ssns", "ssid"}),
+    "PHONE_NUMBER": frozenset({"phone", "number", "telephone", "cell", "cellphone", "mobile", "call"})
+}
+
+# Placeholder SSNs published for examples
+_SAMPLE_SSNS = frozenset({"123456789", "987654320", "078051120"})
+
+
+@dataclass
+class PIIMatch:
+    """A recognized entity; same fields as Presidio's RecognizerResult."""
+
+    entity_type: str
+    start: int
+    end: int
+    score: float
+
+
+def luhn_valid(digits: str) -> bool:
+    """Luhn checksum of a digit string."""
+
+    total = 0
+    for i, char in enumerate(reversed(digits)):
+        digit = ord(char) - 48
+        if i % 2:
+            digit *= 2
+            if digit > 9:
+                digit -= 9
+        total += digit
+    return total % 10 == 0
+
+
+def ssn_valid(digits: str) -> bool:
+    """Reject SSNs that are never issued or are well-known placeholders."""
+
+    return not (
+        len(set(digits)) == 1 or
+        digits[3:5] == "00" or
+        digits[5:] == "0000" or
+        digits[:3] in ("000", "666") or
+        digits in _SAMPLE_SSNS
+    )
+
+
+def _has_context(text: str, start: int, entity_type: str) -> bool:
+    words = _WORD.findall(text[max(0, start - 100):start].lower())[-CONTEXT_WORDS_BEFORE:]
+    context = _CONTEXT[entity_type]
+    return any(word in context or word.rstrip("s") in context for word in words)
+
+
+def _scored(text: str, entity_type: str, start: int, end: int, score: float) -> PIIMatch:
+    if _has_context(text, start, entity_type):
+        score = min(1.0, score + CONTEXT_BOOST)
+    return PIIMatch(entity_type, start, end, score)
+
+
+def _overlaps(span: Tuple[int, int], taken: List[Tuple[int, int]]) -> bool:
+    return any(span[0] < end and start < span[1] for start, end in taken)
+
+
+def find_sensitive_pii(text: str) -> List[PIIMatch]:
+    """Emails, credit cards, SSNs and phone numbers in text.
+
+    Types are matched in that order; a span already claimed by an earlier
+    type is not reported again (e.g. card digits as a phone number).
+    """
+
+    matches: List[PIIMatch] = []
+    taken: List[Tuple[int, int]] = []
+
+    def add(match: PIIMatch) -> None:
+        matches.append(match)
+        taken.append((match.start, match.end))
+
+    # Cheap rejection: every sensitive type needs a digit or an @
+    if "@" not in text and not any(char.isdigit() for char in text):
+        return matches
+
+    if "@" in text:
+        for m in _EMAIL.finditer(text):
+            add(_scored(text, "EMAIL_ADDRESS", m.start(), m.end(), 1.0))
+
+    for m in _CARD.finditer(text):
+        digits = re.sub(r"\D", "", m.group())
+        if 13 <= len(digits) <= 19 and luhn_valid(digits) and not _overlaps(m.span(), taken):
+            add(_scored(text, "CREDIT_CARD", m.start(), m.end(), 1.0))
+
+    for m in _SSN.finditer(text):
+        digits = re.sub(r"\D", "", m.group())
+        if ssn_valid(digits) and not _overlaps(m.span(), taken):
+            add(_scored(text, "US_SSN", m.start(), m.end(), 0.5 if m.group(1) else 0.05))
+
+    for m in _PHONE.finditer(text):
+        digits = re.sub(r"\D", "", m.group())
+        if 10 <= len(digits) <= 15 and not _overlaps(m.span(), taken):
+            add(_scored(text, "PHONE_NUMBER", m.start(), m.end(), 0.4))
+
+    return sorted(matches, key=lambda match: match.start)
@@ -0,0 +1,87 @@
+"""Shared helpers for LLM calls to Ollama."""
+
+import json
+import threading
+import time
+from contextvars import ContextVar
+from typing import Dict, Optional
+import httpx
+import ollama
+from src.deadline import DeadlineExceeded
+from src.singleflight import SingleFlight
+
+_generate_flight = SingleFlight()
+
+# Budgeted calls share one client (and its connection pool); each request
+# gets its own timeout through _apply_timeout
+_client: Optional[ollama.Client] = None
+_client_lock = threading.Lock()
+_request_timeout: ContextVar[Optional[float]] = ContextVar("llm_request_timeout", default=None)
+
+
+def _apply_timeout(request: httpx.Request) -> None:
+    timeout = _request_timeout.get()
+    if timeout is not None:
+        request.extensions["timeout"] = httpx.Timeout(timeout).as_dict()
+
+
+def _get_client() -> ollama.Client:
+    global _client
+    # Created on first use so OLLAMA_HOST set after import is honoured
+    with _client_lock:
+        if _client is None:
+            _client = ollama.Client(event_hooks={"request": [_apply_timeout]})
+        return _client
+
+
+def _generate(model: str, prompt: str, timeout: Optional[float], **kwargs) -> Dict:
+    if timeout is None:
+        return ollama.generate(model=model, prompt=prompt, **kwargs)
+
+    # The HTTP request is abandoned when the budget expires
+    token = _request_timeout.set(timeout)
+    try:
+        return _get_client().generate(model=model, prompt=prompt, **kwargs)
+    except httpx.TimeoutException as e:
+        raise DeadlineExceeded(f"LLM call exceeded its {timeout:.1f}s budget") from e
+    finally:
+        _request_timeout.reset(token)
+
+
+def generate(model: str, prompt: str, timeout: Optional[float] = None, **kwargs) -> Dict:
+    """Generate a completion, coalescing identical in-flight requests.
+
+    If timeout is given (seconds), the call is cancelled and DeadlineExceeded
+    is raised once it expires.
+    """
+
+    if timeout is not None and timeout <= 0:
+        raise DeadlineExceeded("No time budget left for LLM call")
+
+    key = (model, prompt, json.dumps(kwargs, sort_keys=True, default=str))
+    deadline = time.monotonic() + timeout if timeout is not None else None
+
+    while True:
+        remaining = deadline - time.monotonic() if deadline is not None else None
+        if remaining is not None and remaining <= 0:
+            raise DeadlineExceeded(f"LLM call exceeded its {timeout:.1f}s budget")
+
+        try:
+            response, _ = _generate_flight.do(
+                key,
+                lambda: _generate(model, prompt, remaining, **kwargs),
+                timeout=remaining
+            )
+            return response
+        except DeadlineExceeded:
+            # The shared call ran out of its leader's budget; a caller with
+            # time left runs the request again instead of failing with it
+            if deadline is not None and time.monotonic() >= deadline:
+                raise
+        except TimeoutError as e:
+            raise DeadlineExceeded(f"LLM call exceeded its {timeout:.1f}s budget") from e
+
+
+def get_stats() -> Dict:
+    """Get coalescing statistics for LLM calls."""
+    return _generate_flight.get_stats()
@@ -1,16 +1,30 @@
 from langgraph.graph import StateGraph, END
+from langchain_core.runnables import RunnableLambda
 from src.agent_state import AgentState
 from src.agents.router_agent import RouterAgent
+from src.agents.embedding_router import EmbeddingRouter
 from src.agents.research_agent import ResearchAgent
 from src.agents.sql_agent import SQLAgent
+from src.agents.sql_guard import QueryCostGuard
+from src.agents.schema_index import SchemaIndex
+from src.agents.sql_cache import SQLCache
 from src.agents.code_agent import CodeAgent
 from src.agents.synthesis_agent import SynthesisAgent
 from src.vector_store import VectorStoreManager
 from src.config import AgentConfig
-from typing import Literal, Dict
+from typing import Awaitable, Callable, Literal, Dict, List, Optional, Tuple
+import asyncio
+import copy
+from src.singleflight import SingleFlight
+from src.speculation import SpeculativeExecutor
+from src.deadline import deadline_from_timeout, node_timeout, remaining_time
 from src.multi_agent_tracker import MultiAgentTracker
 from src.guardrails.guardrails_system import GuardrailsSystem
 
+# State keys merged with operator.add across parallel branches
+_APPEND_KEYS = ("agent_path", "errors", "degraded")
+
+
 class MultiAgentSystem:
     """LangGraph-based multi-agent orchestration system."""
 
@@ -22,12 +36,26 @@ class MultiAgentSystem:
             self.tracker = MultiAgentTracker()
 
         # Initialize agents
+        vector_store = VectorStoreManager()
+
+        fast_router = None
+        if self.config.enable_fast_routing:
+            fast_router = EmbeddingRouter(
+                embed_fn=vector_store.generate_embedding,
+                k=self.config.fast_routing_k
+            )
+            fast_router.add_examples(
+                EmbeddingRouter.load_examples(self.config.routing_examples_path)
+            )
+
         self.router = RouterAgent(
             model=self.config.router_model,
-            confidence_threshold=self.config.routing_confidence_threshold
+            confidence_threshold=self.config.routing_confidence_threshold,
+            fast_router=fast_router,
+            fast_path_audit_rate=self.config.fast_routing_audit_rate,
+            multi_intent=self.config.multi_intent_routing
         )
 
-        vector_store = VectorStoreManager()
         self.research_agent = ResearchAgent(
             vector_store=vector_store,
             model=self.config.research_model,
@@ -36,12 +64,41 @@ class MultiAgentSystem:
 
         self.sql_agent = SQLAgent(
             db_path=self.config.sql_db_path,
-            model=self.config.sql_model
+            model=self.config.sql_model,
+            pool_size=self.config.sql_pool_size,
+            max_rows=self.config.sql_max_rows,
+            count_total_rows=self.config.sql_count_total_rows,
+            cost_guard=QueryCostGuard(
+                large_table_rows=self.config.sql_large_table_rows,
+                max_join_rows=self.config.sql_max_join_rows,
+                rewrite_limit=self.config.sql_max_rows or 1000
+            ) if self.config.sql_cost_guard else None,
+            statement_timeout=self.config.sql_statement_timeout,
+            schema_index=SchemaIndex(
+                embed_fn=vector_store.generate_embedding,
+                top_k=self.config.sql_schema_top_k
+            ) if self.config.sql_schema_selection else None,
+            cache=SQLCache(
+                self.config.sql_db_path,
+                max_results=self.config.sql_cache_size
+            ) if self.config.sql_cache else None,
+            max_concurrent_queries=self.config.sql_max_concurrent_queries,
+            summarize_threshold=self.config.sql_summarize_threshold
         )
 
         self.code_agent = CodeAgent(
             repo_path=self.config.code_repo_path,
-            model=self.config.code_model
+            model=self.config.code_model,
+            index_path=self.config.code_index_path,
+            index_refresh_interval=self.config.code_index_refresh_interval,
+            search_mode=self.config.code_search_mode,
+            use_git=self.config.code_index_use_git,
+            max_file_bytes=self.config.code_max_file_bytes,
+            max_context_chars=self.config.code_max_context_chars,
+            semantic_store=VectorStoreManager(
+                collection_name=self.config.code_embeddings_collection
+            ) if self.config.code_semantic_search else None,
+            semantic_state_path=self.config.code_embeddings_state_path
         )
 
         self.synthesis_agent = SynthesisAgent(
@@ -50,7 +107,16 @@ class MultiAgentSystem:
 
         self.enable_guardrails = enable_guardrails
         if enable_guardrails:
-            self.guardrails = GuardrailsSystem()
+            self.guardrails = GuardrailsSystem(
+                hallucination_precheck=self.config.hallucination_precheck,
+                embed_fn=vector_store.generate_embedding if self.config.hallucination_embedding_check else None
+            )
+
+        # Coalesce identical in-flight queries
+        self._query_flight = SingleFlight()
+
+        # Work started ahead of the routing decision
+        self.speculation = SpeculativeExecutor() if self.config.speculative_retrieval else None
 
         # Build graph
         self.app = self._build_graph()
@@ -61,16 +127,23 @@ class MultiAgentSystem:
         workflow = StateGraph(AgentState)
 
         # Add nodes
-        workflow.add_node("router", self.router.route)
-        workflow.add_node("research", self.research_agent.research)
-        workflow.add_node("sql", self.sql_agent.query)
-        workflow.add_node("code", self.code_agent.query)
-        workflow.add_node("synthesis", self.synthesis_agent.synthesize)
+        if self.speculation is not None:
+            workflow.add_node("router", self._node(self._route_with_speculation))
+        else:
+            workflow.add_node("router", self._node(self.router.route))
+        workflow.add_node("research", self._node(self.research_agent.research))
+        # Sync invoke runs SQL inline; ainvoke runs it on the SQL thread pool
+        workflow.add_node("sql", RunnableLambda(
+            self._node(self.sql_agent.query),
+            afunc=self._anode(self.sql_agent.aquery)
+        ))
+        workflow.add_node("code", self._node(self.code_agent.query))
+        workflow.add_node("synthesis", self._node(self.synthesis_agent.synthesize))
 
         # Set entry point
         workflow.set_entry_point("router")
 
-        # Add conditional routing from router
+        # Add conditional routing from router (several specialists run in parallel)
         workflow.add_conditional_edges(
             "router",
             self._route_to_specialist,
@@ -82,7 +155,7 @@ class MultiAgentSystem:
             }
         )
 
-        # All specialists go to synthesis
+        # All specialists go to synthesis, which joins the parallel branches
         workflow.add_edge("research", "synthesis")
         workflow.add_edge("sql", "synthesis")
         workflow.add_edge("code", "synthesis")
@@ -92,29 +165,157 @@ class MultiAgentSystem:
 
         return workflow.compile()
 
-    def _route_to_specialist(self, state: AgentState) -> Literal["research", "sql", "code", "general"]:
-        """Determine which specialist to route to."""
-        query_type = state.get("query_type", "general")
+    def _node(self, step: Callable[[AgentState], AgentState]) -> Callable[[AgentState], Dict]:
+        """Wrap an agent step so it returns only the state keys it changed.
+
+        Parallel branches may not both write the same plain key, and list
+        keys are concatenated, so each node reports only its own updates.
+        """
+
+        def run(state: AgentState) -> Dict:
+            return self._changes(state, step(self._isolate(state)))
+
+        return run
+
+    def _anode(self, step: Callable[[AgentState], Awaitable[AgentState]]) -> Callable[[AgentState], Awaitable[Dict]]:
+        """Async counterpart of _node for coroutine agent steps."""
+
+        async def run(state: AgentState) -> Dict:
+            return self._changes(state, await step(self._isolate(state)))
+
+        return run
+
+    def _isolate(self, state: AgentState) -> AgentState:
+        local = dict(state)
+        for key in _APPEND_KEYS:
+            local[key] = []
+        return local
+
+    def _changes(self, state: AgentState, result: AgentState) -> Dict:
+        update = {key: result.get(key) or [] for key in _APPEND_KEYS}
+        for key, value in result.items():
+            if key not in _APPEND_KEYS and value is not state.get(key):
+                update[key] = value
+        return update
+
+    def _route_with_speculation(self, state: AgentState) -> AgentState:
+        """Route while retrieving documents concurrently.
+
+        The retrieval result is kept if research is among the routed intents
+        and discarded otherwise.
+        """
+
+        retrieval = self.speculation.start(
+            "research_retrieval",
+            self.research_agent.retrieve_context,
+            state["query"]
+        )
+
+        state = self.router.route(state)
+
+        if "research" in state["query_intents"]:
+            try:
+                # Within the research budget; past it the research agent's
+                # own retrieval is no slower than waiting longer
+                state["research_contexts"] = self.speculation.consume(
+                    retrieval,
+                    timeout=node_timeout(state, "research")
+                )
+            except Exception as e:
+                # The research agent retrieves again on its own
+                print(f"  Speculative retrieval failed: {str(e) or type(e).__name__}")
+        else:
+            self.speculation.discard(retrieval)
+
+        return state
+
+    def get_speculation_stats(self) -> Dict:
+        """Get saved vs wasted speculative work."""
+        return self.speculation.get_stats() if self.speculation is not None else {}
 
-        # Map query type to node name
-        return query_type
+    def _route_to_specialist(self, state: AgentState) -> List[Literal["research", "sql", "code", "general"]]:
+        """Determine which specialists to route to."""
+        intents = state.get("query_intents") or [state.get("query_type") or "general"]
 
-    def query(self, user_query: str, verbose: bool = True) -> Dict:
-        """Execute multi-agent query pipeline."""
+        # Map intents to node names; several names fan out in parallel
+        return intents
+
+    def query(self, user_query: str, verbose: bool = True, timeout: Optional[float] = None) -> Dict:
+        """Execute multi-agent query pipeline.
+
+        timeout is the latency budget in seconds (defaults to
+        config.query_timeout). Each agent gets a share of the remaining
+        budget; stages skipped to meet it are listed in 'degraded'.
+        """
+
+        if timeout is None:
+            timeout = self.config.query_timeout
+
+        if not self.config.coalesce_requests:
+            return self._execute_query(user_query, verbose, timeout)
+
+        # Concurrent identical queries wait for one shared execution
+        final_state, shared = self._query_flight.do(
+            (user_query, timeout),
+            lambda: self._execute_query(user_query, verbose, timeout)
+        )
+
+        # Give each caller its own copy so callers cannot mutate each other's result
+        return copy.deepcopy(final_state) if shared else final_state
+
+    def _execute_query(self, user_query: str, verbose: bool, timeout: Optional[float]) -> Dict:
+        """Run guardrails and the agent graph for a single query."""
+
+        initial_state, blocked = self._start_query(user_query, verbose, timeout)
+        if blocked is not None:
+            return blocked
+
+        # Execute graph
+        final_state = self.app.invoke(initial_state)
+
+        return self._finish_query(user_query, final_state, verbose)
+
+    async def aquery(self, user_query: str, verbose: bool = True, timeout: Optional[float] = None) -> Dict:
+        """Async query: the graph runs with ainvoke so the event loop stays free.
+
+        Guardrails run in a worker thread. Unlike query(), concurrent
+        identical queries are not coalesced.
+        """
+
+        if timeout is None:
+            timeout = self.config.query_timeout
+
+        initial_state, blocked = await asyncio.to_thread(self._start_query, user_query, verbose, timeout)
+        if blocked is not None:
+            return blocked
+
+        final_state = await self.app.ainvoke(initial_state)
+
+        return await asyncio.to_thread(self._finish_query, user_query, final_state, verbose)
+
+    def _start_query(self, user_query: str, verbose: bool, timeout: Optional[float]) -> Tuple[Optional[AgentState], Optional[Dict]]:
+        """Validate input and build the initial state.
+
+        Returns (initial_state, None), or (None, blocked_result) if the input
+        guardrails reject the query.
+        """
+
+        deadline = deadline_from_timeout(timeout)
 
         # Validate input with guardrails
         if self.enable_guardrails:
             input_validation = self.guardrails.validate_input(user_query)
 
             if not input_validation['is_safe']:
-                return {
+                return None, {
                     'query': user_query,
                     'final_answer': "Sorry, I cannot process this query due to safety concerns.",
                     'validation_failed': True,
                     'warnings': input_validation['warnings'],
                     'sources': [],
                     'agent_path': [],
-                    'errors': input_validation['warnings']
+                    'errors': input_validation['warnings'],
+                    'degraded': []
                 }
 
         if verbose:
@@ -127,18 +328,24 @@ class MultiAgentSystem:
         initial_state = AgentState(
             query=user_query,
             query_type=None,
+            query_intents=None,
             routing_confidence=None,
+            research_contexts=None,
             research_result=None,
             sql_result=None,
             code_result=None,
             final_answer=None,
             sources=None,
             agent_path=[],
-            errors=[]
+            errors=[],
+            deadline=deadline,
+            degraded=[]
         )
 
-        # Execute graph
-        final_state = self.app.invoke(initial_state)
+        return initial_state, None
+
+    def _finish_query(self, user_query: str, final_state: Dict, verbose: bool) -> Dict:
+        """Track, report and validate the output of a finished graph run."""
 
         # Track execution
         if self.enable_tracking:
@@ -154,11 +361,16 @@ class MultiAgentSystem:
             print("="*60)
             print(f"Agent Path: {' → '.join(final_state['agent_path'])}")
             print(f"Query Type: {final_state['query_type']}")
+            if len(final_state.get('query_intents') or []) > 1:
+                print(f"Intents: {', '.join(final_state['query_intents'])}")
             print(f"Sources: {len(final_state.get('sources', []))}")
 
             if final_state['errors']:
                 print(f"Errors: {final_state['errors']}")
 
+            if final_state.get('degraded'):
+                print(f"Degraded: {final_state['degraded']}")
+
             print("\n" + "="*60)
             print("FINAL ANSWER")
             print("="*60)
@@ -170,15 +382,17 @@ class MultiAgentSystem:
             contexts = [str(s) for s in final_state.get('sources', [])]
             output_validation = self.guardrails.validate_output(
                 final_state['final_answer'],
-                contexts
+                contexts,
+                time_budget=remaining_time(final_state)
             )
 
             final_state['output_validation'] = output_validation
+            final_state['degraded'] = final_state.get('degraded', []) + output_validation['degraded']
 
             # Sanitize if needed
             if output_validation.get('pii_in_output', {}).get('has_sensitive_pii'):
                 final_state['final_answer'] = self.guardrails.sanitize_output(
                     final_state['final_answer']
                 )
-                
+
         return final_state
@@ -19,6 +19,7 @@ class MultiAgentTracker:
             # Log query metadata
             mlflow.log_param("query", query[:100])  # Truncate long queries
             mlflow.log_param("query_type", result.get("query_type"))
+            mlflow.log_param("query_intents", ",".join(result.get("query_intents") or []))
             mlflow.log_param("routing_confidence", result.get("routing_confidence"))
 
             # Log execution path
@@ -29,6 +30,7 @@ class MultiAgentTracker:
             mlflow.log_metric("answer_length", len(result.get("final_answer", "")))
             mlflow.log_metric("num_sources", len(result.get("sources", [])))
             mlflow.log_metric("num_errors", len(result["errors"]))
+            mlflow.log_metric("num_degraded", len(result.get("degraded", [])))
             mlflow.log_metric("timestamp", datetime.now().timestamp())
 
             # Log artifacts
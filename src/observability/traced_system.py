@@ -3,7 +3,7 @@
 from src.multi_agent_system import MultiAgentSystem
 from src.config import AgentConfig
 from src.observability.phoenix_setup import PhoenixObservability
-from typing import Dict
+from typing import Dict, Optional
 import time
 
 
@@ -19,13 +19,13 @@ class TracedMultiAgentSystem:
         # Initialize system
         self.system = MultiAgentSystem(config)
 
-    def query(self, user_query: str, verbose: bool = True) -> Dict:
+    def query(self, user_query: str, verbose: bool = True, timeout: Optional[float] = None) -> Dict:
         """Execute query with tracing."""
 
         start_time = time.time()
 
         # Execute with automatic tracing
-        result = self.system.query(user_query, verbose=verbose)
+        result = self.system.query(user_query, verbose=verbose, timeout=timeout)
 
         execution_time = time.time() - start_time
         result['execution_time'] = execution_time
@@ -1,5 +1,5 @@
 from src.vector_store import VectorStoreManager
-import ollama
+from src import llm
 from typing import List, Dict
 
 class RAGEngine:
@@ -33,7 +33,7 @@ Question: {query}
 Answer:"""
 
         # Generate response
-        response = ollama.generate(model=self.model, prompt=prompt)
+        response = llm.generate(model=self.model, prompt=prompt)
         return response['response']
 
     def query(self, question: str, n_contexts: int = 3, verbose: bool = False) -> Dict:
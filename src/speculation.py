@@ -0,0 +1,110 @@
+"""Speculative execution of work that is likely, but not certain, to be needed."""
+
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Any, Callable, Dict, Optional
+
+
+class SpeculativeTask:
+    """Handle for a speculatively started call."""
+
+    def __init__(self, name: str, future: Future):
+        self.name = name
+        self.future = future
+        self.started_at: Optional[float] = None
+        self.finished_at: Optional[float] = None
+
+
+class SpeculativeExecutor:
+    """Run work ahead of a decision and account for saved vs wasted time.
+
+    A task is either consumed (its result is used, and the time it ran in
+    parallel with the decision counts as saved) or discarded (all of the
+    time it ran counts as wasted).
+    """
+
+    def __init__(self, max_workers: int = 4):
+        self._pool = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="speculative")
+        self._lock = threading.Lock()
+        self._stats: Dict[str, Dict] = {}
+
+    def _task_stats(self, name: str) -> Dict:
+        return self._stats.setdefault(name, {
+            'launched': 0,
+            'consumed': 0,
+            'discarded': 0,
+            'failed': 0,
+            'saved_seconds': 0.0,
+            'wasted_seconds': 0.0
+        })
+
+    def start(self, name: str, fn: Callable, *args, **kwargs) -> SpeculativeTask:
+        """Start fn(*args, **kwargs) in the background."""
+
+        def run():
+            task.started_at = time.perf_counter()
+            try:
+                return fn(*args, **kwargs)
+            finally:
+                task.finished_at = time.perf_counter()
+
+        task = SpeculativeTask(name, Future())
+        task.future = self._pool.submit(run)
+
+        with self._lock:
+            self._task_stats(name)['launched'] += 1
+
+        return task
+
+    def consume(self, task: SpeculativeTask, timeout: Optional[float] = None) -> Any:
+        """Wait for and return the task result, crediting the overlapped time.
+
+        If the result is not ready within timeout seconds, the task is
+        discarded and TimeoutError is raised.
+        """
+
+        decided_at = time.perf_counter()
+        try:
+            result = task.future.result(timeout=timeout)
+        except Exception:
+            if not task.future.done():
+                # Not ready in time; the caller does the work itself
+                self.discard(task)
+            else:
+                with self._lock:
+                    self._task_stats(task.name)['failed'] += 1
+            raise
+
+        saved = max(0.0, min(task.finished_at, decided_at) - task.started_at)
+        with self._lock:
+            stats = self._task_stats(task.name)
+            stats['consumed'] += 1
+            stats['saved_seconds'] += saved
+
+        return result
+
+    def discard(self, task: SpeculativeTask) -> None:
+        """Drop an unneeded task, charging its run time as wasted work."""
+
+        with self._lock:
+            self._task_stats(task.name)['discarded'] += 1
+
+        if task.future.cancel():
+            return  # Never started: nothing wasted
+
+        def charge_waste(_):
+            if task.started_at is None or task.finished_at is None:
+                return
+            with self._lock:
+                self._task_stats(task.name)['wasted_seconds'] += task.finished_at - task.started_at
+
+        task.future.add_done_callback(charge_waste)
+
+    def get_stats(self) -> Dict:
+        """Get saved vs wasted work per task name."""
+        with self._lock:
+            return {name: dict(stats) for name, stats in self._stats.items()}
+
+    def shutdown(self) -> None:
+        self._pool.shutdown(wait=False, cancel_futures=True)
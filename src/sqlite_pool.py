@@ -0,0 +1,171 @@
+"""Thread-safe pool of read-only SQLite connections."""
+
+import queue
+import sqlite3
+import threading
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Dict, Iterator, Optional
+
+
+class SQLitePool:
+    """Pool of read-only SQLite connections with performance pragmas.
+
+    Connections are opened with a `mode=ro` URI and `query_only`, so
+    LLM-generated SQL cannot modify the database, and are reused across
+    queries and threads to keep page caches warm.
+    """
+
+    def __init__(
+        self,
+        db_path: str,
+        max_size: int = 4,
+        acquire_timeout: float = 30.0,
+        mmap_size: int = 256 * 1024 * 1024,
+        cache_size_kib: int = 64 * 1024,
+        enable_wal: bool = True
+    ):
+        self.db_path = db_path
+        self.max_size = max_size
+        self.acquire_timeout = acquire_timeout
+        self.mmap_size = mmap_size
+        self.cache_size_kib = cache_size_kib
+
+        self._idle: "queue.LifoQueue[sqlite3.Connection]" = queue.LifoQueue()
+        self._lock = threading.Lock()
+        self._created = 0
+        self._closed = False
+
+        # Metrics
+        self.hits = 0  # Acquisitions served by an idle pooled connection
+        self.misses = 0  # Acquisitions that had to open a new connection
+        self.waits = 0  # Acquisitions that blocked because the pool was full
+
+        if enable_wal:
+            self._enable_wal()
+
+    def _enable_wal(self) -> None:
+        """Switch the database to WAL so readers never block on writers.
+
+        journal_mode is persistent but needs a writable connection; this is
+        best-effort and skipped for read-only files.
+        """
+        try:
+            conn = sqlite3.connect(self.db_path)
+            try:
+                conn.execute("PRAGMA journal_mode=WAL")
+            finally:
+                conn.close()
+        except sqlite3.Error:
+            pass
+
+    def _connect(self) -> sqlite3.Connection:
+        uri = f"{Path(self.db_path).resolve().as_uri()}?mode=ro"
+        conn = sqlite3.connect(uri, uri=True, check_same_thread=False)
+
+        conn.execute("PRAGMA query_only = ON")
+        conn.execute(f"PRAGMA mmap_size = {int(self.mmap_size)}")
+        conn.execute(f"PRAGMA cache_size = -{int(self.cache_size_kib)}")  # Negative = KiB
+        conn.execute("PRAGMA temp_store = MEMORY")
+
+        return conn
+
+    def _reset(self, conn: sqlite3.Connection) -> None:
+        """Restore per-use settings before a connection goes back to the pool."""
+        if conn.in_transaction:
+            conn.rollback()
+        conn.row_factory = None
+        conn.set_progress_handler(None, 0)
+
+    @contextmanager
+    def connection(self) -> Iterator[sqlite3.Connection]:
+        """Borrow a connection for the duration of a with-block."""
+
+        conn = self.acquire()
+        try:
+            yield conn
+        finally:
+            self.release(conn)
+
+    def acquire(self) -> sqlite3.Connection:
+        """Take a connection from the pool, opening one if under max_size."""
+
+        try:
+            conn = self._idle.get_nowait()
+            with self._lock:
+                self.hits += 1
+            return conn
+        except queue.Empty:
+            pass
+
+        with self._lock:
+            if self._closed:
+                raise RuntimeError("Connection pool is closed")
+            can_create = self._created < self.max_size
+            if can_create:
+                self._created += 1
+                self.misses += 1
+            else:
+                self.waits += 1
+
+        if can_create:
+            try:
+                return self._connect()
+            except Exception:
+                with self._lock:
+                    self._created -= 1
+                raise
+
+        try:
+            conn = self._idle.get(timeout=self.acquire_timeout)
+        except queue.Empty:
+            raise TimeoutError(
+                f"No SQLite connection available within {self.acquire_timeout:.1f}s"
+            )
+
+        with self._lock:
+            self.hits += 1
+        return conn
+
+    def release(self, conn: sqlite3.Connection) -> None:
+        """Return a connection to the pool."""
+
+        try:
+            self._reset(conn)
+        except sqlite3.Error:
+            # Broken connection: drop it and let the pool open a new one
+            conn.close()
+            with self._lock:
+                self._created -= 1
+            return
+
+        with self._lock:
+            closed = self._closed
+        if closed:
+            conn.close()
+        else:
+            self._idle.put(conn)
+
+    def close(self) -> None:
+        """Close all idle connections; borrowed ones close on release."""
+        with self._lock:
+            self._closed = True
+        while True:
+            try:
+                self._idle.get_nowait().close()
+            except queue.Empty:
+                break
+
+    def get_stats(self) -> Dict:
+        """Get pool size and hit metrics."""
+        with self._lock:
+            total = self.hits + self.misses
+            return {
+                'max_size': self.max_size,
+                'open_connections': self._created,
+                'idle_connections': self._idle.qsize(),
+                'hits': self.hits,
+                'misses': self.misses,
+                'waits': self.waits,
+                'hit_rate': self.hits / total if total else 0.0
+            }
@@ -1,7 +1,8 @@
 import chromadb
 from chromadb.config import Settings
-from typing import List, Dict
+from typing import List, Dict, Optional
 import ollama
+from src.singleflight import SingleFlight
 
 class VectorStoreManager:
     """Manage embeddings and vector database operations."""
@@ -19,9 +20,15 @@ class VectorStoreManager:
             metadata={"description": "Research assistant document store"}
         )
 
+        # Coalesce concurrent embedding requests for the same text
+        self._embedding_flight = SingleFlight()
+
     def generate_embedding(self, text: str) -> List[float]:
         """Generate embedding using Ollama."""
-        response = ollama.embeddings(model="llama3.1", prompt=text)
+        response, _ = self._embedding_flight.do(
+            text,
+            lambda: ollama.embeddings(model="llama3.1", prompt=text)
+        )
         return response['embedding']
 
     def add_chunks(self, chunks: List[Dict]) -> None:
@@ -56,13 +63,30 @@ class VectorStoreManager:
 
         print(f"Added {len(chunks)} chunks to vector store")
 
-    def search(self, query: str, n_results: int = 5) -> Dict:
+    def upsert_chunks(self, chunks: List[Dict]) -> None:
+        """Add or replace chunks by id (each chunk has 'id', 'text' and 'metadata')."""
+        if not chunks:
+            return
+
+        self.collection.upsert(
+            documents=[chunk['text'] for chunk in chunks],
+            embeddings=[self.generate_embedding(chunk['text']) for chunk in chunks],
+            metadatas=[chunk['metadata'] for chunk in chunks],
+            ids=[chunk['id'] for chunk in chunks]
+        )
+
+    def delete_chunks(self, where: Dict) -> None:
+        """Delete all chunks whose metadata matches where."""
+        self.collection.delete(where=where)
+
+    def search(self, query: str, n_results: int = 5, where: Optional[Dict] = None) -> Dict:
         """Search for relevant chunks."""
         query_embedding = self.generate_embedding(query)
 
         results = self.collection.query(
             query_embeddings=[query_embedding],
-            n_results=n_results
+            n_results=n_results,
+            where=where
         )
 
         return results